@@ -0,0 +1,90 @@
+"""
+requests/sec of token verification, with and without the last_active write-behind buffer.
+needs a running mongodb (MONGODB_URI), data is written to `<MONGODB_NAME>_bench` database.
+
+usage:
+    python -m benchmarks.auth_verify_bench [requests] [threads]
+"""
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from config.env import Env
+from config.mongodb import MongodbClient
+from domain.dto import auth_dto
+from domain.model import user_model
+from repository import user_repo
+from service import auth_service
+from utils import helper
+from utils import jwt as jwt_utils
+from utils.auth_cache import UserSnapshotCache
+from utils.last_active import LastActiveBuffer
+
+
+def run(service: auth_service.AuthService, token: str, stateless: bool, total: int, threads: int) -> float:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(
+            executor.map(
+                lambda _: service.verifyToken(token=token, stateless=stateless),
+                range(total),
+            )
+        )
+    return total / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    MongodbClient.init()
+    MongodbClient.db = MongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    user_repo_ = user_repo.UserRepo(mongo_db=MongodbClient)
+
+    time_now = helper.timeNow()
+    user = user_model.UserModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        username=f"bench_{helper.generateRandomNumber(6)}",
+        email=f"bench_{helper.generateRandomNumber(6)}@gmail.com",
+        role="customer",
+    )
+    user_repo_.create(data=user)
+    token = jwt_utils.encodeToken(
+        payload=auth_dto.JwtPayload(
+            **user.model_dump(),
+            sub=user.id,
+            exp=int((helper.timeNow() + timedelta(hours=1)).timestamp()),
+        ).model_dump(mode="json"),
+        secret=Env.JWT_SECRET_KEY,
+    )
+
+    service = auth_service.AuthService(
+        user_repo=user_repo_,
+        refresh_token_repo=None,
+        email_util=None,
+        otp_repo=None,
+        auth_util=None,
+        cart_repo=None,
+        wallet_repo=None,
+    )
+
+    try:
+        rps = run(service, token, stateless=False, total=total, threads=threads)
+        print(f"per request write (find_one_and_update): {rps:10.1f} req/s")
+
+        UserSnapshotCache.clear()
+        LastActiveBuffer.init(user_repo=user_repo_, interval_seconds=1)
+        rps = run(service, token, stateless=True, total=total, threads=threads)
+        LastActiveBuffer.close()
+        print(f"snapshot + write-behind buffer:          {rps:10.1f} req/s")
+    finally:
+        user_repo_.delete(id=user.id)
+        MongodbClient.close()
@@ -0,0 +1,188 @@
+"""
+latency of AsyncCartService.getCartItems for carts of 1, 10 and 100 items:
+the previous per item getById + getProductVariant lookups vs the batching
+AsyncProductLoader.
+needs a running mongodb (MONGODB_URI), data is written to `<MONGODB_NAME>_bench` database.
+
+usage:
+    python -m benchmarks.cart_items_bench [iterations]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from config.env import Env
+from config.mongodb import AsyncMongodbClient, MongodbClient
+from domain.dto import auth_dto
+from domain.model import cart_model, product_model
+from repository import cart_repo, product_loader, product_repo
+from service import cart_service
+from utils import helper
+from utils import mongodb as mongodb_utils
+
+CART_SIZES = [1, 10, 100]
+
+
+def seedCart(
+    cart_repo_: cart_repo.CartRepo,
+    product_repo_: product_repo.ProductRepo,
+    user_id: str,
+    size: int,
+):
+    time_now = helper.timeNow()
+    cart = cart_model.CartModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        user_id=user_id,
+    )
+    cart_repo_.create(cart=cart)
+
+    for i in range(size):
+        product = product_model.ProductModel(
+            id=helper.generateUUID4(),
+            created_at=time_now,
+            updated_at=time_now,
+            name=f"bench product {user_id} {i}",
+        )
+        product_repo_.create(product=product)
+        variant = product_model.ProductVariantModel(
+            id=helper.generateUUID4(),
+            created_at=time_now,
+            updated_at=time_now,
+            product_id=product.id,
+            is_main=True,
+            sku=f"bench-{i}",
+            price=10 + i,
+            price_currency="USD",
+            price_currency_lang="en",
+            stock=10,
+        )
+        product_repo_.createVariant(product_variant=variant)
+        cart_repo_.createCartItem(
+            cart_item=cart_model.CartItemModel(
+                id=helper.generateUUID4(),
+                created_at=time_now,
+                updated_at=time_now,
+                created_by=user_id,
+                cart_id=cart.id,
+                product_id=product.id,
+                product_variant_id=variant.id,
+                quantity=1,
+            )
+        )
+
+
+class PerItemProductLoader(product_loader.AsyncProductLoader):
+    """
+    same interface, but one query per id like the previous CartService lookups
+    """
+
+    def __init__(self, product_repo: product_repo.AsyncProductRepo):
+        super().__init__(product_repo=product_repo)
+        self.products = product_loader._AsyncBatchLoader(
+            lambda ids: perItem(product_repo.getById, ids)
+        )
+        self.variants = product_loader._AsyncBatchLoader(
+            lambda ids: perItem(product_repo.getProductVariant, ids)
+        )
+
+
+async def perItem(get, ids: list[str]) -> list:
+    return [item for item in [await get(id=id) for id in ids] if item]
+
+
+async def getCartItems(
+    cart_repo_: cart_repo.AsyncCartRepo,
+    product_loader_: product_loader.AsyncProductLoader,
+    current_user: auth_dto.CurrentUser,
+):
+    await cart_service.AsyncCartService(
+        cart_repo=cart_repo_, product_loader=product_loader_
+    ).getCartItems(current_user=current_user)
+
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<40} p50 {statistics.median(latencies):7.3f} ms   p99 {p99:7.3f} ms"
+    )
+
+
+async def measure(
+    loader_class: type[product_loader.AsyncProductLoader],
+    current_user: auth_dto.CurrentUser,
+    iterations: int,
+) -> list[float]:
+    cart_repo_ = cart_repo.AsyncCartRepo(mongo_db=AsyncMongodbClient)
+    product_repo_ = product_repo.AsyncProductRepo(mongo_db=AsyncMongodbClient)
+    latencies = []
+    for _ in range(iterations):
+        # new loader per call, like a request
+        loader = loader_class(product_repo=product_repo_)
+        started = time.perf_counter()
+        await getCartItems(cart_repo_, loader, current_user)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(iterations: int, current_users: list[auth_dto.CurrentUser]):
+    # the async client binds to the running loop
+    AsyncMongodbClient.init()
+    AsyncMongodbClient.db = AsyncMongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    try:
+        for size, current_user in zip(CART_SIZES, current_users):
+            for name, loader_class in [
+                ("per item lookups", PerItemProductLoader),
+                ("batching loader", product_loader.AsyncProductLoader),
+            ]:
+                latencies = await measure(loader_class, current_user, iterations)
+                report(f"{size:>3} items: {name}", latencies)
+    finally:
+        await AsyncMongodbClient.close()
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    MongodbClient.init()
+    MongodbClient.db = MongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    coll_names = [
+        cart_model.CartModel.getCollName(),
+        cart_model.CartItemModel.getCollName(),
+        product_model.ProductModel.getCollName(),
+        product_model.ProductVariantModel.getCollName(),
+    ]
+    for coll_name in coll_names:
+        MongodbClient.db.drop_collection(coll_name)
+    mongodb_utils.ensureIndexes(db=MongodbClient.db, force=True)
+
+    cart_repo_ = cart_repo.CartRepo(mongo_db=MongodbClient)
+    product_repo_ = product_repo.ProductRepo(mongo_db=MongodbClient)
+
+    try:
+        current_users = []
+        for size in CART_SIZES:
+            current_user = auth_dto.CurrentUser(
+                id=helper.generateUUID4(),
+                created_at=helper.timeNow(),
+                updated_at=helper.timeNow(),
+                role="customer",
+                username=f"bench{size}",
+                email=f"bench{size}@example.com",
+            )
+            seedCart(cart_repo_, product_repo_, current_user.id, size)
+            current_users.append(current_user)
+
+        asyncio.run(main(iterations, current_users))
+    finally:
+        for coll_name in coll_names:
+            MongodbClient.db.drop_collection(coll_name)
+        MongodbClient.close()
@@ -0,0 +1,116 @@
+"""
+time to build models from stored documents: validating constructor `Model(**doc)`
+vs `Model.fromDoc(doc)` (no validation, nested models constructed).
+documents are made in memory like the ones repositories read, no database needed.
+
+usage:
+    python -m benchmarks.hydration_bench [documents]
+"""
+
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from domain.dto import product_dto
+from domain.model import product_model, user_model
+from utils import helper
+
+
+def productDoc(i: int) -> dict:
+    time_now = helper.timeNow()
+    return product_model.ProductModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        name=f"bench product {i}",
+        brand="bench",
+        tags=["a", "b"],
+        images=[f"{i}.png"],
+        min_price=10,
+        max_price=20,
+        main_price=10,
+        main_price_currency="USD",
+        total_stock=5,
+        main_image=f"{i}.png",
+    ).model_dump()
+
+
+def variantDoc(product_id: str, i: int) -> dict:
+    time_now = helper.timeNow()
+    return product_model.ProductVariantModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        product_id=product_id,
+        is_main=i == 0,
+        sku=f"bench-{i}",
+        price=10 + i,
+        price_currency="USD",
+        price_currency_lang="en",
+        stock=i,
+        dimensions=product_model.ProductModel_Dimensions(depth=1, width=2, height=3),
+    ).model_dump()
+
+
+def userDoc(i: int) -> dict:
+    time_now = helper.timeNow()
+    return user_model.UserModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        role="customer",
+        username=f"bench{i}",
+        email=f"bench{i}@example.com",
+        birth_date="01-01-2000",
+    ).model_dump()
+
+
+def measure(hydrate, docs: list[dict], rounds: int = 5) -> float:
+    """
+    best µs per document of `rounds` passes
+    """
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for doc in docs:
+            hydrate(doc)
+        timings.append((time.perf_counter() - started) * 1_000_000 / len(docs))
+    return min(timings)
+
+
+def report(name: str, validated_us: float, constructed_us: float):
+    print(
+        f"{name:<34} Model(**doc) {validated_us:8.2f} us   "
+        f"fromDoc {constructed_us:7.2f} us   {validated_us / constructed_us:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    products = [productDoc(i) for i in range(documents)]
+    variants = [variantDoc(helper.generateUUID4(), i % 10) for i in range(documents)]
+    users = [userDoc(i) for i in range(documents)]
+    # detail documents carry 10 variants each
+    details = []
+    for product in products[: max(documents // 10, 1)]:
+        details.append(
+            {**product, "variants_": [variantDoc(product["id"], i) for i in range(10)]}
+        )
+
+    for name, model, docs in [
+        ("ProductModel", product_model.ProductModel, products),
+        ("ProductVariantModel", product_model.ProductVariantModel, variants),
+        ("UserModel", user_model.UserModel, users),
+        ("GetProductDetailResItem", product_dto.GetProductDetailResItem, details),
+    ]:
+        # same model either way
+        assert model(**docs[0]) == model.fromDoc(docs[0])
+        report(
+            name,
+            measure(lambda doc: model(**doc), docs),
+            measure(model.fromDoc, docs),
+        )
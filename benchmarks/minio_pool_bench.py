@@ -0,0 +1,110 @@
+"""
+latency of a minio call (stat_object) done with a new client per request, like the
+previous getMinioClient dependency, vs the app scoped MinioClient and its pool.
+runs against a local stand-in http server, no minio needed.
+
+usage:
+    python -m benchmarks.minio_pool_bench [iterations] [threads]
+"""
+
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from minio import Minio
+
+from config.minio import MinioClient
+
+LOCATION_XML = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<LocationConstraint xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+    b"us-east-1</LocationConstraint>"
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    answer GetBucketLocation and HeadObject like minio does, with keep-alive
+    """
+
+    protocol_version = "HTTP/1.1"
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StandInHandler.lock:
+            StandInHandler.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(LOCATION_XML)))
+        self.end_headers()
+        self.wfile.write(LOCATION_XML)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", "1024")
+        self.send_header("ETag", '"d41d8cd98f00b204e9800998ecf8427e"')
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def newClient(endpoint: str) -> Minio:
+    # previous getMinioClient(): a new client and pool per request
+    return Minio(endpoint, access_key="bench", secret_key="bench", secure=False)
+
+
+def measure(get_client, iterations: int, threads: int) -> list[float]:
+    def call(_) -> float:
+        started = time.perf_counter()
+        get_client().stat_object("products", "bench.png")
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(call, range(iterations)))
+
+
+def report(name: str, latencies: list[float], connections: int):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<28} p50 {statistics.median(latencies):7.3f} ms   "
+        f"p99 {p99:7.3f} ms   connections {connections}"
+    )
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"127.0.0.1:{server.server_address[1]}"
+
+    try:
+        StandInHandler.connections = 0
+        latencies = measure(lambda: newClient(endpoint), iterations, threads)
+        report("client per request", latencies, StandInHandler.connections)
+
+        MinioClient.init(endpoint=endpoint)
+        StandInHandler.connections = 0
+        latencies = measure(lambda: MinioClient.client, iterations, threads)
+        report("app scoped client", latencies, StandInHandler.connections)
+        print(f"pool: {MinioClient.poolStats()}")
+    finally:
+        MinioClient.close()
+        server.shutdown()
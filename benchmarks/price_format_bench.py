@@ -0,0 +1,83 @@
+"""
+time to localize the prices of a product list page: babel format_currency with a
+new Locale per price (previous helper.localizePrice) vs helper.localizePrice
+(cached PriceFormatter) vs helper.localizePrices (one lookup per page).
+no database needed.
+
+usage:
+    python -m benchmarks.price_format_bench [pages] [page_size]
+"""
+
+import random
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from babel import Locale
+from babel.numbers import format_currency
+
+from utils import helper
+
+PAIRS = [("en", "USD"), ("id", "IDR"), ("de", "EUR"), ("ja", "JPY")]
+
+
+def babelPrices(prices: list[float], currency_code: str, language_code: str):
+    return [
+        format_currency(price, currency_code, locale=Locale(language_code))
+        for price in prices
+    ]
+
+
+def cachedPrices(prices: list[float], currency_code: str, language_code: str):
+    return [
+        helper.localizePrice(price, currency_code, language_code) for price in prices
+    ]
+
+
+def measure(localize, pages: list[list[float]]) -> float:
+    """
+    µs per page, best of 3 passes
+    """
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        for i, prices in enumerate(pages):
+            language_code, currency_code = PAIRS[i % len(PAIRS)]
+            localize(prices, currency_code, language_code)
+        timings.append((time.perf_counter() - started) * 1_000_000 / len(pages))
+    return min(timings)
+
+
+def report(name: str, page_us: float, baseline_us: float, page_size: int):
+    print(
+        f"{name:<16} {page_us:9.1f} us/page   {page_us / page_size:6.2f} us/price   "
+        f"{baseline_us / page_us:5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    pages_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    random.seed(0)
+    pages = [
+        [round(random.uniform(1, 5_000_000), 2) for _ in range(page_size)]
+        for _ in range(pages_count)
+    ]
+
+    # same strings either way
+    for i, prices in enumerate(pages[: len(PAIRS)]):
+        language_code, currency_code = PAIRS[i]
+        expected = babelPrices(prices, currency_code, language_code)
+        assert cachedPrices(prices, currency_code, language_code) == expected
+        assert helper.localizePrices(prices, currency_code, language_code) == expected
+
+    baseline_us = measure(babelPrices, pages)
+    report("format_currency", baseline_us, baseline_us, page_size)
+    report("localizePrice", measure(cachedPrices, pages), baseline_us, page_size)
+    report(
+        "localizePrices", measure(helper.localizePrices, pages), baseline_us, page_size
+    )
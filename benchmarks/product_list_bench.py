@@ -0,0 +1,182 @@
+"""
+throughput and latency of concurrent product list requests: a sync `def` handler
+on ProductService (run on the anyio threadpool, 40 threads by default, served with
+SYNC_HANDLERS) vs an `async def` handler on AsyncProductService (the default).
+requests are sent straight to the ASGI app, no server or http client involved.
+needs a running mongodb (MONGODB_URI), data is written to `<MONGODB_NAME>_bench` database.
+
+usage:
+    python -m benchmarks.product_list_bench [requests] [concurrency]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from fastapi import Depends, FastAPI
+
+from config.env import Env
+from config.mongodb import AsyncMongodbClient, MongodbClient
+from domain.dto import auth_dto
+from domain.model import product_model, user_model
+from domain.rest import product_rest
+from repository import product_repo, user_repo
+from service import product_service
+from utils import helper
+from utils import mongodb as mongodb_utils
+
+PRODUCTS = 5000
+
+
+def seedProducts(product_repo_: product_repo.ProductRepo, count: int):
+    time_now = helper.timeNow()
+    product_repo_.product_coll.insert_many(
+        [
+            product_model.ProductModel(
+                id=helper.generateUUID4(),
+                created_at=time_now,
+                updated_at=time_now,
+                name=f"bench product {i}",
+                main_price=10 + i % 100,
+                main_price_currency="USD",
+                total_stock=i % 5,
+            ).model_dump()
+            for i in range(count)
+        ]
+    )
+
+
+def createApp(user: user_model.UserModel) -> FastAPI:
+    app = FastAPI()
+    current_user = auth_dto.CurrentUser(**user.model_dump())
+
+    @app.get("/sync")
+    def sync_product_list(query: product_rest.GetProductListReq = Depends()):
+        product_service.ProductService(
+            product_repo=product_repo.ProductRepo(mongo_db=MongodbClient),
+            minio_client=None,
+        ).getList(query=query, current_user=current_user)
+
+    @app.get("/async")
+    async def async_product_list(query: product_rest.GetProductListReq = Depends()):
+        await product_service.AsyncProductService(
+            product_repo=product_repo.AsyncProductRepo(mongo_db=AsyncMongodbClient),
+            minio_client=None,
+        ).getList(query=query, current_user=current_user)
+
+    return app
+
+
+async def call(app: FastAPI, path: str, query_string: bytes) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query_string,
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    if status != [200]:
+        raise RuntimeError(f"{path} responded {status}")
+    return (time.perf_counter() - started) * 1000
+
+
+async def measure(
+    app: FastAPI, path: str, requests: int, concurrency: int
+) -> tuple[list[float], float]:
+    # page through the catalog, a few pages apart so not every request is the same
+    query_strings = [
+        f"limit=20&page={i % 50 + 1}&sort_by=price".encode() for i in range(requests)
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(query_string: bytes) -> float:
+        async with semaphore:
+            return await call(app, path, query_string)
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(limited(qs) for qs in query_strings))
+    return latencies, requests / (time.perf_counter() - started)
+
+
+def report(name: str, latencies: list[float], throughput: float):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<14} {throughput:8.1f} req/s   "
+        f"p50 {statistics.median(latencies):8.3f} ms   p99 {p99:8.3f} ms"
+    )
+
+
+async def main(requests: int, concurrency: int, app: FastAPI):
+    # the async client binds to the running loop
+    AsyncMongodbClient.init()
+    AsyncMongodbClient.db = AsyncMongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    try:
+        # warm up both clients and their pools
+        await measure(app, "/sync", 50, 10)
+        await measure(app, "/async", 50, 10)
+
+        for name, path in [("sync def", "/sync"), ("async def", "/async")]:
+            latencies, throughput = await measure(app, path, requests, concurrency)
+            report(name, latencies, throughput)
+    finally:
+        await AsyncMongodbClient.close()
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    MongodbClient.init()
+    MongodbClient.db = MongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    coll_names = [
+        product_model.ProductModel.getCollName(),
+        user_model.UserModel.getCollName(),
+    ]
+    for coll_name in coll_names:
+        MongodbClient.db.drop_collection(coll_name)
+    mongodb_utils.ensureIndexes(db=MongodbClient.db, force=True)
+
+    user_repo_ = user_repo.UserRepo(mongo_db=MongodbClient)
+    time_now = helper.timeNow()
+    user = user_model.UserModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        updated_at=time_now,
+        role="customer",
+        username="bench",
+        email="bench@example.com",
+        password="",
+    )
+    user_repo_.create(data=user)
+    seedProducts(product_repo.ProductRepo(mongo_db=MongodbClient), PRODUCTS)
+
+    try:
+        asyncio.run(main(requests, concurrency, createApp(user)))
+    finally:
+        for coll_name in coll_names:
+            MongodbClient.db.drop_collection(coll_name)
+        MongodbClient.close()
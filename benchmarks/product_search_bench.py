@@ -0,0 +1,119 @@
+"""
+latency of a product search as the catalog grows: case insensitive unanchored
+$regex on name (what searching did before) vs ProductRepo.getList with the text index,
+sorted by relevance. $regex reads every product, $text only the products
+matching a word, so its time follows the number of matches instead of the catalog.
+needs a running mongodb (MONGODB_URI), data is written to `<MONGODB_NAME>_bench` database.
+
+usage:
+    python -m benchmarks.product_search_bench [catalog sizes] [searches]
+    python -m benchmarks.product_search_bench 10000,100000,1000000 200
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from config.env import Env
+from config.mongodb import MongodbClient
+from domain.model import product_model
+from repository import product_repo
+from utils import helper
+from utils import mongodb as mongodb_utils
+
+WORDS = [
+    "phone", "laptop", "charger", "cable", "case", "shoes", "shirt", "jacket",
+    "watch", "lamp", "chair", "desk", "bottle", "bag", "camera", "speaker",
+    "keyboard", "mouse", "monitor", "headset", "blender", "kettle", "pan", "knife",
+]  # fmt: skip
+BRANDS = ["acme", "globex", "initech", "umbrella", "hooli", "stark", "wayne"]
+
+
+def seedProducts(product_repo_: product_repo.ProductRepo, start: int, count: int):
+    rng = random.Random(start)
+    time_now = helper.timeNow()
+    batch = []
+    for i in range(start, start + count):
+        batch.append(
+            product_model.ProductModel(
+                id=helper.generateUUID4(),
+                created_at=time_now,
+                updated_at=time_now,
+                name=" ".join(rng.sample(WORDS, 3)) + f" {i}",
+                brand=rng.choice(BRANDS),
+                tags=rng.sample(WORDS, 2),
+                main_price=10 + i % 100,
+                main_price_currency="USD",
+                variant_skus=[f"SKU-{i}-{v}" for v in range(2)],
+            ).model_dump()
+        )
+        if len(batch) >= 10000:
+            product_repo_.product_coll.insert_many(batch)
+            batch = []
+    if batch:
+        product_repo_.product_coll.insert_many(batch)
+
+
+def measure(search, queries: list[str]) -> list[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(name: str, catalog_size: int, latencies: list[float]):
+    latencies = sorted(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(
+        f"{catalog_size:>9} products  {name:<14} "
+        f"p50 {statistics.median(latencies):9.3f} ms   p99 {p99:9.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [
+        int(size)
+        for size in (sys.argv[1] if len(sys.argv) > 1 else "10000,100000").split(",")
+    ]
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    MongodbClient.init()
+    MongodbClient.db = MongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    coll_name = product_model.ProductModel.getCollName()
+    MongodbClient.db.drop_collection(coll_name)
+    mongodb_utils.ensureIndexes(db=MongodbClient.db, force=True)
+    product_repo_ = product_repo.ProductRepo(mongo_db=MongodbClient)
+
+    rng = random.Random(0)
+    queries = [" ".join(rng.sample(WORDS, 2)) for _ in range(searches)]
+
+    def regexSearch(query: str):
+        list(
+            product_repo_.product_coll.find(
+                {"name": {"$regex": query.split()[0], "$options": "i"}}
+            )
+            .sort([("created_at", -1), ("id", -1)])
+            .limit(21)
+        )
+
+    def textSearch(query: str):
+        product_repo_.getList(query=query, sort_by="relevance", limit=20)
+
+    try:
+        seeded = 0
+        for size in sorted(sizes):
+            seedProducts(product_repo_, seeded, size - seeded)
+            seeded = size
+            for name, search in [("$regex", regexSearch), ("$text", textSearch)]:
+                measure(search, queries[:10])  # warm up
+                report(name, size, measure(search, queries))
+    finally:
+        MongodbClient.db.drop_collection(coll_name)
+        MongodbClient.close()
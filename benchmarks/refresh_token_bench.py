@@ -0,0 +1,88 @@
+"""
+latency of refresh token rotation done on every login/register/refresh:
+the previous getLastByCreatedBy -> delete -> create sequence vs the single upsert.
+needs a running mongodb (MONGODB_URI), data is written to `<MONGODB_NAME>_bench` database.
+
+usage:
+    python -m benchmarks.refresh_token_bench [iterations] [users]
+"""
+
+import statistics
+import sys
+import time
+from datetime import timedelta
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from config.env import Env
+from config.mongodb import MongodbClient
+from domain.model import refresh_token_model
+from repository import refresh_token_repo
+from utils import helper
+from utils import mongodb as mongodb_utils
+
+
+def newToken(user_id: str) -> refresh_token_model.RefreshTokenModel:
+    time_now = helper.timeNow()
+    return refresh_token_model.RefreshTokenModel(
+        id=helper.generateUUID4(),
+        created_at=time_now,
+        created_by=user_id,
+        expired_at=time_now + timedelta(hours=Env.REFRESH_TOKEN_EXPIRES_HOURS),
+    )
+
+
+def legacyRotate(repo: refresh_token_repo.RefreshTokenRepo, user_id: str):
+    prev = repo.getLastByCreatedBy(created_by=user_id)
+    if prev:
+        repo.delete(id=prev.id)
+    repo.create(data=newToken(user_id))
+
+
+def rotate(repo: refresh_token_repo.RefreshTokenRepo, user_id: str):
+    repo.rotate(data=newToken(user_id))
+
+
+def measure(fn, repo, user_ids: list[str], iterations: int) -> list[float]:
+    latencies = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(repo, user_ids[i % len(user_ids)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{name:<40} p50 {statistics.median(latencies):7.3f} ms   p99 {p99:7.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    MongodbClient.init()
+    MongodbClient.db = MongodbClient.conn[f"{Env.MONGODB_NAME}_bench"]
+    coll_name = refresh_token_model.RefreshTokenModel.getCollName()
+    MongodbClient.db.drop_collection(coll_name)
+    repo = refresh_token_repo.RefreshTokenRepo(mongo_db=MongodbClient)
+    user_ids = [helper.generateUUID4() for _ in range(users)]
+
+    try:
+        # legacy flow ran without the created_by index
+        report(
+            "getLast + delete + create (no index)",
+            measure(legacyRotate, repo, user_ids, iterations),
+        )
+
+        mongodb_utils.ensureIndexes(db=MongodbClient.db)
+        MongodbClient.db[coll_name].delete_many({})
+        report("single upsert (indexed)", measure(rotate, repo, user_ids, iterations))
+    finally:
+        MongodbClient.db.drop_collection(coll_name)
+        MongodbClient.close()
@@ -0,0 +1,129 @@
+"""
+cpu time per product list request of a 100 item page: returning the response model
+(validated again against `response_model`, then jsonable_encoder and orjson) vs
+returning utils.response.jsonResp (one serialization with a cached TypeAdapter).
+requests are sent straight to the ASGI app, no database needed.
+
+usage:
+    python -m benchmarks.response_serialize_bench [iterations] [page_size]
+"""
+
+import asyncio
+import json
+import statistics
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+
+from domain.rest import generic_resp, product_rest
+from utils import helper
+from utils import response as resp_utils
+
+ListResp = generic_resp.RespData[
+    generic_resp.PaginatedData[product_rest.GetProductListRespDataItem]
+]
+
+
+def createApp(items: list[product_rest.GetProductListRespDataItem]) -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    def page() -> ListResp:
+        paginated_data = generic_resp.PaginatedData[
+            product_rest.GetProductListRespDataItem
+        ](total=10000, page=3, limit=len(items), data=items)
+        return ListResp(data=paginated_data)
+
+    @app.get("/validated", response_model=ListResp)
+    async def validated():
+        return page()
+
+    @app.get("/trusted", response_model=ListResp)
+    async def trusted():
+        return resp_utils.jsonResp(page())
+
+    return app
+
+
+async def call(app: FastAPI, path: str) -> tuple[float, bytes]:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    started = time.process_time()
+    await app(scope, receive, send)
+    return (time.process_time() - started) * 1_000_000, b"".join(body)
+
+
+def report(name: str, cpu_us: list[float]):
+    print(
+        f"{name:<22} mean {statistics.mean(cpu_us):8.1f} us cpu   "
+        f"p50 {statistics.median(cpu_us):8.1f} us cpu"
+    )
+
+
+async def main(iterations: int, page_size: int):
+    items = [
+        product_rest.GetProductListRespDataItem(
+            id=helper.generateUUID4(),
+            name=f"bench product {i}",
+            price=10 + i,
+            localized_price=f"${10 + i}.00",
+            image=f"http://localhost:9000/products/{i}.png?X-Amz-Signature=abc",
+        )
+        for i in range(page_size)
+    ]
+    app = createApp(items)
+
+    # same document either way
+    _, validated_body = await call(app, "/validated")
+    _, trusted_body = await call(app, "/trusted")
+    assert json.loads(validated_body) == json.loads(trusted_body)
+
+    results = {}
+    for name, path in [
+        ("response_model", "/validated"),
+        ("jsonResp", "/trusted"),
+    ]:
+        for _ in range(50):  # warm up
+            await call(app, path)
+        results[name] = [(await call(app, path))[0] for _ in range(iterations)]
+        report(name, results[name])
+
+    saved = statistics.mean(results["response_model"]) - statistics.mean(
+        results["jsonResp"]
+    )
+    print(
+        f"saved per {page_size} item page: {saved:.1f} us cpu "
+        f"({saved / statistics.mean(results['response_model']) * 100:.0f}%)"
+    )
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    page_size = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(iterations, page_size))
@@ -0,0 +1,81 @@
+"""
+autocomplete latency of PrefixIndex (what /products/suggest reads) as the number of
+names grows: build time, top-k search per prefix length, and the same searches
+after incremental updates land in the delta. no database needed.
+
+usage:
+    python -m benchmarks.suggest_bench [sizes] [searches] [limit]
+    python -m benchmarks.suggest_bench 100000,1000000 2000 10
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from dotenv import find_dotenv, load_dotenv
+
+load_dotenv(find_dotenv(), override=True)
+
+from utils.prefix_index import PrefixIndex
+
+WORDS = [
+    "phone", "laptop", "charger", "cable", "case", "shoes", "shirt", "jacket",
+    "watch", "lamp", "chair", "desk", "bottle", "bag", "camera", "speaker",
+    "keyboard", "mouse", "monitor", "headset", "blender", "kettle", "pan", "knife",
+]  # fmt: skip
+
+
+def names(rng: random.Random, start: int, count: int):
+    for i in range(start, start + count):
+        # scores are skewed like review counts, most products have few
+        yield str(i), " ".join(rng.sample(WORDS, 3)) + f" {i}", int(
+            rng.paretovariate(1.2)
+        )
+
+
+def measure(index: PrefixIndex, prefixes: list[str], limit: int) -> list[float]:
+    latencies = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.search(prefix, limit)
+        latencies.append((time.perf_counter() - started) * 1_000_000)
+    return latencies
+
+
+def report(name: str, size: int, latencies: list[float]):
+    latencies = sorted(latencies)
+    p99 = latencies[max(int(len(latencies) * 0.99) - 1, 0)]
+    print(
+        f"{size:>9} names  {name:<22} "
+        f"p50 {statistics.median(latencies):9.1f} µs   p99 {p99:9.1f} µs"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [
+        int(size)
+        for size in (sys.argv[1] if len(sys.argv) > 1 else "100000,1000000").split(",")
+    ]
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    for size in sizes:
+        rng = random.Random(size)
+        started = time.perf_counter()
+        index = PrefixIndex(names(rng, 0, size))
+        print(f"{size:>9} names  build {time.perf_counter() - started:.2f} s")
+
+        for length in [1, 3, 6]:
+            prefixes = [rng.choice(WORDS)[:length] for _ in range(searches)]
+            report(f"prefix of {length}", size, measure(index, prefixes, limit))
+        misses = [f"zz{i}" for i in range(searches)]
+        report("no match", size, measure(index, misses, limit))
+
+        # what a refresh does between rebuilds: renamed and new products
+        for id, name, score in names(rng, 0, 1000):
+            index.put(id, "x" + name, score)
+        for id, name, score in names(rng, size, 1000):
+            index.put(id, name, score)
+        prefixes = [rng.choice(WORDS)[:3] for _ in range(searches)]
+        report("prefix of 3, 2k delta", size, measure(index, prefixes, limit))
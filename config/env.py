@@ -13,11 +13,47 @@ class Env:
     RELOAD: bool = parseBool(os.getenv("RELOAD", "false"))
     TZ: str = os.getenv("TZ", "Asia/Jakarta")
     WORKERS: int = int(os.getenv("WORKERS", 1))
+    # serve products and cart from the sync `def` handlers (threadpool) instead of
+    # the `async def` ones, kept while the async handlers are rolled out
+    SYNC_HANDLERS: bool = parseBool(os.getenv("SYNC_HANDLERS", "false"))
 
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
     TOKEN_EXPIRES_HOURS: int = int(os.getenv("JWT_EXPIRES_HOURS", 1))
     REFRESH_TOKEN_EXPIRES_HOURS: int = int(os.getenv("REFRESH_TOKEN_EXPIRES_HOURS", 2))
     OTP_EXPIRES_SECONDS: int = int(os.getenv("OTP_EXPIRES_SECONDS", 600))
+    AUTH_STATELESS_VERIFY: bool = parseBool(os.getenv("AUTH_STATELESS_VERIFY", "true"))
+    USER_SNAPSHOT_TTL_SECONDS: int = int(os.getenv("USER_SNAPSHOT_TTL_SECONDS", 60))
+    USER_SNAPSHOT_MAX_SIZE: int = int(os.getenv("USER_SNAPSHOT_MAX_SIZE", 10000))
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", 60))
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+    LAST_ACTIVE_FLUSH_INTERVAL_SECONDS: int = int(
+        os.getenv("LAST_ACTIVE_FLUSH_INTERVAL_SECONDS", 30)
+    )
+    COLL_VERSION_CHECK_SECONDS: float = float(
+        os.getenv("COLL_VERSION_CHECK_SECONDS", 1)
+    )
+    COUNT_CACHE_TTL_SECONDS: int = int(os.getenv("COUNT_CACHE_TTL_SECONDS", 300))
+    COUNT_CACHE_MAX_SIZE: int = int(os.getenv("COUNT_CACHE_MAX_SIZE", 10000))
+    FACET_CACHE_TTL_SECONDS: int = int(os.getenv("FACET_CACHE_TTL_SECONDS", 300))
+    # one entry per combination of facets of the unfiltered list
+    FACET_CACHE_MAX_SIZE: int = int(os.getenv("FACET_CACHE_MAX_SIZE", 64))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 60))
+    RESPONSE_CACHE_MAX_SIZE: int = int(os.getenv("RESPONSE_CACHE_MAX_SIZE", 5000))
+    PRESIGNED_URL_EXPIRES_SECONDS: int = int(
+        os.getenv("PRESIGNED_URL_EXPIRES_SECONDS", 86400)
+    )
+    PRESIGNED_URL_REFRESH_MARGIN_SECONDS: int = int(
+        os.getenv("PRESIGNED_URL_REFRESH_MARGIN_SECONDS", 3600)
+    )
+    PRESIGNED_URL_CACHE_MAX_SIZE: int = int(
+        os.getenv("PRESIGNED_URL_CACHE_MAX_SIZE", 50000)
+    )
+    EXCHANGE_RATE_BASE_CURRENCY: str = os.getenv("EXCHANGE_RATE_BASE_CURRENCY", "USD")
+    EXCHANGE_RATE_REFRESH_SECONDS: float = float(
+        os.getenv("EXCHANGE_RATE_REFRESH_SECONDS", 300)
+    )
+    SUGGEST_REFRESH_SECONDS: float = float(os.getenv("SUGGEST_REFRESH_SECONDS", 10))
+    SUGGEST_REBUILD_SECONDS: float = float(os.getenv("SUGGEST_REBUILD_SECONDS", 3600))
     INITIAL_CUSTOMER_USER_USERNAME: str = os.getenv(
         "INITIAL_CUSTOMER_USER_USERNAME", ""
     )
@@ -31,10 +67,32 @@ class Env:
 
     MONGODB_URI: str = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
     MONGODB_NAME: str = os.getenv("MONGODB_NAME", "quickmart")
+    # pool options and tz_aware are only passed to the client when set, unset ones
+    # are left to MONGODB_URI and the driver defaults
+    MONGODB_MAX_POOL_SIZE: str = os.getenv("MONGODB_MAX_POOL_SIZE", "")
+    MONGODB_MIN_POOL_SIZE: str = os.getenv("MONGODB_MIN_POOL_SIZE", "")
+    MONGODB_MAX_IDLE_TIME_MS: str = os.getenv("MONGODB_MAX_IDLE_TIME_MS", "")
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: str = os.getenv("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "")
+    # comma separated, zstd needs `zstandard` and snappy `python-snappy` installed
+    MONGODB_COMPRESSORS: str = os.getenv("MONGODB_COMPRESSORS", "")
+    # true: datetimes are read as timezone aware (UTC) instead of naive UTC
+    MONGODB_TZ_AWARE: str = os.getenv("MONGODB_TZ_AWARE", "")
+    MONGODB_MONITORING: bool = parseBool(os.getenv("MONGODB_MONITORING", "true"))
     MINIO_ENDPOINT: str = os.getenv("MINIO_ENDPOINT", "localhost:9000")
     MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "")
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "")
     MINIO_SECURE: str = os.getenv("MINIO_SECURE", "false")
+    MINIO_REGION: str = os.getenv("MINIO_REGION", "")  # looked up once if empty
+    MINIO_POOL_NUM_POOLS: int = int(os.getenv("MINIO_POOL_NUM_POOLS", 4))
+    MINIO_POOL_MAXSIZE: int = int(os.getenv("MINIO_POOL_MAXSIZE", 32))
+    MINIO_POOL_BLOCK: bool = parseBool(os.getenv("MINIO_POOL_BLOCK", "false"))
+    MINIO_CONNECT_TIMEOUT_SECONDS: float = float(
+        os.getenv("MINIO_CONNECT_TIMEOUT_SECONDS", 5)
+    )
+    MINIO_READ_TIMEOUT_SECONDS: float = float(
+        os.getenv("MINIO_READ_TIMEOUT_SECONDS", 60)
+    )
+    MINIO_RETRIES: int = int(os.getenv("MINIO_RETRIES", 3))
     GMAIL_SENDER_EMAIL: str = os.getenv("GMAIL_SENDER_EMAIL", "")
     GMAIL_SENDER_PASSWORD: str = os.getenv("GMAIL_SENDER_PASSWORD", "")
 
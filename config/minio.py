@@ -1,12 +1,93 @@
+import os
+import socket
+from typing import Optional
+
+import certifi
+import urllib3
 from minio import Minio
+from urllib3.connection import HTTPConnection
 
 from config.env import Env
 
 
-def getMinioClient():
-    return Minio(
-        Env.MINIO_ENDPOINT,
-        access_key=Env.MINIO_ACCESS_KEY,
-        secret_key=Env.MINIO_SECRET_KEY,
-        secure=False,
-    )
\ No newline at end of file
+class MinioClient:
+    """
+    one minio client per worker, so requests share its connection pool
+    (and the bucket region cache of the client).
+    """
+
+    client: Minio = None
+    http_client: urllib3.PoolManager = None
+
+    @classmethod
+    def init(cls, endpoint: Optional[str] = None):
+        cls.http_client = urllib3.PoolManager(
+            num_pools=Env.MINIO_POOL_NUM_POOLS,
+            maxsize=Env.MINIO_POOL_MAXSIZE,
+            block=Env.MINIO_POOL_BLOCK,
+            timeout=urllib3.Timeout(
+                connect=Env.MINIO_CONNECT_TIMEOUT_SECONDS,
+                read=Env.MINIO_READ_TIMEOUT_SECONDS,
+            ),
+            retries=urllib3.Retry(
+                total=Env.MINIO_RETRIES,
+                backoff_factor=0.2,
+                status_forcelist=[500, 502, 503, 504],
+            ),
+            socket_options=HTTPConnection.default_socket_options
+            + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)],
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        )
+        cls.client = Minio(
+            endpoint or Env.MINIO_ENDPOINT,
+            access_key=Env.MINIO_ACCESS_KEY,
+            secret_key=Env.MINIO_SECRET_KEY,
+            secure=False,
+            region=Env.MINIO_REGION or None,
+            http_client=cls.http_client,
+        )
+
+    @classmethod
+    def close(cls):
+        if cls.http_client:
+            cls.http_client.clear()
+
+    @classmethod
+    def poolStats(cls) -> dict:
+        """
+        usage of the connection pools, one pool per minio host
+        """
+        stats = {
+            "pools": 0,
+            "maxsize": Env.MINIO_POOL_MAXSIZE,
+            "connections": 0,
+            "in_use_connections": 0,
+            "requests": 0,
+        }
+        if not cls.http_client:
+            return stats
+
+        pools = cls.http_client.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if not pool:
+                continue  # evicted meanwhile
+
+            stats["pools"] += 1
+            stats["connections"] += pool.num_connections
+            stats["requests"] += pool.num_requests
+            # the pool queue holds a slot per connection not taken by a request
+            if pool.pool != None:
+                stats["in_use_connections"] += pool.pool.maxsize - pool.pool.qsize()
+
+        return stats
+
+
+def getMinioClient() -> Minio:
+    """
+    fastapi dependency, return the client created on app startup
+    """
+    if not MinioClient.client:
+        MinioClient.init()
+    return MinioClient.client
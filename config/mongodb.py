@@ -1,17 +1,66 @@
-from pymongo import MongoClient
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.asynchronous.database import AsyncDatabase
 from pymongo.database import Database
 
+from utils.helper import parseBool
+from utils.mongo_monitoring import MongoCommandListener, MongoPoolListener
+
 from .env import Env
 
+
 class MongodbClient:
     conn: MongoClient = None
     db: Database = None
 
+    @staticmethod
+    def clientOptions() -> dict:
+        """
+        MongoClient kwargs from Env, they override the same options in MONGODB_URI.
+        options whose env var isn't set aren't passed, so the URI ones apply
+        """
+        options = {}
+        int_options = {
+            "maxPoolSize": Env.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": Env.MONGODB_MIN_POOL_SIZE,
+            "maxIdleTimeMS": Env.MONGODB_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": Env.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        }
+        for name, value in int_options.items():
+            if value:
+                options[name] = int(value)
+        if Env.MONGODB_TZ_AWARE:
+            options["tz_aware"] = parseBool(Env.MONGODB_TZ_AWARE)
+        if Env.MONGODB_COMPRESSORS:
+            options["compressors"] = Env.MONGODB_COMPRESSORS
+        if Env.MONGODB_MONITORING:
+            options["event_listeners"] = [MongoPoolListener(), MongoCommandListener()]
+
+        return options
+
     @classmethod
     def init(cls):
-        cls.conn = MongoClient(Env.MONGODB_URI)
+        cls.conn = MongoClient(Env.MONGODB_URI, **cls.clientOptions())
         cls.db = cls.conn[Env.MONGODB_NAME]
 
     @classmethod
     def close(cls):
         cls.conn.close()
+
+
+class AsyncMongodbClient:
+    """
+    client for `async def` handlers, queries don't hold a threadpool thread.
+    same options as `MongodbClient`, each client has its own connection pool.
+    """
+
+    conn: AsyncMongoClient = None
+    db: AsyncDatabase = None
+
+    @classmethod
+    def init(cls):
+        cls.conn = AsyncMongoClient(Env.MONGODB_URI, **MongodbClient.clientOptions())
+        cls.db = cls.conn[Env.MONGODB_NAME]
+
+    @classmethod
+    async def close(cls):
+        await cls.conn.close()
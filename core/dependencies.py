@@ -2,6 +2,7 @@ import logging
 from typing import Literal, Type, TypeVar
 
 from fastapi import Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
@@ -19,7 +20,13 @@ async def verifyToken(
     auth_service: auth_service.AuthService = Depends(),
     token: str = Depends(reusable_token),
 ) -> auth_dto.CurrentUser:
-    current_user = auth_service.verifyToken(token=token)
+    # a token verified before is served from memory. anything else may read the
+    # user from mongodb, on the threadpool so it doesn't block the event loop
+    current_user = auth_service.verifyCachedToken(token=token)
+    if current_user:
+        return current_user
+
+    current_user = await run_in_threadpool(auth_service.verifyToken, token=token)
     return current_user
 
 
@@ -1,5 +1,5 @@
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 from core.exceptions.http import CustomHttpException
 from domain.rest import generic_resp
@@ -8,7 +8,7 @@ from typing import Union
 
 
 async def customHttpExceptionHandler(request: Request, exc: CustomHttpException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=generic_resp.RespData[Union[dict, list, None]](
             meta=generic_resp.BaseResp_Meta(
@@ -22,7 +22,7 @@ async def customHttpExceptionHandler(request: Request, exc: CustomHttpException)
 
 
 async def defaultHttpExceptionHandler(request: Request, exc: Exception):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=generic_resp.RespData[Union[dict, list, None]](
             meta=generic_resp.BaseResp_Meta(
@@ -36,7 +36,7 @@ async def defaultHttpExceptionHandler(request: Request, exc: Exception):
 
 
 async def runTimeErrorHandler(request: Request, exc: RuntimeError):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=generic_resp.RespData[Union[dict, list, None]](
             meta=generic_resp.BaseResp_Meta(
@@ -52,7 +52,7 @@ async def runTimeErrorHandler(request: Request, exc: RuntimeError):
 async def reqValidationErrExceptionHandler(
     request: Request, exc: RequestValidationError
 ):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=422,
         content=generic_resp.RespData[Union[dict, list, None]](
             meta=generic_resp.BaseResp_Meta(
@@ -66,7 +66,7 @@ async def reqValidationErrExceptionHandler(
 
 
 async def notFoundErrHandler(request: Request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=404,
         content=generic_resp.RespData[Union[dict, list, None]](
             meta=generic_resp.BaseResp_Meta(
@@ -1,6 +1,70 @@
+from datetime import datetime
 from domain.model import product_model
+from pydantic import BaseModel
 from typing import Optional
 
 
 class GetProductListResItem(product_model.ProductModel):
     variants_: Optional[list[product_model.ProductVariantModel]] = None
+
+
+class GetProductDetailResItem__Variant(product_model.ProductVariantModel):
+    product_variant_type_name: str = ""
+
+
+class GetProductDetailResItem(product_model.ProductModel):
+    variants_: list[GetProductDetailResItem__Variant] = []  # sorted by is_main:-1
+
+
+class GetProductDetailVersionResItem(BaseModel):
+    """
+    what changes with a product detail, read without loading it
+    """
+
+    updated_at: datetime
+    variants_updated_at: Optional[datetime] = None  # latest of the variants
+    variants: int = 0  # a deleted variant changes it
+    variant_types_version: int = 0  # names of the variant types
+
+    @property
+    def lastModified(self) -> datetime:
+        return max(self.updated_at, self.variants_updated_at or self.updated_at)
+
+
+class ProductSuggestSource(BaseModel):
+    """
+    what SuggestIndex needs of a product
+    """
+
+    id: str
+    name: str
+    brand: Optional[str] = None
+    category_id: Optional[str] = None
+
+
+class ProductListFacetValue(BaseModel):
+    value: str  # category id or brand
+    name: str
+    count: int
+
+
+class ProductListPriceBucket(BaseModel):
+    min: float
+    max: float  # excluded, except by the last bucket
+    count: int
+
+
+class ProductListStockCount(BaseModel):
+    in_stock: int = 0
+    out_of_stock: int = 0
+
+
+class ProductListFacets(BaseModel):
+    """
+    counts of the products matching a getList() filter, requested facets only
+    """
+
+    category: Optional[list[ProductListFacetValue]] = None  # most products first
+    brand: Optional[list[ProductListFacetValue]] = None  # most products first
+    price: Optional[list[ProductListPriceBucket]] = None  # of the main variant
+    in_stock: Optional[ProductListStockCount] = None
@@ -1,21 +1,112 @@
-import mimetypes
-from datetime import timedelta
-from typing import Literal, Union
+import inspect
+from typing import Any, Literal, Optional, TypeVar, Union, get_args, get_origin
 
 from minio import Minio
-from pydantic import BaseModel, PrivateAttr
+from pydantic import BaseModel, ConfigDict, PrivateAttr
+from pymongo import IndexModel
 from pydantic.fields import ModelPrivateAttr
 
 from core.logging import logger
+from utils.presign_cache import PresignedUrlCache
 
 
 class _MyBaseModel_Index(BaseModel):
     """
-    this attributes is same as pymongo.collection.Collection.create_index() args
+    this attributes is same as pymongo.collection.Collection.create_index() args.
+    examples:
+    - compound: keys=[("category_id", 1), ("created_at", -1)]
+    - TTL: keys=[("expired_at", 1)], expireAfterSeconds=0
+    - partial: partialFilterExpression={"verified": False}
+    - case insensitive: collation={"locale": "en", "strength": 2}
+    - text: keys=[("name", "text"), ("brand", "text")], weights={"name": 10}
     """
 
     keys: list[tuple] = []
+    name: Optional[str] = None  # generated by mongodb if empty
     unique: bool = False
+    sparse: bool = False
+    expireAfterSeconds: Optional[int] = None  # TTL index
+    partialFilterExpression: Optional[dict] = None
+    collation: Optional[dict] = None
+    weights: Optional[dict[str, int]] = None  # text index only
+    default_language: Optional[str] = None  # text index only
+
+    model_config = ConfigDict(frozen=True)
+
+    def __deepcopy__(self, memo: dict):
+        # private attribute defaults are deep copied into every model instance,
+        # an index spec is class metadata so the same object is shared
+        return self
+
+    def toIndexModel(self) -> IndexModel:
+        return IndexModel(
+            self.keys, **self.model_dump(exclude={"keys"}, exclude_defaults=True)
+        )
+
+    def spec(self) -> dict:
+        """
+        normalized form, comparable with `normalizeIndexSpec()` of an existing index
+        """
+        key = []
+        text_fields = []
+        for field, type_ in self.keys:
+            if type_ == "text":
+                if not text_fields:
+                    key.append(["_fts", "text"])
+                text_fields.append(field)
+            else:
+                key.append([field, type_])
+
+        spec = {"key": key}
+        if self.unique:
+            spec["unique"] = True
+        if self.sparse:
+            spec["sparse"] = True
+        if self.expireAfterSeconds != None:
+            spec["expireAfterSeconds"] = self.expireAfterSeconds
+        if self.partialFilterExpression:
+            spec["partialFilterExpression"] = self.partialFilterExpression
+        if self.collation:
+            spec["collation"] = self.collation
+        if text_fields:
+            spec["weights"] = {
+                field: (self.weights or {}).get(field, 1) for field in text_fields
+            }
+            spec["default_language"] = self.default_language or "english"
+
+        return spec
+
+
+def normalizeIndexSpec(existing: dict, declared: Optional[dict] = None) -> dict:
+    """
+    convert an index document of `Collection.list_indexes()` to the form of `_MyBaseModel_Index.spec()`.
+    collation is expanded with server defaults, so only options present in `declared` are compared.
+    """
+    key = []
+    for field, type_ in existing.get("key", {}).items():
+        if field == "_ftsx":
+            continue
+        key.append([field, type_ if isinstance(type_, str) else int(type_)])
+
+    spec = {"key": key}
+    if existing.get("unique"):
+        spec["unique"] = True
+    if existing.get("sparse"):
+        spec["sparse"] = True
+    if existing.get("expireAfterSeconds") != None:
+        spec["expireAfterSeconds"] = int(existing["expireAfterSeconds"])
+    if existing.get("partialFilterExpression"):
+        spec["partialFilterExpression"] = dict(existing["partialFilterExpression"])
+    if existing.get("collation"):
+        declared_collation = (declared or {}).get("collation") or {}
+        spec["collation"] = {
+            k: v for k, v in existing["collation"].items() if k in declared_collation
+        }
+    if existing.get("weights"):
+        spec["weights"] = {k: int(v) for k, v in existing["weights"].items()}
+        spec["default_language"] = existing.get("default_language") or "english"
+
+    return spec
 
 
 class MinioUtil(BaseModel):
@@ -48,41 +139,21 @@ class MinioUtil(BaseModel):
 
                         if isinstance(raw_value, list):
                             value = [
-                                minio_client.presigned_get_object(
+                                PresignedUrlCache.presignedGetObject(
+                                    minio_client=minio_client,
                                     bucket_name=self._bucket_name,
-                                    object_name=getattr(self, item),
-                                    expires=timedelta(days=1),
-                                    response_headers=(
-                                        {
-                                            "response-content-disposition": "inline",
-                                            "response-content-type": mimetypes.guess_type(
-                                                getattr(self, item)
-                                            )[
-                                                0
-                                            ],
-                                        }
-                                        if mode == "view"
-                                        else None
-                                    ),
+                                    object_name=item,
+                                    mode=mode,
                                 )
                                 for item in raw_value
                             ]
 
                         elif isinstance(raw_value, str):
-                            value = minio_client.presigned_get_object(
+                            value = PresignedUrlCache.presignedGetObject(
+                                minio_client=minio_client,
                                 bucket_name=self._bucket_name,
                                 object_name=raw_value,
-                                expires=timedelta(days=1),
-                                response_headers=(
-                                    {
-                                        "response-content-disposition": "inline",
-                                        "response-content-type": mimetypes.guess_type(
-                                            raw_value
-                                        )[0],
-                                    }
-                                    if mode == "view"
-                                    else None
-                                ),
+                                mode=mode,
                             )
 
                         if value:
@@ -93,6 +164,96 @@ class MinioUtil(BaseModel):
 
         return self
 
+
+_TModel = TypeVar("_TModel", bound=BaseModel)
+
+
+def _nestedModel(annotation: Any) -> tuple[Optional[type[BaseModel]], bool]:
+    """
+    (model, is list) of a field annotated M, Optional[M], list[M] or Optional[list[M]]
+    """
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _nestedModel(args[0]) if len(args) == 1 else (None, False)
+
+    if get_origin(annotation) is list:
+        model, _ = _nestedModel((get_args(annotation) or [None])[0])
+        return model, model != None
+
+    if inspect.isclass(annotation) and issubclass(annotation, BaseModel):
+        return annotation, False
+
+    return None, False
+
+
+class _ConstructPlan:
+    """
+    what constructFromDoc() needs to know about a model, computed once per model
+    """
+
+    def __init__(self, model: type[BaseModel]):
+        self.fields = model.model_fields
+        # {field name: FieldInfo} of fields that have a default (or default_factory)
+        self.defaults = {
+            name: field
+            for name, field in self.fields.items()
+            if not field.is_required()
+        }
+        # {field name: (nested model, is list)}
+        self.nested = {}
+        for name, field in self.fields.items():
+            nested_model, is_list = _nestedModel(field.annotation)
+            if nested_model:
+                self.nested[name] = (nested_model, is_list)
+        # private attribute defaults (_coll_name, indexes, ...) are class metadata,
+        # they are shared by the instances instead of deep copied into each one
+        self.private = {
+            name: private_attr.get_default()
+            for name, private_attr in (model.__private_attributes__ or {}).items()
+        }
+
+
+_CONSTRUCT_PLANS: dict[type[BaseModel], _ConstructPlan] = {}
+
+
+def constructFromDoc(model: type[_TModel], doc: dict) -> _TModel:
+    """
+    build `model` from a document without validation, like model_construct() but
+    nested model fields are built as models too. keys that are not fields (`_id`)
+    are dropped, missing fields get their default.
+    only for documents the app wrote, they were validated before being stored.
+    """
+    plan = _CONSTRUCT_PLANS.get(model)
+    if plan == None:
+        plan = _CONSTRUCT_PLANS.setdefault(model, _ConstructPlan(model))
+
+    fields = plan.fields
+    values = {key: value for key, value in doc.items() if key in fields}
+    fields_set = set(values)
+    for name, field in plan.defaults.items():
+        if name not in values:
+            values[name] = field.get_default(call_default_factory=True)
+    for name, (nested_model, is_list) in plan.nested.items():
+        value = values.get(name)
+        if is_list and isinstance(value, list):
+            values[name] = [
+                constructFromDoc(nested_model, item) if isinstance(item, dict) else item
+                for item in value
+            ]
+        elif isinstance(value, dict):
+            values[name] = constructFromDoc(nested_model, value)
+
+    # what model_construct() sets, without its per field bookkeeping
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(
+        instance, "__pydantic_private__", dict(plan.private) if plan.private else None
+    )
+    return instance
+
+
 class MyBaseModel(MinioUtil):
     """
     id field already indexed by default, but it need to be indexed manually if you set the _indexes field.
@@ -109,6 +270,14 @@ class MyBaseModel(MinioUtil):
 
     id: str
 
+    @classmethod
+    def fromDoc(cls: type[_TModel], doc: dict) -> _TModel:
+        """
+        read path of repositories, see `constructFromDoc()`.
+        use the constructor (validation) for api input and before writes.
+        """
+        return constructFromDoc(cls, doc)
+
     @classmethod
     def getCollName(cls) -> str:
         return cls._coll_name.get_default()
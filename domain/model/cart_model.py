@@ -7,6 +7,11 @@ class CartModel(base_model.MyBaseModel):
     one user can have only one cart
     """
     _coll_name = "carts"
+    _custom_indexes = [
+        base_model._MyBaseModel_Index(keys=[("user_id", 1)], unique=True),
+        base_model._MyBaseModel_Index(keys=[("created_at", -1), ("id", -1)]),
+        base_model._MyBaseModel_Index(keys=[("updated_at", -1), ("id", -1)]),
+    ]
 
     id: str
     created_at: datetime
@@ -16,7 +21,16 @@ class CartModel(base_model.MyBaseModel):
 
 
 class CartItemModel(base_model.MyBaseModel):
+    """
+    one item per product variant in a cart, adding it again increments quantity
+    """
     _coll_name = "cart_items"
+    _custom_indexes = [
+        base_model._MyBaseModel_Index(
+            keys=[("cart_id", 1), ("product_id", 1), ("product_variant_id", 1)],
+            unique=True,
+        ),
+    ]
 
     id: str
     created_at: datetime
@@ -8,9 +8,9 @@ class CategoryModel(MyBaseModel):
     _bucket_name = "categories"
     _minio_fields = ["img"]
     _custom_indexes = [
-        _MyBaseModel_Index(keys=[("created_at", -1)]),
-        _MyBaseModel_Index(keys=[("updated_at", -1)]),
-        _MyBaseModel_Index(keys=[("name", -1)]),
+        _MyBaseModel_Index(keys=[("created_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("updated_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("name", -1), ("id", -1)]),
     ]
 
     id: str = ""
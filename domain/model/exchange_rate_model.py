@@ -0,0 +1,34 @@
+from .base_model import MyBaseModel, _MyBaseModel_Index
+from datetime import datetime
+from pydantic import field_validator
+
+class ExchangeRateModel(MyBaseModel):
+    """
+    units of `currency` for 1 unit of `Env.EXCHANGE_RATE_BASE_CURRENCY`
+    """
+
+    _coll_name = "exchange_rates"
+    _custom_indexes = [
+        _MyBaseModel_Index(keys=[("currency", 1)], unique=True),
+    ]
+
+    id: str = ""
+    created_at: datetime
+    updated_at: datetime
+
+    currency: str
+    rate: float
+
+    @field_validator("currency")
+    def normalize_currency(cls, v):
+        if v and isinstance(v, str):
+            v = v.strip().upper()
+
+        return v
+
+    @field_validator("rate")
+    def validate_rate(cls, v):
+        if v <= 0:
+            raise ValueError("rate must be greater than 0")
+
+        return v
@@ -4,7 +4,10 @@ from datetime import datetime
 class OtpModel(MyBaseModel):
     _coll_name = "otps"
     _custom_indexes = [
-        _MyBaseModel_Index(keys=[("user_id", -1)]),
+        _MyBaseModel_Index(keys=[("created_by", 1), ("created_at", -1)]),
+        _MyBaseModel_Index(
+            keys=[("created_by", 1), ("verified", 1), ("created_at", -1)]
+        ),
     ]
 
     id: str = ""
@@ -12,11 +12,33 @@ class ProductModel_Dimensions(BaseModel):
 class ProductModel(MyBaseModel):
     _coll_name = "products"
     _bucket_name = "products"
-    _minio_fields = ["images"]
+    _minio_fields = ["images", "main_image"]
     _custom_indexes = [
-        _MyBaseModel_Index(keys=[("created_at", -1)]),
-        _MyBaseModel_Index(keys=[("updated_at", -1)]),
-        _MyBaseModel_Index(keys=[("category_id", -1)]),
+        # (sort field, id) so keyset pagination resumes with an index range
+        _MyBaseModel_Index(keys=[("created_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("updated_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("name", 1), ("id", 1)]),
+        _MyBaseModel_Index(keys=[("main_price", 1), ("id", 1)]),
+        _MyBaseModel_Index(keys=[("category_id", 1), ("created_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("category_id", 1), ("updated_at", -1), ("id", -1)]),
+        _MyBaseModel_Index(keys=[("category_id", 1), ("name", 1), ("id", 1)]),
+        _MyBaseModel_Index(keys=[("category_id", 1), ("main_price", 1), ("id", 1)]),
+        # search, one text index per collection. no stemming, names are multilingual
+        _MyBaseModel_Index(
+            keys=[
+                ("name", "text"),
+                ("brand", "text"),
+                ("tags", "text"),
+                ("variant_skus", "text"),
+                ("description", "text"),
+            ],
+            weights={"name": 10, "brand": 5, "tags": 3, "variant_skus": 3},
+            default_language="none",
+        ),
+        # sku prefix search
+        _MyBaseModel_Index(keys=[("variant_skus", 1)]),
+        # etag of a product detail, read from the index alone
+        _MyBaseModel_Index(keys=[("id", 1), ("updated_at", 1)]),
     ]
 
     id: str = ""
@@ -33,6 +55,15 @@ class ProductModel(MyBaseModel):
     tags: list[str] = []
     images: Optional[list[str]] = None  # filenames
 
+    # summary of the variants, maintained by ProductRepo.refreshSummaries()
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    main_price: Optional[float] = None
+    main_price_currency: Optional[str] = None
+    total_stock: int = 0
+    main_image: Optional[str] = None  # filename
+    variant_skus: list[str] = []
+
 class ProductVariantTypeModel(MyBaseModel):
     _coll_name = "product_variant_types"
     _custom_indexes = [
@@ -66,7 +97,11 @@ class ProductVariantModel(MyBaseModel):
     _custom_indexes = [
         _MyBaseModel_Index(keys=[("created_at", -1)]),
         _MyBaseModel_Index(keys=[("updated_at", -1)]),
-        _MyBaseModel_Index(keys=[("product_variant_type_id", -1)]),
+        _MyBaseModel_Index(keys=[("product_id", 1), ("is_main", -1)]),
+        _MyBaseModel_Index(keys=[("product_id", 1), ("sku", 1)]),
+        # etag of a product detail, read from the index alone
+        _MyBaseModel_Index(keys=[("product_id", 1), ("updated_at", -1)]),
+        _MyBaseModel_Index(keys=[("product_variant_type_id", 1), ("is_main", -1)]),
     ]
 
     id: str = ""
@@ -91,7 +126,6 @@ class ProductVariantModel(MyBaseModel):
 
     @model_validator(mode="after")
     def validate(self):
-        print(self)
         if not helper.isLanguageCodeValid(self.price_currency_lang):
             raise ValueError("price_currency_lang is not valid")
 
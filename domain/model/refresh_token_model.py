@@ -1,8 +1,16 @@
-from .base_model import MyBaseModel
+from .base_model import MyBaseModel, _MyBaseModel_Index
 from datetime import datetime
 
 class RefreshTokenModel(MyBaseModel):
+    """
+    one user can have only one refresh token, it is rotated in place on every login
+    """
     _coll_name = "refresh_tokens"
+    _custom_indexes = [
+        _MyBaseModel_Index(keys=[("created_by", -1)], unique=True),
+        # let mongodb remove expired tokens
+        _MyBaseModel_Index(keys=[("expired_at", 1)], expireAfterSeconds=0),
+    ]
 
     id: str = ""
     created_at: datetime
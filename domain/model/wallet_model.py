@@ -10,6 +10,9 @@ class WalletModel(base_model.MyBaseModel):
     one user can have only one wallet
     """
     _coll_name = "wallets"
+    _custom_indexes = [
+        base_model._MyBaseModel_Index(keys=[("user_id", 1)], unique=True),
+    ]
 
     id: str
     created_at: datetime
@@ -17,6 +20,10 @@ class WalletModel(base_model.MyBaseModel):
 
     user_id: str
     balance: float = 0
+    # currency of balance, the owner's currency when the wallet was created.
+    # empty for wallets of older versions until WalletService or
+    # `--backfill-wallet-currencies` pins it
+    currency: str = ""
 
 class WalletTransactionModel(base_model.MyBaseModel):
     _coll_name = "wallet_transactions"
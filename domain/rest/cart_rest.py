@@ -13,6 +13,7 @@ class BaseCartItemDetail(BaseModel):
     price_per_unit: float
     price_per_unit_currency: str
     localized_price_per_unit: str
+    localized_price_per_unit_currency: str = ""
 
 class AddToChartReq(BaseModel):
     product_id: str
@@ -24,6 +25,7 @@ class AddToCartRespData(BaseCartItemDetail):
 
 class GetUserCartDetailRespData(BaseModel):
     localized_total_price: str
+    localized_total_price_currency: str = ""
     total_items: int
 
 class UpdateCartItemReq(BaseModel):
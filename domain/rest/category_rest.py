@@ -12,6 +12,8 @@ class GetCategoryListReq(BaseModel):
     sort_order: Literal["asc", "desc"] = "desc"
     page: int = 1
     limit: int = 10
+    cursor: Optional[str] = None  # next_cursor of the previous page, overrides page
+    exact: bool = False  # exact total, unfiltered total is estimated otherwise
 
 
 class GetCategoryListRespDataItem(category_model.CategoryModel):
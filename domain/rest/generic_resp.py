@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, Union
+from typing import Generic, Optional, TypeVar, Union
 
 from pydantic import BaseModel
 
@@ -50,9 +50,11 @@ class RespData(BaseResp, Generic[M]):
 
 class PaginatedData(BaseModel, Generic[M]):
     total: int = 0
+    exact: bool = True  # false if total is an estimate
     current_page: int = 0
     page_total: int = 0
     page_num_list: list[int] = [0]
+    next_cursor: Optional[str] = None  # null on the last page
     data: list[M] = None
 
     def __init__(
@@ -62,6 +64,8 @@ class PaginatedData(BaseModel, Generic[M]):
         limit: int,
         show_all: bool = False,
         data: list[M] = None,
+        next_cursor: Optional[str] = None,
+        exact: bool = True,
     ):
         """
         attributes will be calculated automatically by inputed __init__() args
@@ -71,6 +75,7 @@ class PaginatedData(BaseModel, Generic[M]):
 
         super().__init__(
             total=total,
+            exact=exact,
             current_page=1 if show_all else page,
             page_total=1 if show_all or not limit else int(((total - 1) / limit) + 1),
             page_num_list=(
@@ -80,5 +85,6 @@ class PaginatedData(BaseModel, Generic[M]):
                     current_page=page, amount=limit, data_count=total
                 )
             ),
+            next_cursor=next_cursor,
             data=data,
         )
@@ -0,0 +1,82 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    size: int = 0
+    max_size: int = 0
+    hits: int = 0
+    misses: int = 0
+    hit_ratio: float = 0
+
+
+class ResponseCacheStats(CacheStats):
+    coalesced: int = 0  # misses that waited for a concurrent build
+    bytes: int = 0
+
+
+class PresignCacheStats(CacheStats):
+    signing_ms_total: float = 0
+    signing_ms_saved: float = 0
+
+
+class MinioPoolStats(BaseModel):
+    pools: int = 0
+    maxsize: int = 0  # per pool
+    connections: int = 0  # opened since startup
+    in_use_connections: int = 0  # taken by requests now
+    requests: int = 0
+
+
+class MongoPoolStats(BaseModel):
+    max_pool_size: int = 0  # per server
+    connections: int = 0  # open now
+    checked_out: int = 0
+    max_checked_out: int = 0
+    saturation: float = 0  # checked out / max_pool_size, of the most used pool
+    checkouts: int = 0
+    saturated_checkouts: int = 0
+    checkout_failures: dict[str, int] = {}  # by reason
+    checkout_wait_ms_avg: float = 0
+    checkout_wait_ms_max: float = 0
+
+
+class MongoCommandStats(BaseModel):
+    collection: str
+    command: str
+    count: int = 0
+    failures: int = 0
+    avg_ms: float = 0
+    max_ms: float = 0
+
+
+class ExchangeRateStats(BaseModel):
+    base_currency: str = ""
+    currencies: int = 0
+    age_seconds: float = 0  # since the table was loaded
+    refreshes: int = 0
+    refresh_failures: int = 0
+    missing_rates: dict[str, int] = {}  # currency: conversions left unconverted
+
+
+class SuggestIndexStats(BaseModel):
+    products: int = 0
+    brands: int = 0
+    categories: int = 0
+    age_seconds: float = 0  # since the last full rebuild
+    rebuilds: int = 0
+    refreshes: int = 0
+    failures: int = 0
+
+
+class GetMetricsRespData(BaseModel):
+    token_cache: CacheStats = CacheStats()
+    count_cache: CacheStats = CacheStats()
+    facet_cache: CacheStats = CacheStats()
+    response_cache: ResponseCacheStats = ResponseCacheStats()
+    presign_cache: PresignCacheStats = PresignCacheStats()
+    price_formatters: CacheStats = CacheStats()
+    minio_pool: MinioPoolStats = MinioPoolStats()
+    mongo_pool: MongoPoolStats = MongoPoolStats()
+    mongo_commands: list[MongoCommandStats] = []
+    exchange_rates: ExchangeRateStats = ExchangeRateStats()
+    suggest_index: SuggestIndexStats = SuggestIndexStats()
@@ -1,17 +1,22 @@
 from pydantic import BaseModel
 from typing import Optional, Literal
+from domain.dto import product_dto
 from domain.model import product_model, base_model
 from minio import Minio
 from utils import helper
 
+from .generic_resp import PaginatedData
+
 
 class BaseProductSummaryResp(base_model.MinioUtil):
     _bucket_name = product_model.ProductModel.getBucketName()
-    _minio_fields = product_model.ProductModel.getMinioFields()
+    _minio_fields = ["image"]
     id: str = ""
     name: str = ""
     price: float = 0
+    price_currency: str = ""
     localized_price: str = ""
+    localized_price_currency: str = ""  # converted to, or price_currency if no rate
     image: Optional[str] = None
 
     def asResponse(
@@ -27,6 +32,7 @@ class BaseProductSummaryResp(base_model.MinioUtil):
 
         if self.price and currency_code and language_code:
             self.localized_price = helper.localizePrice(self.price, currency_code, language_code)
+            self.localized_price_currency = currency_code
         if self.image:
             self.urlizeMinioFields(minio_client=minio_client)
 
@@ -35,20 +41,50 @@ class GetProductListReq(BaseModel):
     category_id: Optional[str] = None
     query: Optional[str] = None
     query_by: Optional[Literal["name", "brand", "sku"]] = None
-    sort_by: Literal["created_at", "updated_at", "title", "price"] = (
-        "created_at"
-    )
+    # of the main variant, in the base currency (EXCHANGE_RATE_BASE_CURRENCY)
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    in_stock: Optional[bool] = None
+    # relevance if `query` is set, created_at otherwise
+    sort_by: Optional[
+        Literal["created_at", "updated_at", "title", "price", "relevance"]
+    ] = None
     sort_order: Literal["asc", "desc"] = "desc"
     page: int = 1
     limit: int = 10
+    cursor: Optional[str] = None  # next_cursor of the previous page, overrides page
+    exact: bool = False  # exact total, unfiltered total is estimated otherwise
+    # comma separated counts to return beside the page: category,brand,price,in_stock
+    facets: Optional[str] = None
 
 
 class GetProductListRespDataItem(BaseProductSummaryResp):
     pass
 
+
+class GetProductListRespData(PaginatedData[GetProductListRespDataItem]):
+    facets: Optional[product_dto.ProductListFacets] = None  # if requested
+
 class GetProductDetailRespData__VariantsItem(product_model.ProductVariantModel):
     localized_price: str = ""
+    localized_price_currency: str = ""  # converted to, or price_currency if no rate
     product_varian_type_name: str = ""
 
 class GetProductDetailRespData(product_model.ProductModel):
     variants: list[GetProductDetailRespData__VariantsItem] = []
+
+
+class GetProductSuggestReq(BaseModel):
+    query: str
+    limit: int = 10  # per kind, at most 50
+
+
+class GetProductSuggestRespDataItem(BaseModel):
+    id: str  # normalized name for brands
+    name: str
+
+
+class GetProductSuggestRespData(BaseModel):
+    products: list[GetProductSuggestRespDataItem] = []
+    brands: list[GetProductSuggestRespDataItem] = []
+    categories: list[GetProductSuggestRespDataItem] = []
@@ -6,6 +6,8 @@ class TopUpWalletRequest(BaseModel):
 
 class TopUpWalletRespData(wallet_model.WalletModel):
     localized_balance: str
+    localized_balance_currency: str = ""
 
 class GetWalletRespData(wallet_model.WalletModel):
-    localized_balance: str
\ No newline at end of file
+    localized_balance: str
+    localized_balance_currency: str = ""
\ No newline at end of file
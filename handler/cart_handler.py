@@ -18,7 +18,84 @@ CartRouter = APIRouter(
     description="get current user cart",
     response_model=generic_resp.RespData[cart_rest.GetUserCartDetailRespData],
 )
-def get_user_cart(
+async def get_user_cart(
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+    cart_service: cart_service.AsyncCartService = Depends(),
+):
+    data = await cart_service.getUserCartDetail(current_user=current_user)
+    return generic_resp.RespData[cart_rest.GetUserCartDetailRespData](data=data)
+
+
+@CartRouter.post(
+    "/items",
+    description="add item to cart",
+    response_model=generic_resp.RespData[cart_rest.AddToCartRespData],
+    openapi_extra={
+        "requestBody": req_utils.generateFormOrJsonOpenapiBody(cart_rest.AddToChartReq)
+    },
+)
+async def add_to_cart(
+    payload=formOrJsonDependGenerator(cart_rest.AddToChartReq),
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+    cart_service: cart_service.AsyncCartService = Depends(),
+):
+    data = await cart_service.addToCart(payload=payload, current_user=current_user)
+    return generic_resp.RespData[cart_rest.AddToCartRespData](data=data)
+
+
+@CartRouter.delete(
+    "/items/{cart_item_id}",
+    description="delete item from cart",
+    response_model=generic_resp.RespData[cart_rest.DeleteCartItemRespData],
+)
+async def delete_cart_item(
+    cart_item_id: str,
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+    cart_service: cart_service.AsyncCartService = Depends(),
+):
+    data = await cart_service.deleteCartItem(
+        current_user=current_user, cart_item_id=cart_item_id
+    )
+    return generic_resp.RespData[cart_rest.DeleteCartItemRespData](data=data)
+
+
+@CartRouter.patch(
+    "/items/{cart_item_id}",
+    description="update item in cart",
+    response_model=generic_resp.RespData[cart_rest.UpdateCartItemRespData],
+    openapi_extra={
+        "requestBody": req_utils.generateFormOrJsonOpenapiBody(
+            cart_rest.UpdateCartItemReq
+        )
+    },
+)
+async def update_cart_item(
+    cart_item_id: str,
+    payload=formOrJsonDependGenerator(cart_rest.UpdateCartItemReq),
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+    cart_service: cart_service.AsyncCartService = Depends(),
+):
+    data = await cart_service.updateCartItem(
+        current_user=current_user, cart_item_id=cart_item_id, payload=payload
+    )
+    return generic_resp.RespData[cart_rest.UpdateCartItemRespData](data=data)
+
+
+# sync `def` handlers on CartService, served instead of the ones above when
+# Env.SYNC_HANDLERS is set
+SyncCartRouter = APIRouter(
+    prefix="/cart",
+    tags=["Cart"],
+    dependencies=[Depends(verifyToken)],
+)
+
+
+@SyncCartRouter.get(
+    "",
+    description="get current user cart",
+    response_model=generic_resp.RespData[cart_rest.GetUserCartDetailRespData],
+)
+def get_user_cart_sync(
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
     cart_service: cart_service.CartService = Depends(),
 ):
@@ -26,7 +103,7 @@ def get_user_cart(
     return generic_resp.RespData[cart_rest.GetUserCartDetailRespData](data=data)
 
 
-@CartRouter.post(
+@SyncCartRouter.post(
     "/items",
     description="add item to cart",
     response_model=generic_resp.RespData[cart_rest.AddToCartRespData],
@@ -34,7 +111,7 @@ def get_user_cart(
         "requestBody": req_utils.generateFormOrJsonOpenapiBody(cart_rest.AddToChartReq)
     },
 )
-def add_to_cart(
+def add_to_cart_sync(
     payload=formOrJsonDependGenerator(cart_rest.AddToChartReq),
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
     cart_service: cart_service.CartService = Depends(),
@@ -43,12 +120,12 @@ def add_to_cart(
     return generic_resp.RespData[cart_rest.AddToCartRespData](data=data)
 
 
-@CartRouter.delete(
+@SyncCartRouter.delete(
     "/items/{cart_item_id}",
     description="delete item from cart",
     response_model=generic_resp.RespData[cart_rest.DeleteCartItemRespData],
 )
-def delete_cart_item(
+def delete_cart_item_sync(
     cart_item_id: str,
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
     cart_service: cart_service.CartService = Depends(),
@@ -59,7 +136,7 @@ def delete_cart_item(
     return generic_resp.RespData[cart_rest.DeleteCartItemRespData](data=data)
 
 
-@CartRouter.patch(
+@SyncCartRouter.patch(
     "/items/{cart_item_id}",
     description="update item in cart",
     response_model=generic_resp.RespData[cart_rest.UpdateCartItemRespData],
@@ -69,7 +146,7 @@ def delete_cart_item(
         )
     },
 )
-def update_cart_item(
+def update_cart_item_sync(
     cart_item_id: str,
     payload=formOrJsonDependGenerator(cart_rest.UpdateCartItemReq),
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
@@ -78,4 +155,4 @@ def update_cart_item(
     data = cart_service.updateCartItem(
         current_user=current_user, cart_item_id=cart_item_id, payload=payload
     )
-    return generic_resp.RespData[cart_rest.UpdateCartItemRespData](data=data)
\ No newline at end of file
+    return generic_resp.RespData[cart_rest.UpdateCartItemRespData](data=data)
@@ -1,8 +1,11 @@
-from fastapi import Depends, APIRouter
+from typing import Optional
+
+from fastapi import Depends, APIRouter, Header
 from core.dependencies import verifyToken, RoleRequired
 from domain.rest import category_rest, generic_resp
 from service import category_service
 from domain.dto import auth_dto
+from utils import response as resp_utils
 
 
 CategoryRouter = APIRouter(
@@ -20,17 +23,32 @@ CategoryRouter = APIRouter(
 )
 def get_product_list(
     query: category_rest.GetCategoryListReq = Depends(),
+    if_none_match: Optional[str] = Header(None),
     category_service: category_service.CategoryService = Depends(),
 ):
-    data, count = category_service.getList(query=query)
+    headers = resp_utils.validatorHeaders(category_service.getListETag(query=query))
+    if resp_utils.etagMatches(if_none_match, headers["ETag"]):
+        return resp_utils.notModifiedResp(headers)
+
+    data, count, exact, next_cursor = category_service.getList(query=query)
 
     paginated_data = generic_resp.PaginatedData[
         category_rest.GetCategoryListRespDataItem
-    ](total=count, page=query.page, limit=query.limit, data=data)
+    ](
+        total=count,
+        page=query.page,
+        limit=query.limit,
+        data=data,
+        next_cursor=next_cursor,
+        exact=exact,
+    )
 
-    return generic_resp.RespData[
-        generic_resp.PaginatedData[category_rest.GetCategoryListRespDataItem]
-    ](data=paginated_data)
+    return resp_utils.jsonResp(
+        generic_resp.RespData[
+            generic_resp.PaginatedData[category_rest.GetCategoryListRespDataItem]
+        ](data=paginated_data),
+        headers=headers,
+    )
 
 
 @CategoryRouter.post(
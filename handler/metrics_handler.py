@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from core.dependencies import RoleRequired
+from domain.rest import generic_resp, metrics_rest
+from service import metrics_service
+
+MetricsRouter = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics", "Admin Only"],
+    dependencies=[Depends(RoleRequired(role=["admin"]))],
+)
+
+
+@MetricsRouter.get(
+    "",
+    description="admin only. in-process metrics of the worker that serve the request",
+    response_model=generic_resp.RespData[metrics_rest.GetMetricsRespData],
+)
+def get_metrics(
+    metrics_service: metrics_service.MetricsService = Depends(),
+):
+    data = metrics_service.getMetrics()
+    return generic_resp.RespData[metrics_rest.GetMetricsRespData](data=data)
@@ -1,8 +1,11 @@
-from fastapi import Depends, APIRouter
+from typing import Optional
+
+from fastapi import Depends, APIRouter, Header
 from core.dependencies import verifyToken
 from domain.rest import product_rest, generic_resp
 from service import product_service
 from domain.dto import auth_dto
+from utils import response as resp_utils
 
 
 ProductRouter = APIRouter(
@@ -14,37 +17,126 @@ ProductRouter = APIRouter(
 
 @ProductRouter.get(
     "",
-    response_model=generic_resp.RespData[
-        generic_resp.PaginatedData[product_rest.GetProductListRespDataItem]
-    ],
+    response_model=generic_resp.RespData[product_rest.GetProductListRespData],
 )
-def get_product_list(
+async def get_product_list(
     query: product_rest.GetProductListReq = Depends(),
-    product_service: product_service.ProductService = Depends(),
+    product_service: product_service.AsyncProductService = Depends(),
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
 ):
-    data, count = product_service.getList(query=query, curr_user_id=current_user.id)
+    body = await product_service.getListBody(query=query, current_user=current_user)
+
+    return resp_utils.rawJsonResp(body)
 
-    paginated_data = generic_resp.PaginatedData[
-        product_rest.GetProductListRespDataItem
-    ](total=count, page=query.page, limit=query.limit, data=data)
 
-    return generic_resp.RespData[
-        generic_resp.PaginatedData[product_rest.GetProductListRespDataItem]
-    ](data=paginated_data)
+@ProductRouter.get(
+    "/suggest",
+    response_model=generic_resp.RespData[product_rest.GetProductSuggestRespData],
+)
+async def suggest_products(
+    query: product_rest.GetProductSuggestReq = Depends(),
+    product_service: product_service.AsyncProductService = Depends(),
+):
+    data = product_service.suggest(query=query)
+
+    return resp_utils.jsonResp(
+        generic_resp.RespData[product_rest.GetProductSuggestRespData](data=data)
+    )
 
 
 @ProductRouter.get(
     "/{product_id}",
     response_model=generic_resp.RespData[product_rest.GetProductDetailRespData],
 )
-def get_product_detail(
+async def get_product_detail(
     product_id: str,
+    if_none_match: Optional[str] = Header(None),
+    product_service: product_service.AsyncProductService = Depends(),
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+):
+    headers = None
+    validators = await product_service.getProductDetailValidators(
+        product_id=product_id, current_user=current_user
+    )
+    if validators:
+        headers = resp_utils.validatorHeaders(*validators)
+        if resp_utils.etagMatches(if_none_match, validators[0]):
+            return resp_utils.notModifiedResp(headers)
+
+    product = await product_service.getProductDetail(
+        product_id=product_id, current_user=current_user
+    )
+
+    return resp_utils.jsonResp(
+        generic_resp.RespData[product_rest.GetProductDetailRespData](data=product),
+        headers=headers,
+    )
+
+
+# sync `def` handlers on ProductService, served instead of the ones above when
+# Env.SYNC_HANDLERS is set. list responses are not cached on this path
+SyncProductRouter = APIRouter(
+    prefix="/products",
+    tags=["Product"],
+    dependencies=[Depends(verifyToken)],
+)
+
+
+@SyncProductRouter.get(
+    "",
+    response_model=generic_resp.RespData[product_rest.GetProductListRespData],
+)
+def get_product_list_sync(
+    query: product_rest.GetProductListReq = Depends(),
     product_service: product_service.ProductService = Depends(),
     current_user: auth_dto.CurrentUser = Depends(verifyToken),
 ):
+    data = product_service.getList(query=query, current_user=current_user)
+
+    return resp_utils.jsonResp(
+        generic_resp.RespData[product_rest.GetProductListRespData](data=data)
+    )
+
+
+@SyncProductRouter.get(
+    "/suggest",
+    response_model=generic_resp.RespData[product_rest.GetProductSuggestRespData],
+)
+def suggest_products_sync(
+    query: product_rest.GetProductSuggestReq = Depends(),
+    product_service: product_service.ProductService = Depends(),
+):
+    data = product_service.suggest(query=query)
+
+    return resp_utils.jsonResp(
+        generic_resp.RespData[product_rest.GetProductSuggestRespData](data=data)
+    )
+
+
+@SyncProductRouter.get(
+    "/{product_id}",
+    response_model=generic_resp.RespData[product_rest.GetProductDetailRespData],
+)
+def get_product_detail_sync(
+    product_id: str,
+    if_none_match: Optional[str] = Header(None),
+    product_service: product_service.ProductService = Depends(),
+    current_user: auth_dto.CurrentUser = Depends(verifyToken),
+):
+    headers = None
+    validators = product_service.getProductDetailValidators(
+        product_id=product_id, current_user=current_user
+    )
+    if validators:
+        headers = resp_utils.validatorHeaders(*validators)
+        if resp_utils.etagMatches(if_none_match, validators[0]):
+            return resp_utils.notModifiedResp(headers)
+
     product = product_service.getProductDetail(
-        product_id=product_id, curr_user_id=current_user.id
+        product_id=product_id, current_user=current_user
     )
 
-    return generic_resp.RespData[product_rest.GetProductDetailRespData](data=product)
+    return resp_utils.jsonResp(
+        generic_resp.RespData[product_rest.GetProductDetailRespData](data=product),
+        headers=headers,
+    )
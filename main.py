@@ -17,14 +17,14 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pytz import timezone
 from uvicorn.config import LOGGING_CONFIG
 
 from config.email import GmailEmailClient
 from config.env import Env
-from config.minio import getMinioClient
-from config.mongodb import MongodbClient
-from core import middlewares
+from config.minio import MinioClient, getMinioClient
+from config.mongodb import AsyncMongodbClient, MongodbClient
 from core.exceptions import handlers as exception_handlers
 from core.exceptions.http import CustomHttpException
 from core.logging import logger
@@ -32,14 +32,27 @@ from handler import (
     auth_handler,
     cart_handler,
     category_handler,
+    metrics_handler,
     product_handler,
     user_handler,
     wallet_handler,
 )
-from repository import category_repo, product_repo, review_repo, user_repo
+from repository import (
+    cart_repo,
+    category_repo,
+    exchange_rate_repo,
+    product_repo,
+    review_repo,
+    user_repo,
+    wallet_repo,
+)
 from utils import minio as minio_utils
 from utils import mongodb as mongodb_utils
+from utils import query_shape as query_shape_utils
 from utils import seeder as seeder_utils
+from utils.exchange_rate import ExchangeRateTable
+from utils.suggest import SuggestIndex
+from utils.last_active import LastActiveBuffer
 
 requests.packages.urllib3.disable_warnings()
 
@@ -75,11 +88,33 @@ async def lifespan(app: FastAPI):
     # prepare here
     # GmailEmailClient.init()
     MongodbClient.init()
+    AsyncMongodbClient.init()
+    MinioClient.init()
+    LastActiveBuffer.init(
+        user_repo=user_repo.UserRepo(mongo_db=MongodbClient),
+        interval_seconds=Env.LAST_ACTIVE_FLUSH_INTERVAL_SECONDS,
+    )
+    ExchangeRateTable.init(
+        exchange_rate_repo=exchange_rate_repo.ExchangeRateRepo(mongo_db=MongodbClient),
+        interval_seconds=Env.EXCHANGE_RATE_REFRESH_SECONDS,
+    )
+    SuggestIndex.init(
+        product_repo=product_repo.ProductRepo(mongo_db=MongodbClient),
+        category_repo=category_repo.CategoryRepo(mongo_db=MongodbClient),
+        review_repo=review_repo.ReviewRepo(mongo_db=MongodbClient),
+        refresh_seconds=Env.SUGGEST_REFRESH_SECONDS,
+        rebuild_seconds=Env.SUGGEST_REBUILD_SECONDS,
+    )
 
     yield
 
     # cleanup here
     # GmailEmailClient.close()
+    SuggestIndex.close()
+    ExchangeRateTable.close()
+    LastActiveBuffer.close()
+    MinioClient.close()
+    await AsyncMongodbClient.close()
     MongodbClient.close()
 
 
@@ -89,6 +124,7 @@ app = FastAPI(
     docs_url=None if Env.PRODUCTION else "/",
     redoc_url=None if Env.PRODUCTION else "/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     # swagger_ui_parameters={"docExpansion": "none"},
 )
 
@@ -105,7 +141,6 @@ app.add_exception_handler(Exception, exception_handlers.defaultHttpExceptionHand
 
 
 # register middlewares
-app.add_middleware(middlewares.JsonableRespEncoderMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -117,10 +152,17 @@ app.add_middleware(
 # register handlers
 app.include_router(auth_handler.AuthRouter)
 app.include_router(user_handler.UserRouter)
-app.include_router(product_handler.ProductRouter)
+if Env.SYNC_HANDLERS:
+    app.include_router(product_handler.SyncProductRouter)
+else:
+    app.include_router(product_handler.ProductRouter)
 app.include_router(category_handler.CategoryRouter)
-app.include_router(cart_handler.CartRouter)
+if Env.SYNC_HANDLERS:
+    app.include_router(cart_handler.SyncCartRouter)
+else:
+    app.include_router(cart_handler.CartRouter)
 app.include_router(wallet_handler.WalletRouter)
+app.include_router(metrics_handler.MetricsRouter)
 
 if __name__ == "__main__":
     # checking unused env ferm .env file
@@ -142,14 +184,22 @@ if __name__ == "__main__":
     product_repo_ = product_repo.ProductRepo(mongo_db=MongodbClient)
     category_repo_ = category_repo.CategoryRepo(mongo_db=MongodbClient)
     review_repo_ = review_repo.ReviewRepo(mongo_db=MongodbClient)
+    cart_repo_ = cart_repo.CartRepo(mongo_db=MongodbClient)
+    wallet_repo_ = wallet_repo.WalletRepo(mongo_db=MongodbClient)
     args = sys.argv
     if len(args) > 1:
         supported_args = [
             "--ensure-indexes",
+            "--force-ensure-indexes",
+            "--plan-indexes",
+            "--audit-query-shapes",
             "--ensure-buckets",
             "--seed-initial-users",
             "--seed-initial-categories",
             "--seed-initial-products",
+            "--refresh-product-summaries",
+            "--migrate-cart-items",
+            "--backfill-wallet-currencies",
         ]
         # validate args
         for arg in args[1:]:
@@ -163,6 +213,21 @@ if __name__ == "__main__":
             elif arg == "--ensure-indexes":
                 mongodb_utils.ensureIndexes(db=MongodbClient.db)
 
+            elif arg == "--force-ensure-indexes":
+                mongodb_utils.ensureIndexes(db=MongodbClient.db, force=True)
+
+            elif arg == "--plan-indexes":
+                mongodb_utils.ensureIndexes(db=MongodbClient.db, dry_run=True)
+
+            elif arg == "--audit-query-shapes":
+                failed_shapes = query_shape_utils.auditQueryShapes(
+                    db=MongodbClient.db,
+                    repos=[product_repo_, category_repo_, cart_repo_, review_repo_],
+                )
+                if failed_shapes:
+                    MongodbClient.close()
+                    sys.exit(1)
+
             elif arg == "--ensure-buckets":
                 minio_utils.ensureBuckets(minio=minio_client)
 
@@ -180,6 +245,23 @@ if __name__ == "__main__":
                     review_repo=review_repo_,
                 )
 
+            elif arg == "--refresh-product-summaries":
+                ExchangeRateTable.load(
+                    exchange_rate_repo=exchange_rate_repo.ExchangeRateRepo(
+                        mongo_db=MongodbClient
+                    )
+                )
+                updated = product_repo_.refreshSummaries()
+                logger.info(f"product summaries refreshed: {updated} updated")
+
+            elif arg == "--migrate-cart-items":
+                moved = cart_repo_.migrateCartItems()
+                logger.info(f"cart items moved to their own collection: {moved}")
+
+            elif arg == "--backfill-wallet-currencies":
+                updated = wallet_repo_.backfillCurrencies()
+                logger.info(f"wallet currencies backfilled: {updated} updated")
+
     MongodbClient.close()
 
     uvicorn.run(
@@ -1,36 +1,180 @@
 from fastapi import Depends
-from config.mongodb import MongodbClient
+from config.mongodb import AsyncMongodbClient, MongodbClient
 from domain.model import cart_model
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from typing import Union, Optional, Literal
 from core.logging import logger
-from utils import helper
+from utils import helper, pagination
 from domain.dto import cart_dto
+from utils.query_shape import listPipeline, queryShape
 
+# `_id`s of the `carts` documents migrateCartItems() added to a cart item, unset when
+# the migration is done
+MIGRATED_FROM_FIELD = "migrated_from_"
 
-class CartRepo:
+
+class _CartQueries:
+    """
+    updates shared by CartRepo and AsyncCartRepo, no I/O here
+    """
+
+    @staticmethod
+    def _cartOnInsert(user_id: str) -> dict:
+        time_now = helper.timeNow()
+        return cart_model.CartModel(
+            id=helper.generateUUID4(),
+            created_at=time_now,
+            updated_at=time_now,
+            user_id=user_id,
+        ).model_dump(exclude={"user_id"})
+
+    @staticmethod
+    def _cartItemIncrement(
+        cart_id: str,
+        product_id: str,
+        product_variant_id: Optional[str],
+        quantity: int,
+        created_by: str,
+    ) -> tuple[dict, dict]:
+        """
+        return (filter, update) adding `quantity` to the cart item, upsert-able
+        """
+        time_now = helper.timeNow()
+        filter = {
+            "cart_id": cart_id,
+            "product_id": product_id,
+            "product_variant_id": product_variant_id,
+        }
+        update = {
+            "$inc": {"quantity": quantity},
+            "$set": {"updated_at": time_now},
+            "$setOnInsert": {
+                "id": helper.generateUUID4(),
+                "created_at": time_now,
+                "created_by": created_by,
+                "description": "",
+            },
+        }
+        return filter, update
+
+    @staticmethod
+    def _insertedCartItem(filter: dict, update: dict) -> cart_model.CartItemModel:
+        """
+        the cart item `_cartItemIncrement()` (filter, update) upserted
+        """
+        return cart_model.CartItemModel(
+            **filter,
+            **update["$setOnInsert"],
+            **update["$set"],
+            quantity=update["$inc"]["quantity"],
+        )
+
+    @staticmethod
+    def _cartWithItemPipeline(
+        user_id: str, product_id: str, product_variant_id: Optional[str]
+    ) -> list[dict]:
+        return [
+            {"$match": {"user_id": user_id}},
+            {"$limit": 1},
+            {
+                "$lookup": {
+                    "from": cart_model.CartItemModel.getCollName(),
+                    "localField": "id",
+                    "foreignField": "cart_id",
+                    "as": "item_",
+                    "pipeline": [
+                        {
+                            "$match": {
+                                "product_id": product_id,
+                                "product_variant_id": product_variant_id,
+                            }
+                        },
+                        {"$limit": 1},
+                    ],
+                }
+            },
+        ]
+
+    @staticmethod
+    def _cartWithItem(
+        results: list[dict],
+    ) -> tuple[Optional[cart_model.CartModel], Optional[cart_model.CartItemModel]]:
+        if not results:
+            return None, None
+
+        cart = results[0]
+        items = cart.pop("item_")
+        cart_item = cart_model.CartItemModel.fromDoc(items[0]) if items else None
+        return cart_model.CartModel.fromDoc(cart), cart_item
+
+
+class CartRepo(_CartQueries):
     def __init__(self, mongo_db: MongodbClient = Depends()):
         self.cart_coll = mongo_db.db[cart_model.CartModel.getCollName()]
+        self.cart_item_coll = mongo_db.db[cart_model.CartItemModel.getCollName()]
 
     def create(self, cart: cart_model.CartModel):
         self.cart_coll.insert_one(cart.model_dump())
 
+    @queryShape(cart_model.CartModel, filter={"user_id": ""})
+    def getOrCreateByUserId(self, user_id: str) -> cart_model.CartModel:
+        """
+        get user's cart, create it if missing, in one roundtrip
+        """
+        try:
+            cart = self.cart_coll.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": self._cartOnInsert(user_id=user_id)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # concurrent upsert of the same user inserted first
+            cart = self.cart_coll.find_one({"user_id": user_id})
+
+        return cart_model.CartModel.fromDoc(cart)
+
+    @queryShape(cart_model.CartModel, filter={"id": ""})
     def getById(self, id: str) -> Union[cart_model.CartModel, None]:
         cart = self.cart_coll.find_one({"id": id})
         if not cart:
             return None
-        return cart_model.CartModel(**cart)
+        return cart_model.CartModel.fromDoc(cart)
 
+    @queryShape(cart_model.CartModel, filter={"user_id": ""})
     def getByUserId(self, user_id: str) -> Union[cart_model.CartModel, None]:
         cart = self.cart_coll.find_one({"user_id": user_id})
-        return cart_model.CartModel(**cart) if cart else None
+        return cart_model.CartModel.fromDoc(cart) if cart else None
+
+    @queryShape(
+        cart_model.CartModel,
+        pipeline=lambda repo: repo._cartWithItemPipeline(
+            user_id="", product_id="", product_variant_id=""
+        ),
+    )
+    def getByUserIdWithItem(
+        self, user_id: str, product_id: str, product_variant_id: Optional[str]
+    ) -> tuple[Optional[cart_model.CartModel], Optional[cart_model.CartItemModel]]:
+        """
+        return (cart, its item of the product variant) of the user in one roundtrip,
+        either is None if missing
+        """
+        pipeline = self._cartWithItemPipeline(
+            user_id=user_id,
+            product_id=product_id,
+            product_variant_id=product_variant_id,
+        )
+        return self._cartWithItem(list(self.cart_coll.aggregate(pipeline)))
 
+    @queryShape(cart_model.CartModel, filter={"id": ""})
     def delete(self, id: str) -> Union[cart_model.CartModel, None]:
         cart = self.cart_coll.find_one_and_delete({"id": id})
         if not cart:
             return None
-        return cart_model.CartModel(**cart)
+        return cart_model.CartModel.fromDoc(cart)
 
+    @queryShape(cart_model.CartModel, filter={"id": ""})
     def update(
         self, id: str, cart: cart_model.CartModel
     ) -> Union[cart_model.CartModel, None]:
@@ -39,21 +183,11 @@ class CartRepo:
             {"$set": cart.model_dump(exclude=["id"])},
             return_document=ReturnDocument.AFTER,
         )
-        return cart_model.CartModel(**cart) if cart else None
+        return cart_model.CartModel.fromDoc(cart) if cart else None
 
-    def getList(
-        self,
-        query: Optional[str] = None,
-        query_by: Optional[
-            Literal["name"]
-        ] = None,  # sort by all possible fields if none
-        skip: Optional[int] = None,
-        limit: Optional[int] = 10,
-        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
-        sort_order: Literal[-1, 1] = -1,
-        do_count: bool = False,
-    ) -> tuple[list[cart_dto.GetListResItem], int]:
-        pipeline = []
+    def _listMatch(
+        self, query: Optional[str] = None, query_by: Optional[Literal["name"]] = None
+    ) -> dict:
         match1 = {}
         match1_or = []
 
@@ -68,28 +202,64 @@ class CartRepo:
         if match1_or:
             match1["$or"] = match1_or
 
+        return match1
+
+    def _listPipeline(
+        self,
+        match1: dict,
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        cursor: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        pipeline of getList(), `match1` is the _listMatch() of the filters.
+        with `cursor` the pipeline returns the documents, else one $facet document.
+        raise ValueError if `cursor` is invalid.
+        """
+        pipeline = []
         if match1:
             pipeline.append({"$match": match1})
 
-        pipeline.append({"$sort": {sort_by: sort_order}})
+        if cursor != None:
+            value, id = pagination.decodeCursor(
+                cursor=cursor, sort_by=sort_by, sort_order=sort_order
+            )
+            pipeline.append(
+                {"$match": pagination.keysetMatch(sort_by, sort_order, value, id)}
+            )
+
+        # id as tiebreaker so the order is total and a cursor can resume from it
+        pipeline.append({"$sort": {sort_by: sort_order, "id": sort_order}})
 
-        facet = {}
-        facet__paginated_results = []
-        if skip != None:
-            facet__paginated_results.append({"$skip": skip})
+        paginated_results = []
+        if skip != None and cursor == None:
+            paginated_results.append({"$skip": skip})
 
         if limit != None:
-            facet__paginated_results.append({"$limit": limit})
+            # one extra document tells whether there is a next page
+            paginated_results.append({"$limit": limit + 1})
 
-        facet["paginated_results"] = facet__paginated_results
+        if cursor != None:
+            # no $facet, documents are streamed from the index range
+            pipeline.extend(paginated_results)
+            return pipeline
 
+        facet = {"paginated_results": paginated_results}
         if do_count:
             facet["total"] = [{"$count": "count"}]
 
         pipeline.extend(
             [
                 {"$facet": facet},
-                {"$unwind": "$total"},
+                {
+                    "$unwind": {
+                        "path": "$total",
+                        "preserveNullAndEmptyArrays": True,
+                    }
+                },
                 {
                     "$project": {
                         "total": "$total.count",
@@ -98,44 +268,110 @@ class CartRepo:
                 },
             ]
         )
-        # logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
-
-        cursor = list(self.cart_coll.aggregate(pipeline))
+        return pipeline
 
-        products = []
-        count = 0
-
-        try:
-            products = [
-                cart_dto.GetListResItem(**product)
-                for product in cursor[0].get("paginated_results") or []
-            ]
-        except Exception as e:
-            logger.warning(f"cusor is empty: {e}")
+    @queryShape(cart_model.CartModel, pipeline=listPipeline("created_at", -1))
+    @queryShape(cart_model.CartModel, pipeline=listPipeline("updated_at", -1))
+    @queryShape(
+        cart_model.CartModel,
+        pipeline=listPipeline("updated_at", -1, after=helper.timeNow()),
+    )
+    def getList(
+        self,
+        query: Optional[str] = None,
+        query_by: Optional[
+            Literal["name"]
+        ] = None,  # sort by all possible fields if none
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        cursor: Optional[str] = None,  # skip is ignored if set
+    ) -> tuple[list[cart_dto.GetListResItem], int, Optional[str]]:
+        """
+        return (items, count, next_cursor).
+        raise ValueError if `cursor` is invalid.
+        """
+        match1 = self._listMatch(query=query, query_by=query_by)
+        pipeline = self._listPipeline(
+            match1=match1,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            do_count=do_count,
+            cursor=cursor,
+        )
+        if cursor != None:
+            results = list(self.cart_coll.aggregate(pipeline))
+            count = self.cart_coll.count_documents(match1) if do_count else 0
+        else:
+            # logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
+            facet_result = list(self.cart_coll.aggregate(pipeline))
+            facet_result = facet_result[0] if facet_result else {}
+            results = facet_result.get("paginated_results") or []
+            count = facet_result.get("total") or 0
 
-        try:
-            count = cursor[0].get("total") or 0
-        except Exception as e:
-            logger.warning(f"cursor is empty: {e}")
+        next_cursor = pagination.getNextCursor(
+            docs=results, limit=limit, sort_by=sort_by, sort_order=sort_order
+        )
+        items = [cart_dto.GetListResItem.fromDoc(item) for item in results]
 
-        return products, count
+        return items, count, next_cursor
 
     ############# CART ITEM ##############
     def createCartItem(self, cart_item: cart_model.CartItemModel):
-        self.cart_coll.insert_one(cart_item.model_dump())
+        self.cart_item_coll.insert_one(cart_item.model_dump())
+
+    @queryShape(
+        cart_model.CartItemModel,
+        filter={"cart_id": "", "product_id": "", "product_variant_id": ""},
+    )
+    def incCartItem(
+        self,
+        cart_id: str,
+        product_id: str,
+        product_variant_id: Optional[str],
+        quantity: int,
+        created_by: str,
+    ) -> Optional[cart_model.CartItemModel]:
+        """
+        add `quantity` to the cart item of the product variant, create it if missing,
+        in one update_one. return the created item, None if an existing one was
+        incremented.
+        atomic, concurrent calls never lose an increment: the filter is the unique
+        index, mongodb retries an upsert that lost the insert race as an update.
+        """
+        filter, update = self._cartItemIncrement(
+            cart_id=cart_id,
+            product_id=product_id,
+            product_variant_id=product_variant_id,
+            quantity=quantity,
+            created_by=created_by,
+        )
+        result = self.cart_item_coll.update_one(filter, update, upsert=True)
+        if result.upserted_id == None:
+            return None
+        return self._insertedCartItem(filter, update)
 
+    @queryShape(cart_model.CartItemModel, filter={"id": ""})
     def updateCartItem(
         self, id: str, cart_item: cart_model.CartItemModel
     ) -> Optional[cart_model.CartItemModel]:
-        cart_item = self.cart_coll.find_one_and_update(
+        cart_item = self.cart_item_coll.find_one_and_update(
             {"id": id},
             {"$set": cart_item.model_dump(exclude=["id"])},
             return_document=ReturnDocument.AFTER,
         )
         if not cart_item:
             return None
-        return cart_model.CartItemModel(**cart_item)
+        return cart_model.CartItemModel.fromDoc(cart_item)
 
+    @queryShape(
+        cart_model.CartItemModel,
+        filter={"cart_id": "", "product_id": "", "product_variant_id": ""},
+    )
     def getCartItem(
         self,
         cart_id: Optional[str] = None,
@@ -155,23 +391,197 @@ class CartRepo:
         if product_variant_id != None:
             filter["product_variant_id"] = product_variant_id
 
-        cart_item = self.cart_coll.find_one(filter)
+        cart_item = self.cart_item_coll.find_one(filter)
         if not cart_item:
             return None
-        return cart_model.CartItemModel(**cart_item)
+        return cart_model.CartItemModel.fromDoc(cart_item)
 
+    @queryShape(cart_model.CartItemModel, filter={"id": ""})
     def getCartItemById(self, id: str) -> Union[cart_model.CartItemModel, None]:
-        cart_item = self.cart_coll.find_one({"id": id})
+        cart_item = self.cart_item_coll.find_one({"id": id})
         if not cart_item:
             return None
-        return cart_model.CartItemModel(**cart_item)
+        return cart_model.CartItemModel.fromDoc(cart_item)
 
+    @queryShape(cart_model.CartItemModel, filter={"cart_id": ""})
     def getCartItemsByCartId(self, cart_id: str) -> list[cart_model.CartItemModel]:
-        cart_items = self.cart_coll.find({"cart_id": cart_id})
-        return [cart_model.CartItemModel(**cart_item) for cart_item in cart_items]
+        cart_items = self.cart_item_coll.find({"cart_id": cart_id})
+        return [cart_model.CartItemModel.fromDoc(cart_item) for cart_item in cart_items]
 
+    @queryShape(cart_model.CartItemModel, filter={"id": ""})
     def deleteCartItem(self, id: str) -> Optional[cart_model.CartItemModel]:
-        cart_item = self.cart_coll.find_one_and_delete({"id": id})
+        cart_item = self.cart_item_coll.find_one_and_delete({"id": id})
         if not cart_item:
             return None
-        return cart_model.CartItemModel(**cart_item)
+        return cart_model.CartItemModel.fromDoc(cart_item)
+
+    def migrateCartItems(self, batch_size: int = 1000) -> int:
+        """
+        move cart items stored in `carts` collection by older versions to `cart_items`.
+        items of the same product variant in a cart are merged by summing quantity.
+        safe to run again after a failure: the quantity of a moved item is added once,
+        its cart item records it until every item is moved.
+        return number of moved documents.
+        """
+        moved = 0
+        while True:
+            cart_items = list(
+                self.cart_coll.find({"cart_id": {"$exists": True}}, limit=batch_size)
+            )
+            if not cart_items:
+                break
+
+            source_ids = []
+            inserts = []
+            increments = []
+            for cart_item in cart_items:
+                source_id = cart_item.pop("_id")
+                source_ids.append(source_id)
+                quantity = cart_item.pop("quantity", 0)
+                filter = {
+                    "cart_id": cart_item.pop("cart_id"),
+                    "product_id": cart_item.pop("product_id"),
+                    "product_variant_id": cart_item.pop("product_variant_id", None),
+                }
+                # items of the oldest versions have no id
+                cart_item["id"] = cart_item.get("id") or helper.generateUUID4()
+                inserts.append(
+                    UpdateOne(
+                        filter,
+                        {"$setOnInsert": {**cart_item, "quantity": 0}},
+                        upsert=True,
+                    )
+                )
+                increments.append(
+                    UpdateOne(
+                        {**filter, MIGRATED_FROM_FIELD: {"$ne": source_id}},
+                        {
+                            "$inc": {"quantity": quantity},
+                            "$push": {MIGRATED_FROM_FIELD: source_id},
+                        },
+                    )
+                )
+            # ordered, an item of the same product variant must find the one inserted
+            # before it
+            self.cart_item_coll.bulk_write(inserts)
+            self.cart_item_coll.bulk_write(increments, ordered=False)
+            self.cart_coll.delete_many({"_id": {"$in": source_ids}})
+            moved += len(cart_items)
+
+        self.cart_item_coll.update_many(
+            {MIGRATED_FROM_FIELD: {"$exists": True}},
+            {"$unset": {MIGRATED_FROM_FIELD: ""}},
+        )
+
+        return moved
+
+
+class AsyncCartRepo(_CartQueries):
+    """
+    CartRepo for `async def` handlers, same queries (and query shapes).
+    """
+
+    def __init__(self, mongo_db: AsyncMongodbClient = Depends()):
+        self.cart_coll = mongo_db.db[cart_model.CartModel.getCollName()]
+        self.cart_item_coll = mongo_db.db[cart_model.CartItemModel.getCollName()]
+
+    async def getOrCreateByUserId(self, user_id: str) -> cart_model.CartModel:
+        """
+        see CartRepo.getOrCreateByUserId
+        """
+        try:
+            cart = await self.cart_coll.find_one_and_update(
+                {"user_id": user_id},
+                {"$setOnInsert": self._cartOnInsert(user_id=user_id)},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            cart = await self.cart_coll.find_one({"user_id": user_id})
+
+        return cart_model.CartModel.fromDoc(cart)
+
+    async def getById(self, id: str) -> Optional[cart_model.CartModel]:
+        cart = await self.cart_coll.find_one({"id": id})
+        return cart_model.CartModel.fromDoc(cart) if cart else None
+
+    async def getByUserId(self, user_id: str) -> Optional[cart_model.CartModel]:
+        cart = await self.cart_coll.find_one({"user_id": user_id})
+        return cart_model.CartModel.fromDoc(cart) if cart else None
+
+    async def getByUserIdWithItem(
+        self, user_id: str, product_id: str, product_variant_id: Optional[str]
+    ) -> tuple[Optional[cart_model.CartModel], Optional[cart_model.CartItemModel]]:
+        """
+        see CartRepo.getByUserIdWithItem
+        """
+        pipeline = self._cartWithItemPipeline(
+            user_id=user_id,
+            product_id=product_id,
+            product_variant_id=product_variant_id,
+        )
+        results = await (await self.cart_coll.aggregate(pipeline)).to_list()
+        return self._cartWithItem(results)
+
+    ############# CART ITEM ##############
+    async def incCartItem(
+        self,
+        cart_id: str,
+        product_id: str,
+        product_variant_id: Optional[str],
+        quantity: int,
+        created_by: str,
+    ) -> Optional[cart_model.CartItemModel]:
+        """
+        see CartRepo.incCartItem
+        """
+        filter, update = self._cartItemIncrement(
+            cart_id=cart_id,
+            product_id=product_id,
+            product_variant_id=product_variant_id,
+            quantity=quantity,
+            created_by=created_by,
+        )
+        result = await self.cart_item_coll.update_one(filter, update, upsert=True)
+        if result.upserted_id == None:
+            return None
+        return self._insertedCartItem(filter, update)
+
+    async def getCartItem(
+        self, cart_id: str, product_id: str, product_variant_id: Optional[str]
+    ) -> Optional[cart_model.CartItemModel]:
+        cart_item = await self.cart_item_coll.find_one(
+            {
+                "cart_id": cart_id,
+                "product_id": product_id,
+                "product_variant_id": product_variant_id,
+            }
+        )
+        return cart_model.CartItemModel.fromDoc(cart_item) if cart_item else None
+
+    async def updateCartItem(
+        self, id: str, cart_item: cart_model.CartItemModel
+    ) -> Optional[cart_model.CartItemModel]:
+        cart_item = await self.cart_item_coll.find_one_and_update(
+            {"id": id},
+            {"$set": cart_item.model_dump(exclude=["id"])},
+            return_document=ReturnDocument.AFTER,
+        )
+        return cart_model.CartItemModel.fromDoc(cart_item) if cart_item else None
+
+    async def getCartItemById(self, id: str) -> Optional[cart_model.CartItemModel]:
+        cart_item = await self.cart_item_coll.find_one({"id": id})
+        return cart_model.CartItemModel.fromDoc(cart_item) if cart_item else None
+
+    async def getCartItemsByCartId(
+        self, cart_id: str
+    ) -> list[cart_model.CartItemModel]:
+        cart_items = self.cart_item_coll.find({"cart_id": cart_id})
+        return [
+            cart_model.CartItemModel.fromDoc(cart_item)
+            async for cart_item in cart_items
+        ]
+
+    async def deleteCartItem(self, id: str) -> Optional[cart_model.CartItemModel]:
+        cart_item = await self.cart_item_coll.find_one_and_delete({"id": id})
+        return cart_model.CartItemModel.fromDoc(cart_item) if cart_item else None
@@ -2,43 +2,75 @@ from fastapi import Depends
 from config.mongodb import MongodbClient
 from domain.model import category_model
 from pymongo import ReturnDocument
+from datetime import datetime
 from typing import Union, Optional, Literal
 from core.logging import logger
-from utils import helper
+from utils import helper, pagination
 from domain.dto import category_dto
+from utils.coll_version import CollVersion
+from utils.count_cache import CountCache
+from utils.query_shape import listPipeline, queryShape
 
 
 class CategoryRepo:
     def __init__(self, mongo_db: MongodbClient = Depends()):
         self.category_coll = mongo_db.db[category_model.CategoryModel.getCollName()]
 
+    def version(self) -> int:
+        """
+        collection version, changed by every category write
+        """
+        return CollVersion.get(self.category_coll)
+
     def create(
         self, category: category_model.CategoryModel
     ):
         self.category_coll.insert_one(category.model_dump())
+        CollVersion.bump(self.category_coll)
 
+    @queryShape(category_model.CategoryModel, filter={"id": ""})
     def getById(
         self, id: str
     ) -> Union[category_model.CategoryModel, None]:
         category = self.category_coll.find_one({"id": id})
         if not category:
             return None
-        return category_model.CategoryModel(**category)
-
+        return category_model.CategoryModel.fromDoc(category)
+
+    @queryShape(
+        category_model.CategoryModel, filter={"updated_at": {"$gte": helper.timeNow()}}
+    )
+    def getSuggestSources(
+        self, updated_since: Optional[datetime] = None
+    ) -> list[category_model.CategoryModel]:
+        """
+        every category, or the ones updated since `updated_since`
+        """
+        filter = {}
+        if updated_since != None:
+            filter["updated_at"] = {"$gte": updated_since}
+
+        categories = self.category_coll.find(filter)
+        return [category_model.CategoryModel.fromDoc(item) for item in categories]
+
+    @queryShape(category_model.CategoryModel, filter={"name": ""})
     def getByName(
         self, name: str
     ) -> Union[category_model.CategoryModel, None]:
         category = self.category_coll.find_one({"name": name})
         if not category:
             return None
-        return category_model.CategoryModel(**category)
+        return category_model.CategoryModel.fromDoc(category)
 
+    @queryShape(category_model.CategoryModel, filter={"id": ""})
     def delete(self, id: str) -> Union[category_model.CategoryModel, None]:
         category = self.category_coll.find_one_and_delete({"id": id})
         if not category:
             return None
-        return category_model.CategoryModel(**category)
+        CollVersion.bump(self.category_coll)
+        return category_model.CategoryModel.fromDoc(category)
 
+    @queryShape(category_model.CategoryModel, filter={"id": ""})
     def update(
         self, id: str, category: category_model.CategoryModel
     ) -> Union[category_model.CategoryModel, None]:
@@ -47,21 +79,14 @@ class CategoryRepo:
             {"$set": category.model_dump(exclude=["id"])},
             return_document=ReturnDocument.AFTER,
         )
-        return category_model.CategoryModel(**category) if category else None
+        if not category:
+            return None
+        CollVersion.bump(self.category_coll)
+        return category_model.CategoryModel.fromDoc(category)
 
-    def getList(
-        self,
-        query: Optional[str] = None,
-        query_by: Optional[
-            Literal["name"]
-        ] = None,  # sort by all possible fields if none
-        skip: Optional[int] = None,
-        limit: Optional[int] = 10,
-        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
-        sort_order: Literal[-1, 1] = -1,
-        do_count: bool = False,
-    ) -> tuple[list[category_dto.GetListResItem], int]:
-        pipeline = []
+    def _listMatch(
+        self, query: Optional[str] = None, query_by: Optional[Literal["name"]] = None
+    ) -> dict:
         match1 = {}
         match1_or = []
 
@@ -79,28 +104,93 @@ class CategoryRepo:
         if match1_or:
             match1["$or"] = match1_or
 
+        return match1
+
+    def countList(
+        self,
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name"]] = None,
+        exact: bool = False,
+    ) -> tuple[int, bool]:
+        """
+        total of getList() with the same filter, return (count, is_exact).
+        see `ProductRepo.countList()`
+        """
+        match1 = self._listMatch(query=query, query_by=query_by)
+        if exact:
+            return self.category_coll.count_documents(match1), True
+
+        if not match1:
+            return self.category_coll.estimated_document_count(), False
+
+        key = CountCache.key(
+            coll_name=self.category_coll.name,
+            version=CollVersion.get(self.category_coll),
+            filter=match1,
+        )
+        count = CountCache.get(key)
+        if count == None:
+            count = self.category_coll.count_documents(match1)
+            CountCache.set(key, count)
+
+        return count, True
+
+    def _listPipeline(
+        self,
+        match1: dict,
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        cursor: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        pipeline of getList(), `match1` is the _listMatch() of the filters.
+        with `cursor` the pipeline returns the documents, else one $facet document.
+        raise ValueError if `cursor` is invalid.
+        """
+        pipeline = []
         if match1:
             pipeline.append({"$match": match1})
 
-        pipeline.append({"$sort": {sort_by: sort_order}})
+        if cursor != None:
+            value, id = pagination.decodeCursor(
+                cursor=cursor, sort_by=sort_by, sort_order=sort_order
+            )
+            pipeline.append(
+                {"$match": pagination.keysetMatch(sort_by, sort_order, value, id)}
+            )
+
+        # id as tiebreaker so the order is total and a cursor can resume from it
+        pipeline.append({"$sort": {sort_by: sort_order, "id": sort_order}})
 
-        facet = {}
-        facet__paginated_results = []
-        if skip != None:
-            facet__paginated_results.append({"$skip": skip})
+        paginated_results = []
+        if skip != None and cursor == None:
+            paginated_results.append({"$skip": skip})
 
         if limit != None:
-            facet__paginated_results.append({"$limit": limit})
+            # one extra document tells whether there is a next page
+            paginated_results.append({"$limit": limit + 1})
 
-        facet["paginated_results"] = facet__paginated_results
+        if cursor != None:
+            # no $facet, documents are streamed from the index range
+            pipeline.extend(paginated_results)
+            return pipeline
 
+        facet = {"paginated_results": paginated_results}
         if do_count:
             facet["total"] = [{"$count": "count"}]
 
         pipeline.extend(
             [
                 {"$facet": facet},
-                {"$unwind": "$total"},
+                {
+                    "$unwind": {
+                        "path": "$total",
+                        "preserveNullAndEmptyArrays": True,
+                    }
+                },
                 {
                     "$project": {
                         "total": "$total.count",
@@ -109,25 +199,56 @@ class CategoryRepo:
                 },
             ]
         )
-        # logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
-
-        cursor = list(self.category_coll.aggregate(pipeline))
-
-        products = []
-        count = 0
-
-        try:
-            products = [
-                category_dto.GetListResItem(**product)
-                for product in cursor[0].get("paginated_results") or []
-            ]
-        except Exception as e:
-            logger.warning(f"cusor is empty: {e}")
-
-        try:
-            count = cursor[0].get("total") or 0
-        except Exception as e:
-            logger.warning(f"cursor is empty: {e}")
+        return pipeline
+
+    @queryShape(category_model.CategoryModel, pipeline=listPipeline("created_at", -1))
+    @queryShape(category_model.CategoryModel, pipeline=listPipeline("updated_at", -1))
+    @queryShape(category_model.CategoryModel, pipeline=listPipeline("name", -1))
+    @queryShape(
+        category_model.CategoryModel,
+        pipeline=listPipeline("updated_at", -1, after=helper.timeNow()),
+    )
+    def getList(
+        self,
+        query: Optional[str] = None,
+        query_by: Optional[
+            Literal["name"]
+        ] = None,  # sort by all possible fields if none
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: Literal["created_at", "updated_at", "name"] = "updated_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        cursor: Optional[str] = None,  # skip is ignored if set
+    ) -> tuple[list[category_dto.GetListResItem], int, Optional[str]]:
+        """
+        return (items, count, next_cursor).
+        raise ValueError if `cursor` is invalid.
+        """
+        match1 = self._listMatch(query=query, query_by=query_by)
+        pipeline = self._listPipeline(
+            match1=match1,
+            skip=skip,
+            limit=limit,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            do_count=do_count,
+            cursor=cursor,
+        )
+        if cursor != None:
+            results = list(self.category_coll.aggregate(pipeline))
+            count = self.category_coll.count_documents(match1) if do_count else 0
+        else:
+            # logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
+            facet_result = list(self.category_coll.aggregate(pipeline))
+            facet_result = facet_result[0] if facet_result else {}
+            results = facet_result.get("paginated_results") or []
+            count = facet_result.get("total") or 0
+
+        next_cursor = pagination.getNextCursor(
+            docs=results, limit=limit, sort_by=sort_by, sort_order=sort_order
+        )
+        items = [category_dto.GetListResItem.fromDoc(item) for item in results]
 
-        return products, count
+        return items, count, next_cursor
 
@@ -0,0 +1,38 @@
+from fastapi import Depends
+from config.mongodb import MongodbClient
+from domain.model import exchange_rate_model
+from utils import helper
+
+
+class ExchangeRateRepo:
+    def __init__(self, mongo_db: MongodbClient = Depends()):
+        self.exchange_rate_coll = mongo_db.db[
+            exchange_rate_model.ExchangeRateModel.getCollName()
+        ]
+
+    def getAll(self) -> list[exchange_rate_model.ExchangeRateModel]:
+        rates = self.exchange_rate_coll.find({}, {"_id": 0})
+        return [exchange_rate_model.ExchangeRateModel.fromDoc(rate) for rate in rates]
+
+    def upsert(
+        self, currency: str, rate: float
+    ) -> exchange_rate_model.ExchangeRateModel:
+        time_now = helper.timeNow()
+        exchange_rate = exchange_rate_model.ExchangeRateModel(
+            id=helper.generateUUID4(),
+            created_at=time_now,
+            updated_at=time_now,
+            currency=currency,
+            rate=rate,
+        )
+        self.exchange_rate_coll.update_one(
+            {"currency": exchange_rate.currency},
+            {
+                "$set": {"rate": exchange_rate.rate, "updated_at": time_now},
+                "$setOnInsert": exchange_rate.model_dump(
+                    include={"id", "created_at", "currency"}
+                ),
+            },
+            upsert=True,
+        )
+        return exchange_rate
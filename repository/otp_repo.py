@@ -4,6 +4,7 @@ from domain.model import otp_model
 from config.mongodb import MongodbClient
 from pymongo import ReturnDocument
 from typing import Union
+from utils.query_shape import queryShape
 
 
 class OtpRepo:
@@ -13,6 +14,7 @@ class OtpRepo:
     def create(self, data: otp_model.OtpModel):
         return self.user_coll.insert_one(data.model_dump())
 
+    @queryShape(otp_model.OtpModel, filter={"id": ""})
     def update(
         self, id: str, data: otp_model.OtpModel
     ) -> Union[otp_model.OtpModel, None]:
@@ -22,20 +24,29 @@ class OtpRepo:
             return_document=ReturnDocument.AFTER,
         )
 
-        return otp_model.OtpModel(**_return) if _return else None
+        return otp_model.OtpModel.fromDoc(_return) if _return else None
 
+    @queryShape(otp_model.OtpModel, filter={"id": ""})
     def delete(self, id: str) -> Union[otp_model.OtpModel, None]:
         _return = self.user_coll.find_one_and_delete({"id": id})
-        return otp_model.OtpModel(**_return) if _return else None
+        return otp_model.OtpModel.fromDoc(_return) if _return else None
 
+    @queryShape(
+        otp_model.OtpModel, filter={"created_by": ""}, sort=[("created_at", -1)]
+    )
     def getLatestByCreatedBy(self, created_by: str) -> Union[otp_model.OtpModel, None]:
         _return = list(
             self.user_coll.find({"created_by": created_by})
             .sort("created_at", -1)
             .limit(1)
         )
-        return otp_model.OtpModel(**_return[0]) if len(_return) > 0 else None
+        return otp_model.OtpModel.fromDoc(_return[0]) if len(_return) > 0 else None
 
+    @queryShape(
+        otp_model.OtpModel,
+        filter={"created_by": "", "verified": False},
+        sort=[("created_at", -1)],
+    )
     def getUnverifiedByCreatedBy(
         self, created_by: str
     ) -> Union[otp_model.OtpModel, None]:
@@ -44,12 +55,14 @@ class OtpRepo:
             .sort("created_at", -1)
             .limit(1)
         )
-        return otp_model.OtpModel(**_return[0]) if len(_return) > 0 else None
+        return otp_model.OtpModel.fromDoc(_return[0]) if len(_return) > 0 else None
 
+    @queryShape(otp_model.OtpModel, filter={"created_by": ""})
     def deleteManyByCreatedBy(self, created_by: str) -> int:
         _return = self.user_coll.delete_many({"created_by": created_by})
         return _return.deleted_count
 
+    @queryShape(otp_model.OtpModel, filter={"id": ""})
     def getById(self, id: str) -> Union[otp_model.OtpModel, None]:
         _return = self.user_coll.find_one({"id": id})
-        return otp_model.OtpModel(**_return) if _return else None
\ No newline at end of file
+        return otp_model.OtpModel.fromDoc(_return) if _return else None
\ No newline at end of file
@@ -0,0 +1,132 @@
+from typing import Awaitable, Callable, Generic, Iterable, Optional, TypeVar
+
+from fastapi import Depends
+
+from domain.model import product_model
+from domain.model.base_model import MyBaseModel
+from repository import product_repo
+
+M = TypeVar("M", bound=MyBaseModel)
+
+
+class _BatchLoader(Generic[M]):
+    """
+    collect ids, then resolve all the pending ones with one `$in` query on the first get.
+    resolved documents (and missing ids) are kept for the rest of the loader lifetime.
+    """
+
+    def __init__(self, fetch: Callable[[list[str]], list[M]]):
+        self._fetch = fetch
+        self._pending: set[str] = set()
+        self._loaded: dict[str, Optional[M]] = {}
+
+    def prime(self, ids: Iterable[Optional[str]]):
+        self._pending.update(
+            id for id in ids if id != None and id not in self._loaded
+        )
+
+    def get(self, id: Optional[str]) -> Optional[M]:
+        if id == None:
+            return None
+
+        if id not in self._loaded:
+            self._pending.add(id)
+            self._flush()
+
+        return self._loaded.get(id)
+
+    def getMany(self, ids: Iterable[Optional[str]]) -> dict[str, Optional[M]]:
+        ids = list(ids)
+        self.prime(ids)
+        self._flush()
+        return {id: self._loaded.get(id) for id in ids if id != None}
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        ids, self._pending = list(self._pending), set()
+        for id in ids:
+            self._loaded[id] = None
+        for item in self._fetch(ids):
+            self._loaded[item.id] = item
+
+
+class _AsyncBatchLoader(_BatchLoader[M]):
+    """
+    _BatchLoader of an async fetch, get() and getMany() are awaited
+    """
+
+    def __init__(self, fetch: Callable[[list[str]], Awaitable[list[M]]]):
+        super().__init__(fetch)
+
+    async def get(self, id: Optional[str]) -> Optional[M]:
+        if id == None:
+            return None
+
+        if id not in self._loaded:
+            self._pending.add(id)
+            await self._flush()
+
+        return self._loaded.get(id)
+
+    async def getMany(self, ids: Iterable[Optional[str]]) -> dict[str, Optional[M]]:
+        ids = list(ids)
+        self.prime(ids)
+        await self._flush()
+        return {id: self._loaded.get(id) for id in ids if id != None}
+
+    async def _flush(self):
+        if not self._pending:
+            return
+
+        ids, self._pending = list(self._pending), set()
+        items = await self._fetch(ids)
+        # ids are marked loaded after the fetch, a concurrent get() must not see
+        # them as missing while it runs
+        for id in ids:
+            self._loaded.setdefault(id, None)
+        for item in items:
+            self._loaded[item.id] = item
+
+
+class ProductLoader:
+    """
+    request scoped loader of products, product variants and product variant types.
+    fastapi caches a dependency per request, so services that share a request share
+    one loader. prime all ids first, then each get() is served from memory:
+    >>> product_loader.products.prime(item.product_id for item in cart_items)
+    >>> product = product_loader.products.get(cart_items[0].product_id)
+    """
+
+    def __init__(self, product_repo: product_repo.ProductRepo = Depends()):
+        self.product_repo = product_repo
+        self.products = _BatchLoader[product_model.ProductModel](
+            product_repo.getByIds
+        )
+        self.variants = _BatchLoader[product_model.ProductVariantModel](
+            product_repo.getProductVariantsByIds
+        )
+        self.variant_types = _BatchLoader[product_model.ProductVariantTypeModel](
+            product_repo.getManyVariantTypeByIds
+        )
+
+
+class AsyncProductLoader:
+    """
+    ProductLoader of AsyncProductRepo:
+    >>> product_loader.products.prime(item.product_id for item in cart_items)
+    >>> product = await product_loader.products.get(cart_items[0].product_id)
+    """
+
+    def __init__(self, product_repo: product_repo.AsyncProductRepo = Depends()):
+        self.product_repo = product_repo
+        self.products = _AsyncBatchLoader[product_model.ProductModel](
+            product_repo.getByIds
+        )
+        self.variants = _AsyncBatchLoader[product_model.ProductVariantModel](
+            product_repo.getProductVariantsByIds
+        )
+        self.variant_types = _AsyncBatchLoader[product_model.ProductVariantTypeModel](
+            product_repo.getManyVariantTypeByIds
+        )
@@ -1,14 +1,521 @@
+import re
+from dataclasses import dataclass
+
 from fastapi import Depends
-from config.mongodb import MongodbClient
-from domain.model import product_model
-from pymongo import ReturnDocument
-from typing import Union, Optional, Literal
+from config.mongodb import AsyncMongodbClient, MongodbClient
+from domain.model import category_model, product_model
+from pymongo import ReturnDocument, UpdateOne
+from datetime import datetime
+from typing import Iterator, Union, Optional, Literal, get_args
 from domain.dto import product_dto
 from core.logging import logger
-from utils import helper
+from domain.model.base_model import constructFromDoc
+from config.env import Env
+from utils import helper, pagination
+from utils.coll_version import CollVersion
+from utils.count_cache import CountCache
+from utils.exchange_rate import ExchangeRateTable
+from utils.facet_cache import FacetCache
+from utils.query_shape import listPipeline, queryShape
+
+
+# denormalized from product variants
+SUMMARY_FIELDS = {
+    "min_price",
+    "max_price",
+    "main_price",
+    "main_price_currency",
+    "total_stock",
+    "main_image",
+    "variant_skus",
+}
+
+# text score of a search, set on the documents when getList() sorts by relevance
+SEARCH_SCORE_FIELD = "score_"
+# queries up to this long are searched as a name prefix, not as words
+SEARCH_PREFIX_MAX_LENGTH = 2
+
+# what getList() can count beside a page, see _facetStages()
+ListFacet = Literal["category", "brand", "price", "in_stock"]
+LIST_FACETS: tuple[str, ...] = get_args(ListFacet)
+FACET_TOP_VALUES = 20  # categories and brands with the most products
+FACET_PRICE_BUCKETS = 5
+
+
+@dataclass
+class _ListPlan:
+    """
+    filter, sort and facets of a getList() call, see _ProductQueries._listPlan()
+    """
+
+    match1: dict
+    sort_by: str
+    sort_order: Literal[-1, 1]
+    facets: list[str]
+    facet_key: Optional[tuple[str, tuple[int, int], tuple[str, ...]]] = None
+    cached_facets: Optional[product_dto.ProductListFacets] = None
+    # match1 searching the query as a prefix, if match1 searches it as words
+    prefix_match1: Optional[dict] = None
+
+    def cachesFacets(self) -> bool:
+        # only the facets of the unfiltered list, the landing page
+        return bool(self.facets) and not self.match1
+
+    def lookupFacets(self, coll_name: str, version: tuple[int, int]):
+        # version: (products, categories) as the facets show category names
+        self.facet_key = FacetCache.key(
+            coll_name=coll_name, version=version, facets=self.facets
+        )
+        self.cached_facets = FacetCache.get(self.facet_key)
+
+    @property
+    def facets_to_count(self) -> list[str]:
+        return self.facets if self.cached_facets == None else []
+
+    def usePrefixMatch(self):
+        """
+        search the query as a prefix, when no word matches it
+        """
+        self.match1, self.prefix_match1 = self.prefix_match1, None
+
+
+class _ProductQueries:
+    """
+    pipelines shared by ProductRepo and AsyncProductRepo, no I/O here
+    """
+
+    def _detailPipeline(self, id: str) -> list[dict]:
+        return [
+            {"$match": {"id": id}},
+            {"$limit": 1},
+            {
+                "$lookup": {
+                    "from": self.product_variant_coll.name,
+                    "localField": "id",
+                    "foreignField": "product_id",
+                    "as": "variants_",
+                    "pipeline": [
+                        {"$sort": {"is_main": -1}},
+                        {
+                            "$lookup": {
+                                "from": self.product_variant_type_coll.name,
+                                "localField": "product_variant_type_id",
+                                "foreignField": "id",
+                                "as": "variant_type_",
+                                "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+                            }
+                        },
+                        {
+                            "$set": {
+                                "product_variant_type_name": {
+                                    "$ifNull": [{"$first": "$variant_type_.name"}, ""]
+                                }
+                            }
+                        },
+                        {"$project": {"_id": 0, "variant_type_": 0}},
+                    ],
+                }
+            },
+        ]
+
+    @staticmethod
+    def _variantsVersionPipeline(product_id: str) -> list[dict]:
+        """
+        latest updated_at and number of the variants of a product, covered by the
+        (product_id, updated_at) index
+        """
+        return [
+            {"$match": {"product_id": product_id}},
+            {
+                "$group": {
+                    "_id": None,
+                    "updated_at": {"$max": "$updated_at"},
+                    "count": {"$sum": 1},
+                }
+            },
+        ]
+
+    @staticmethod
+    def _detailVersion(
+        product: Optional[dict], variants: Optional[dict], variant_types_version: int
+    ) -> Optional[product_dto.GetProductDetailVersionResItem]:
+        if not product:
+            return None
+        variants = variants or {}
+        return product_dto.GetProductDetailVersionResItem(
+            updated_at=product["updated_at"],
+            variants_updated_at=variants.get("updated_at"),
+            variants=variants.get("count") or 0,
+            variant_types_version=variant_types_version,
+        )
+
+    def _listMatch(
+        self,
+        category_id: Optional[str] = None,
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name", "brand", "sku"]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        prefix: bool = False,
+    ) -> dict:
+        """
+        $match of the filters. a query is searched as words of the text index, or
+        with `prefix` (and when it is too short for words) as the start of the name,
+        or of `query_by`
+        """
+        match1 = {}
+
+        if category_id != None:
+            match1["category_id"] = category_id
+
+        # price filters apply to the main variant price, the one list items show
+        if min_price != None:
+            match1.setdefault("main_price", {})["$gte"] = min_price
+
+        if max_price != None:
+            match1.setdefault("main_price", {})["$lte"] = max_price
+
+        if in_stock != None:
+            match1["total_stock"] = {"$gt": 0} if in_stock else {"$lte": 0}
+
+        query = (query or "").strip()
+        if query and query_by == "sku":
+            # skus are case sensitive, an anchored prefix is an index range
+            match1["variant_skus"] = {"$regex": f"^{re.escape(query)}"}
+        elif query and (prefix or len(query) <= SEARCH_PREFIX_MAX_LENGTH):
+            # the text index only matches whole words, "iph" doesn't find "iPhone"
+            match1[query_by or "name"] = {
+                "$regex": f"^{re.escape(query)}",
+                "$options": "i",
+            }
+        elif query:
+            # words of name, brand, description, tags and skus (ProductModel text index)
+            match1["$text"] = {"$search": query}
+            if query_by != None:
+                # the text index covers every field, keep what matches in `query_by`
+                match1[query_by] = {"$regex": re.escape(query), "$options": "i"}
+
+        return match1
 
+    @staticmethod
+    def _listSort(
+        sort_by: str,
+        sort_order: Literal[-1, 1],
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name", "brand", "sku"]] = None,
+    ) -> tuple[str, Literal[-1, 1]]:
+        """
+        (sort field, sort order) of getList(). "relevance" is the text score of a
+        search, best first, and newest first when there is no text search.
+        """
+        if sort_by != "relevance":
+            return sort_by, sort_order
+
+        if (query or "").strip() and query_by != "sku":
+            return SEARCH_SCORE_FIELD, -1
+
+        return "created_at", -1
+
+    def _listPipeline(
+        self,
+        match1: dict,
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: str = "created_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        lookup_variants: bool = False,
+        cursor: Optional[str] = None,
+        facets: Optional[list[str]] = None,
+    ) -> list[dict]:
+        """
+        pipeline of getList(), `match1` is the _listMatch() of the filters.
+        with `cursor` the pipeline returns the documents and `facets` are ignored,
+        else one $facet document (see _unpackFacet).
+        raise ValueError if `cursor` is invalid.
+        """
+        pipeline = []
+        if match1:
+            pipeline.append({"$match": match1})
+
+        if sort_by == SEARCH_SCORE_FIELD and "$text" in match1:
+            pipeline.append({"$set": {SEARCH_SCORE_FIELD: {"$meta": "textScore"}}})
+        elif sort_by == SEARCH_SCORE_FIELD:
+            # prefix search, the shorter the name the closer it is to the query
+            score = {"$multiply": [-1, {"$strLenCP": {"$ifNull": ["$name", ""]}}]}
+            pipeline.append({"$set": {SEARCH_SCORE_FIELD: score}})
+
+        if cursor != None:
+            value, id = pagination.decodeCursor(
+                cursor=cursor, sort_by=sort_by, sort_order=sort_order
+            )
+            keyset = pagination.keysetMatch(
+                sort_by, sort_order, value, id, nullable=sort_by == "main_price"
+            )
+            pipeline.append({"$match": keyset})
+
+        # id as tiebreaker so the order is total and a cursor can resume from it
+        pipeline.append({"$sort": {sort_by: sort_order, "id": sort_order}})
+
+        paginated_results = []
+        if skip != None and cursor == None:
+            paginated_results.append({"$skip": skip})
 
-class ProductRepo:
+        if limit != None:
+            # one extra document tells whether there is a next page
+            paginated_results.append({"$limit": limit + 1})
+
+        if lookup_variants:
+            paginated_results.extend(
+                [
+                    {
+                        "$lookup": {
+                            "from": self.product_variant_coll.name,
+                            "localField": "id",
+                            "foreignField": "product_id",
+                            "as": "variants_",
+                            "pipeline": [
+                                {"$sort": {"is_main": -1}},
+                                {"$project": {"_id": 0}},
+                            ],
+                        }
+                    }
+                ]
+            )
+
+        if cursor != None:
+            # no $facet, documents are streamed from the index range
+            pipeline.extend(paginated_results)
+            return pipeline
+
+        facet = {"paginated_results": paginated_results}
+        if do_count:
+            facet["total"] = [{"$count": "count"}]
+        # counted in the same pass over the matching products as the page
+        facet.update(self._facetStages(facets or []))
+
+        pipeline.extend(
+            [
+                {"$facet": facet},
+                {
+                    "$unwind": {
+                        "path": "$total",
+                        "preserveNullAndEmptyArrays": True,
+                    }
+                },
+                {"$set": {"total": "$total.count"}},
+            ]
+        )
+        return pipeline
+
+    def _facetStages(self, facets: list[str]) -> dict[str, list[dict]]:
+        """
+        $facet sub-pipelines counting `facets` (of LIST_FACETS) of the products
+        """
+        stages = {}
+        if "category" in facets:
+            stages["category"] = [
+                {"$match": {"category_id": {"$nin": [None, ""]}}},
+                {"$sortByCount": "$category_id"},
+                {"$limit": FACET_TOP_VALUES},
+                {
+                    "$lookup": {
+                        "from": self.category_coll.name,
+                        "localField": "_id",
+                        "foreignField": "id",
+                        "as": "category_",
+                        "pipeline": [{"$project": {"_id": 0, "name": 1}}],
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "value": "$_id",
+                        "name": {"$ifNull": [{"$first": "$category_.name"}, ""]},
+                        "count": 1,
+                    }
+                },
+            ]
+
+        if "brand" in facets:
+            stages["brand"] = [
+                {"$match": {"brand": {"$nin": [None, ""]}}},
+                {"$sortByCount": "$brand"},
+                {"$limit": FACET_TOP_VALUES},
+                {"$project": {"_id": 0, "value": "$_id", "name": "$_id", "count": 1}},
+            ]
+
+        if "price" in facets:
+            # same price as the min_price/max_price filters
+            stages["price"] = [
+                {"$match": {"main_price": {"$ne": None}}},
+                {
+                    "$bucketAuto": {
+                        "groupBy": "$main_price",
+                        "buckets": FACET_PRICE_BUCKETS,
+                    }
+                },
+                {
+                    "$project": {
+                        "_id": 0,
+                        "min": "$_id.min",
+                        "max": "$_id.max",
+                        "count": 1,
+                    }
+                },
+            ]
+
+        if "in_stock" in facets:
+            # same split as the in_stock filter
+            is_in_stock = {"$gt": ["$total_stock", 0]}
+            stages["in_stock"] = [
+                {
+                    "$group": {
+                        "_id": None,
+                        "in_stock": {"$sum": {"$cond": [is_in_stock, 1, 0]}},
+                        "out_of_stock": {"$sum": {"$cond": [is_in_stock, 0, 1]}},
+                    }
+                },
+                {"$project": {"_id": 0}},
+            ]
+
+        return stages
+
+    def _facetPipeline(self, match1: dict, facets: list[str]) -> list[dict]:
+        """
+        facets alone, one $facet document (see _listFacets)
+        """
+        pipeline = [{"$match": match1}] if match1 else []
+        pipeline.append({"$facet": self._facetStages(facets)})
+        return pipeline
+
+    @staticmethod
+    def _unpackFacet(facet_result: list[dict]) -> tuple[list[dict], int, dict]:
+        """
+        (page, total, whole $facet document)
+        """
+        facet_result = facet_result[0] if facet_result else {}
+        return (
+            facet_result.get("paginated_results") or [],
+            facet_result.get("total") or 0,
+            facet_result,
+        )
+
+    @staticmethod
+    def _listFacets(
+        facet_result: dict, facets: list[str]
+    ) -> product_dto.ProductListFacets:
+        list_facets = product_dto.ProductListFacets()
+        for facet in facets:
+            values = facet_result.get(facet) or []
+            if facet == "in_stock":
+                list_facets.in_stock = product_dto.ProductListStockCount(
+                    **(values[0] if values else {})
+                )
+            elif facet == "price":
+                list_facets.price = [
+                    product_dto.ProductListPriceBucket(**value) for value in values
+                ]
+            else:
+                setattr(
+                    list_facets,
+                    facet,
+                    [product_dto.ProductListFacetValue(**value) for value in values],
+                )
+        return list_facets
+
+    @staticmethod
+    def _listPage(
+        results: list[dict],
+        count: int,
+        limit: Optional[int],
+        sort_by: str,
+        sort_order: Literal[-1, 1],
+    ) -> tuple[list[product_dto.GetProductListResItem], int, Optional[str]]:
+        next_cursor = pagination.getNextCursor(
+            docs=results, limit=limit, sort_by=sort_by, sort_order=sort_order
+        )
+        products = [
+            product_dto.GetProductListResItem.fromDoc(product) for product in results
+        ]
+
+        return products, count, next_cursor
+
+    def _listPlan(
+        self,
+        category_id: Optional[str],
+        query: Optional[str],
+        query_by: Optional[Literal["name", "brand", "sku"]],
+        min_price: Optional[float],
+        max_price: Optional[float],
+        in_stock: Optional[bool],
+        sort_by: str,
+        sort_order: Literal[-1, 1],
+        facets: Optional[list[str]],
+    ) -> _ListPlan:
+        sort_by, sort_order = self._listSort(
+            sort_by=sort_by, sort_order=sort_order, query=query, query_by=query_by
+        )
+        filter = dict(
+            category_id=category_id,
+            query=query,
+            query_by=query_by,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+        )
+        match1 = self._listMatch(**filter)
+        return _ListPlan(
+            match1=match1,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            facets=sorted(set(facets or [])),
+            prefix_match1=(
+                self._listMatch(**filter, prefix=True) if "$text" in match1 else None
+            ),
+        )
+
+    def _listResult(
+        self,
+        plan: _ListPlan,
+        results: list[dict],
+        count: int,
+        facet_result: dict,
+        limit: Optional[int],
+    ) -> tuple[
+        list[product_dto.GetProductListResItem],
+        int,
+        Optional[str],
+        Optional[product_dto.ProductListFacets],
+    ]:
+        """
+        return of getList(), caches the facets counted for `plan`
+        """
+        list_facets = plan.cached_facets
+        if plan.facets_to_count:
+            list_facets = self._listFacets(facet_result, plan.facets_to_count)
+            if plan.facet_key != None:
+                FacetCache.set(plan.facet_key, list_facets)
+
+        return (
+            *self._listPage(
+                results=results,
+                count=count,
+                limit=limit,
+                sort_by=plan.sort_by,
+                sort_order=plan.sort_order,
+            ),
+            list_facets,
+        )
+
+    def _countKey(self, match1: dict, version: int) -> tuple[str, int, str]:
+        return CountCache.key(
+            coll_name=self.product_coll.name, version=version, filter=match1
+        )
+
+
+class ProductRepo(_ProductQueries):
     def __init__(self, mongo_db: MongodbClient = Depends()):
         self.product_coll = mongo_db.db[product_model.ProductModel.getCollName()]
         self.product_variant_coll = mongo_db.db[
@@ -17,18 +524,62 @@ class ProductRepo:
         self.product_variant_type_coll = mongo_db.db[
             product_model.ProductVariantTypeModel.getCollName()
         ]
+        # facets $lookup category names
+        self.category_coll = mongo_db.db[category_model.CategoryModel.getCollName()]
 
     ############# PRODUCT ################
 
     def create(self, product: product_model.ProductModel) -> product_model.ProductModel:
         self.product_coll.insert_one(product.model_dump())
+        CollVersion.bump(self.product_coll)
 
+    @queryShape(product_model.ProductModel, filter={"id": ""})
     def getById(self, id: str) -> Union[product_model.ProductModel, None]:
         product = self.product_coll.find_one({"id": id})
         if not product:
             return None
-        return product_model.ProductModel(**product) if product else None
+        return product_model.ProductModel.fromDoc(product) if product else None
+
+    @queryShape(
+        product_model.ProductModel, pipeline=lambda repo: repo._detailPipeline(id="")
+    )
+    def getDetail(self, id: str) -> Optional[product_dto.GetProductDetailResItem]:
+        """
+        product with its variants and their variant type names, in one aggregation
+        """
+        pipeline = self._detailPipeline(id=id)
+        product = next(self.product_coll.aggregate(pipeline), None)
+        return product_dto.GetProductDetailResItem.fromDoc(product) if product else None
+
+    @queryShape(product_model.ProductModel, filter={"id": ""})
+    @queryShape(
+        product_model.ProductVariantModel,
+        pipeline=lambda repo: repo._variantsVersionPipeline(""),
+    )
+    def getDetailVersion(
+        self, id: str
+    ) -> Optional[product_dto.GetProductDetailVersionResItem]:
+        """
+        what getDetail() would change with, from indexes only. None if not found.
+        """
+        product = self.product_coll.find_one({"id": id}, {"_id": 0, "updated_at": 1})
+        if not product:
+            return None
+        variants = next(
+            self.product_variant_coll.aggregate(self._variantsVersionPipeline(id)), None
+        )
+        return self._detailVersion(
+            product=product,
+            variants=variants,
+            variant_types_version=CollVersion.get(self.product_variant_type_coll),
+        )
 
+    @queryShape(product_model.ProductModel, filter={"id": {"$in": [""]}})
+    def getByIds(self, ids: list[str]) -> list[product_model.ProductModel]:
+        products = self.product_coll.find({"id": {"$in": ids}})
+        return [product_model.ProductModel.fromDoc(product) for product in products]
+
+    @queryShape(product_model.ProductModel, filter={"name": ""})
     def getByName(self, name: str) -> Union[product_model.ProductModel, None]:
         filter = {}
         if name != None:
@@ -37,14 +588,17 @@ class ProductRepo:
         if not product:
             return None
 
-        return product_model.ProductModel(**product)
+        return product_model.ProductModel.fromDoc(product)
 
+    @queryShape(product_model.ProductModel, filter={"id": ""})
     def delete(self, id: str) -> Union[product_model.ProductModel, None]:
         product = self.product_coll.find_one_and_delete({"id": id})
         if not product:
             return None
-        return product_model.ProductModel(**product)
+        CollVersion.bump(self.product_coll)
+        return product_model.ProductModel.fromDoc(product)
 
+    @queryShape(product_model.ProductModel, filter={"id": ""})
     def update(
         self, id: str, product: product_model.ProductModel
     ) -> Union[product_model.ProductModel, None]:
@@ -53,120 +607,351 @@ class ProductRepo:
             {"$set": product.model_dump(exclude=["id"])},
             return_document=ReturnDocument.AFTER,
         )
-        return product_model.ProductModel(**product) if product else None
+        if not product:
+            return None
+        CollVersion.bump(self.product_coll)
+        return product_model.ProductModel.fromDoc(product)
+
+    @queryShape(product_model.ProductModel, filter={"category_id": ""})
+    def countList(
+        self,
+        category_id: Optional[str] = None,
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name", "brand", "sku"]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        exact: bool = False,
+    ) -> tuple[int, bool]:
+        """
+        total of getList() with the same filter, return (count, is_exact).
+        without `exact`, the unfiltered total is estimated from collection metadata
+        and filtered totals are cached until the next product write.
+        """
+        filter = dict(
+            category_id=category_id,
+            query=query,
+            query_by=query_by,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+        )
+        match1 = self._listMatch(**filter)
+        count, is_exact = self._countMatch(match1, exact=exact)
+        if count == 0 and "$text" in match1:
+            # no word matches the query, count it as a prefix like getList()
+            match1 = self._listMatch(**filter, prefix=True)
+            count, is_exact = self._countMatch(match1, exact=exact)
+
+        return count, is_exact
 
+    def _countMatch(self, match1: dict, exact: bool) -> tuple[int, bool]:
+        if exact:
+            return self.product_coll.count_documents(match1), True
+
+        if not match1:
+            return self.product_coll.estimated_document_count(), False
+
+        key = self._countKey(match1, CollVersion.get(self.product_coll))
+        count = CountCache.get(key)
+        if count == None:
+            count = self.product_coll.count_documents(match1)
+            CountCache.set(key, count)
+
+        return count, True
+
+    @queryShape(product_model.ProductModel, pipeline=listPipeline("created_at", -1))
+    @queryShape(product_model.ProductModel, pipeline=listPipeline("updated_at", -1))
+    @queryShape(product_model.ProductModel, pipeline=listPipeline("name", 1))
+    @queryShape(product_model.ProductModel, pipeline=listPipeline("main_price", 1))
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline("main_price", 1, min_price=0, max_price=0),
+    )
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline(
+            "main_price", 1, category_id="", min_price=0, max_price=0
+        ),
+    )
+    @queryShape(
+        product_model.ProductModel, pipeline=listPipeline("name", 1, category_id="")
+    )
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline("created_at", -1, category_id=""),
+    )
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline("updated_at", -1, category_id=""),
+    )
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline("created_at", -1, after=helper.timeNow()),
+    )
+    @queryShape(
+        product_model.ProductModel,
+        pipeline=listPipeline(
+            "created_at", -1, after=helper.timeNow(), category_id=""
+        ),
+    )
     def getList(
         self,
         category_id: Optional[str] = None,
         query: Optional[str] = None,
         query_by: Optional[
             Literal["name", "brand", "sku"]
-        ] = None,  # sort by all possible fields if none
+        ] = None,  # text search over all searchable fields if none
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
         skip: Optional[int] = None,
         limit: Optional[int] = 10,
         sort_by: Literal[
-            Literal["created_at", "updated_at", "title", "price"]
+            "created_at", "updated_at", "name", "main_price", "relevance"
         ] = "created_at",
         sort_order: Literal[-1, 1] = -1,
         do_count: bool = False,
-        lookup_variants: bool = True,  # sorted by is_main:1
-    ) -> tuple[list[product_dto.GetProductListResItem], int]:
-        pipeline = []
-        match1 = {}
-        match1_or = []
-
-        if category_id != None:
-            match1["category_id"] = category_id
-
-        if query != None:
-            if query_by == None:
-                match1_or.extend(
-                    [
-                        {item: {"$regex": query, "$options": "i"}}
-                        for item in ["created_at", "updated_at", "title", "price"]
-                    ]
-                )
-            else:
-                match1[query_by] = {"$regex": query, "$options": "i"}
-
-        if match1_or:
-            match1["$or"] = match1_or
+        lookup_variants: bool = False,  # sorted by is_main:1
+        cursor: Optional[str] = None,  # skip is ignored if set
+        facets: Optional[list[ListFacet]] = None,
+    ) -> tuple[
+        list[product_dto.GetProductListResItem],
+        int,
+        Optional[str],
+        Optional[product_dto.ProductListFacets],
+    ]:
+        """
+        return (products, count, next_cursor, facets).
+        `facets` are counted over every product matching the filter, in the same
+        aggregation as the page (a second one with `cursor`). those of the unfiltered
+        list are cached until the next product write.
+        raise ValueError if `cursor` is invalid.
+        """
+        plan = self._listPlan(
+            category_id=category_id,
+            query=query,
+            query_by=query_by,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            facets=facets,
+        )
+        if plan.cachesFacets():
+            plan.lookupFacets(
+                self.product_coll.full_name,
+                (
+                    CollVersion.get(self.product_coll),
+                    CollVersion.get(self.category_coll),
+                ),
+            )
 
-        if match1:
-            pipeline.append({"$match": match1})
+        run = dict(
+            skip=skip,
+            limit=limit,
+            do_count=do_count,
+            lookup_variants=lookup_variants,
+            cursor=cursor,
+        )
+        results, count, facet_result = self._runList(plan, **run)
+        if (
+            not results
+            and plan.prefix_match1 != None
+            and self.product_coll.find_one(plan.match1, {"_id": 1}) == None
+        ):
+            # no word matches the query, search it as a prefix
+            plan.usePrefixMatch()
+            results, count, facet_result = self._runList(plan, **run)
 
-        pipeline.append({"$sort": {sort_by: sort_order}})
+        return self._listResult(
+            plan, results=results, count=count, facet_result=facet_result, limit=limit
+        )
 
-        facet = {}
-        facet__paginated_results = []
-        if skip != None:
-            facet__paginated_results.append({"$skip": skip})
+    def _runList(
+        self,
+        plan: _ListPlan,
+        skip: Optional[int],
+        limit: Optional[int],
+        do_count: bool,
+        lookup_variants: bool,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], int, dict]:
+        """
+        return (results, count, facet result) of `plan`
+        """
+        pipeline = self._listPipeline(
+            match1=plan.match1,
+            skip=skip,
+            limit=limit,
+            sort_by=plan.sort_by,
+            sort_order=plan.sort_order,
+            do_count=do_count,
+            lookup_variants=lookup_variants,
+            cursor=cursor,
+            facets=plan.facets_to_count,
+        )
+        logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
+        if cursor == None:
+            return self._unpackFacet(list(self.product_coll.aggregate(pipeline)))
 
-        if limit != None:
-            facet__paginated_results.append({"$limit": limit})
+        results = list(self.product_coll.aggregate(pipeline))
+        count = self.product_coll.count_documents(plan.match1) if do_count else 0
+        facet_result = {}
+        if plan.facets_to_count:
+            facet_pipeline = self._facetPipeline(plan.match1, plan.facets_to_count)
+            facet_result = next(self.product_coll.aggregate(facet_pipeline), {})
+        return results, count, facet_result
 
-        if lookup_variants:
-            facet__paginated_results.extend(
-                [
-                    {
-                        "$lookup": {
-                            "from": self.product_variant_coll.name,
-                            "localField": "id",
-                            "foreignField": "product_id",
-                            "as": "variants_",
-                            "pipeline": [
-                                {"$sort": {"is_main": -1}},
-                                {"$project": {"_id": 0}},
-                            ],
-                        }
-                    }
-                ]
-            )
+    @queryShape(
+        product_model.ProductModel, filter={"updated_at": {"$gte": helper.timeNow()}}
+    )
+    def getSuggestSources(
+        self, updated_since: Optional[datetime] = None
+    ) -> Iterator[product_dto.ProductSuggestSource]:
+        """
+        names of every product, or of the ones updated since `updated_since`.
+        streamed, the whole catalog is read on SuggestIndex rebuilds.
+        """
+        filter = {}
+        if updated_since != None:
+            filter["updated_at"] = {"$gte": updated_since}
 
-        facet["paginated_results"] = facet__paginated_results
+        projection = {"_id": 0, "id": 1, "name": 1, "brand": 1, "category_id": 1}
+        for product in self.product_coll.find(filter, projection):
+            yield constructFromDoc(product_dto.ProductSuggestSource, product)
 
-        if do_count:
-            facet["total"] = [{"$count": "count"}]
+    @queryShape(
+        product_model.ProductVariantModel,
+        filter={"product_id": {"$in": [""]}},
+        sort=[("product_id", 1), ("is_main", -1)],
+    )
+    def refreshSummaries(
+        self, product_ids: Optional[list[str]] = None, batch_size: int = 1000
+    ) -> int:
+        """
+        recompute the variant summary fields of products from their variants,
+        every product if `product_ids` is None. return number of updated products.
+        must be called after every variant write.
+        prices are summarized in the base currency with the current exchange rates,
+        see _summaryPrices(). a full run restates them after the rates changed.
+        """
+        pipeline = []
+        if product_ids != None:
+            pipeline.append({"$match": {"product_id": {"$in": product_ids}}})
 
         pipeline.extend(
             [
-                {"$facet": facet},
-                {"$unwind": "$total"},
+                {"$sort": {"product_id": 1, "is_main": -1}},
                 {
-                    "$project": {
-                        "total": "$total.count",
-                        "paginated_results": "$paginated_results",
+                    "$group": {
+                        "_id": "$product_id",
+                        # main variant first
+                        "prices_": {
+                            "$push": {
+                                "price": "$price",
+                                "currency": "$price_currency",
+                            }
+                        },
+                        "total_stock": {"$sum": "$stock"},
+                        "main_image": {"$first": "$image"},
+                        "variant_skus": {"$addToSet": "$sku"},
                     }
                 },
             ]
         )
-        logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
-
-        cursor = list(self.product_coll.aggregate(pipeline))
 
-        products = []
-        count = 0
+        updated = 0
+        seen_ids = set()
+        requests = []
+        for summary in self.product_variant_coll.aggregate(pipeline):
+            product_id = summary.pop("_id")
+            seen_ids.add(product_id)
+            summary.update(self._summaryPrices(summary.pop("prices_")))
+            requests.append(UpdateOne({"id": product_id}, {"$set": summary}))
+            if len(requests) >= batch_size:
+                updated += self.product_coll.bulk_write(
+                    requests, ordered=False
+                ).modified_count
+                requests = []
 
-        try:
-            products = [
-                product_dto.GetProductListResItem(**product)
-                for product in cursor[0].get("paginated_results") or []
+        # products without variant, after a full run also the ones whose last
+        # variant was deleted
+        if product_ids == None:
+            product_ids = [
+                product["id"]
+                for product in self.product_coll.find({}, {"_id": 0, "id": 1})
             ]
-        except Exception as e:
-            logger.warning(f"cusor is empty: {e}")
+        empty_summary = product_model.ProductModel.model_construct().model_dump(
+            include=SUMMARY_FIELDS
+        )
+        for product_id in set(product_ids) - seen_ids:
+            requests.append(UpdateOne({"id": product_id}, {"$set": empty_summary}))
+            if len(requests) >= batch_size:
+                updated += self.product_coll.bulk_write(
+                    requests, ordered=False
+                ).modified_count
+                requests = []
+
+        if requests:
+            updated += self.product_coll.bulk_write(
+                requests, ordered=False
+            ).modified_count
+
+        if updated:
+            CollVersion.bump(self.product_coll)
 
-        try:
-            count = cursor[0].get("total") or 0
-        except Exception as e:
-            logger.warning(f"cursor is empty: {e}")
+        return updated
 
-        return products, count
+    @staticmethod
+    def _summaryPrices(prices: list[dict]) -> dict:
+        """
+        min, max and main price of the variants (`prices`, main variant first) in one
+        currency, so they compare across variants and products: the base currency,
+        or the main variant one if it has no rate. variants that can't be converted
+        to it are left out of min and max.
+        """
+        base_currency = Env.EXCHANGE_RATE_BASE_CURRENCY
+        currency = prices[0]["currency"]
+        if ExchangeRateTable.hasRate(currency):
+            currency = base_currency
+        else:
+            logger.warning(f"no exchange rate for {currency}, summary kept in it")
+
+        converted = [
+            ExchangeRateTable.convertExact(item["price"], item["currency"], currency)
+            for item in prices
+            if item["currency"] == currency
+            or (
+                currency == base_currency
+                and ExchangeRateTable.hasRate(item["currency"])
+            )
+        ]
+        return {
+            "min_price": min(converted),
+            "max_price": max(converted),
+            "main_price": converted[0],
+            "main_price_currency": currency,
+        }
 
     ############### PRODUCT VARIANT ###############
 
     def createVariant(self, product_variant: product_model.ProductVariantModel):
         self.product_variant_coll.insert_one(product_variant.model_dump())
+        CollVersion.bump(self.product_variant_coll)
+        self.refreshSummaries(product_ids=[product_variant.product_id])
 
+    @queryShape(
+        product_model.ProductVariantModel,
+        filter={"product_id": ""},
+        sort=[("is_main", -1)],
+    )
+    @queryShape(
+        product_model.ProductVariantModel,
+        filter={"product_variant_type_id": ""},
+        sort=[("is_main", -1)],
+    )
     def getProductVariants(
         self,
         product_id: Optional[str] = None,
@@ -187,14 +972,27 @@ class ProductRepo:
         variants = self.product_variant_coll.find(filter).sort(
             "is_main", -1
         )
-        return [product_model.ProductVariantModel(**variant) for variant in variants]
+        return [
+            product_model.ProductVariantModel.fromDoc(variant) for variant in variants
+        ]
 
+    @queryShape(product_model.ProductVariantModel, filter={"id": ""})
     def getProductVariant(self, id: str) -> Union[product_model.ProductVariantModel, None]:
         product_variant = self.product_variant_coll.find_one({"id": id})
         if not product_variant:
             return None
-        return product_model.ProductVariantModel(**product_variant)
+        return product_model.ProductVariantModel.fromDoc(product_variant)
 
+    @queryShape(product_model.ProductVariantModel, filter={"id": {"$in": [""]}})
+    def getProductVariantsByIds(
+        self, ids: list[str]
+    ) -> list[product_model.ProductVariantModel]:
+        variants = self.product_variant_coll.find({"id": {"$in": ids}})
+        return [
+            product_model.ProductVariantModel.fromDoc(variant) for variant in variants
+        ]
+
+    @queryShape(product_model.ProductVariantModel, filter={"sku": "", "product_id": ""})
     def getProductVariantBySku(
         self, product_id: str, sku: str
     ) -> Union[product_model.ProductVariantModel, None]:
@@ -203,7 +1001,7 @@ class ProductRepo:
         )
         if not variant:
             return None
-        return product_model.ProductVariantModel(**variant)
+        return product_model.ProductVariantModel.fromDoc(variant)
 
     ################## PRODUCT VARIANT TYPE #################
 
@@ -211,7 +1009,9 @@ class ProductRepo:
         self, product_variant_type: product_model.ProductVariantTypeModel
     ):
         self.product_variant_type_coll.insert_one(product_variant_type.model_dump())
+        CollVersion.bump(self.product_variant_type_coll)
 
+    @queryShape(product_model.ProductVariantTypeModel, filter={"id": ""})
     def updateVariantType(
         self, id: str, product_variant_type: product_model.ProductVariantTypeModel
     ) -> Optional[product_model.ProductVariantModel]:
@@ -220,24 +1020,290 @@ class ProductRepo:
             {"$set": product_variant_type.model_dump(exclude=["id"])},
             return_document=ReturnDocument.AFTER,
         )
-        return product_model.ProductVariantTypeModel(**res) if res else None
+        if not res:
+            return None
+        CollVersion.bump(self.product_variant_type_coll)
+        return product_model.ProductVariantTypeModel.fromDoc(res)
 
+    @queryShape(product_model.ProductVariantTypeModel, filter={"id": ""})
     def deleteVariantType(
         self, id: str
     ) -> Optional[product_model.ProductVariantTypeModel]:
         res = self.product_variant_type_coll.find_one_and_delete(
             {"id": id}, return_document=ReturnDocument.AFTER
         )
-        return product_model.ProductVariantTypeModel(**res) if res else None
+        if not res:
+            return None
+        CollVersion.bump(self.product_variant_type_coll)
+        return product_model.ProductVariantTypeModel.fromDoc(res)
 
+    @queryShape(product_model.ProductVariantTypeModel, filter={"id": ""})
     def getOneVariantType(
         self, id: str
     ) -> Optional[product_model.ProductVariantTypeModel]:
         res = self.product_variant_type_coll.find_one({"id": id})
-        return product_model.ProductVariantTypeModel(**res) if res else None
+        return product_model.ProductVariantTypeModel.fromDoc(res) if res else None
+
+    @queryShape(product_model.ProductVariantTypeModel, filter={"id": {"$in": [""]}})
+    def getManyVariantTypeByIds(
+        self, ids: list[str]
+    ) -> list[product_model.ProductVariantTypeModel]:
+        res = self.product_variant_type_coll.find({"id": {"$in": ids}})
+        return [product_model.ProductVariantTypeModel.fromDoc(item) for item in res]
 
+    @queryShape(product_model.ProductVariantTypeModel, filter={"product_id": ""})
     def getManyVariantType(
         self, product_id: str
     ) -> list[product_model.ProductVariantTypeModel]:
         res = self.product_variant_type_coll.find({"product_id": product_id})
-        return [product_model.ProductVariantTypeModel(**item) for item in res]
+        return [product_model.ProductVariantTypeModel.fromDoc(item) for item in res]
+
+
+class AsyncProductRepo(_ProductQueries):
+    """
+    reads of ProductRepo for `async def` handlers, same queries (and query shapes).
+    writes still go through ProductRepo.
+    """
+
+    def __init__(self, mongo_db: AsyncMongodbClient = Depends()):
+        self.product_coll = mongo_db.db[product_model.ProductModel.getCollName()]
+        self.product_variant_coll = mongo_db.db[
+            product_model.ProductVariantModel.getCollName()
+        ]
+        self.product_variant_type_coll = mongo_db.db[
+            product_model.ProductVariantTypeModel.getCollName()
+        ]
+        # facets $lookup category names
+        self.category_coll = mongo_db.db[category_model.CategoryModel.getCollName()]
+
+    ############# PRODUCT ################
+
+    async def catalogVersion(self) -> tuple[int, int, int]:
+        """
+        (products, variants, categories) collection versions, changed by every catalog
+        write. categories as the list facets show their names.
+        """
+        return (
+            await CollVersion.getAsync(self.product_coll),
+            await CollVersion.getAsync(self.product_variant_coll),
+            await CollVersion.getAsync(self.category_coll),
+        )
+
+    async def getById(self, id: str) -> Optional[product_model.ProductModel]:
+        product = await self.product_coll.find_one({"id": id})
+        return product_model.ProductModel.fromDoc(product) if product else None
+
+    async def getDetail(self, id: str) -> Optional[product_dto.GetProductDetailResItem]:
+        cursor = await self.product_coll.aggregate(self._detailPipeline(id=id))
+        products = await cursor.to_list(length=1)
+        if not products:
+            return None
+        return product_dto.GetProductDetailResItem.fromDoc(products[0])
+
+    async def getDetailVersion(
+        self, id: str
+    ) -> Optional[product_dto.GetProductDetailVersionResItem]:
+        """
+        see ProductRepo.getDetailVersion
+        """
+        product = await self.product_coll.find_one(
+            {"id": id}, {"_id": 0, "updated_at": 1}
+        )
+        if not product:
+            return None
+        cursor = await self.product_variant_coll.aggregate(
+            self._variantsVersionPipeline(id)
+        )
+        variants = await cursor.to_list(length=1)
+        return self._detailVersion(
+            product=product,
+            variants=variants[0] if variants else None,
+            variant_types_version=await CollVersion.getAsync(
+                self.product_variant_type_coll
+            ),
+        )
+
+    async def getByIds(self, ids: list[str]) -> list[product_model.ProductModel]:
+        products = self.product_coll.find({"id": {"$in": ids}})
+        return [
+            product_model.ProductModel.fromDoc(product) async for product in products
+        ]
+
+    async def countList(
+        self,
+        category_id: Optional[str] = None,
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name", "brand", "sku"]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        exact: bool = False,
+    ) -> tuple[int, bool]:
+        """
+        see ProductRepo.countList, shares its count cache
+        """
+        filter = dict(
+            category_id=category_id,
+            query=query,
+            query_by=query_by,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+        )
+        match1 = self._listMatch(**filter)
+        count, is_exact = await self._countMatch(match1, exact=exact)
+        if count == 0 and "$text" in match1:
+            match1 = self._listMatch(**filter, prefix=True)
+            count, is_exact = await self._countMatch(match1, exact=exact)
+
+        return count, is_exact
+
+    async def _countMatch(self, match1: dict, exact: bool) -> tuple[int, bool]:
+        if exact:
+            return await self.product_coll.count_documents(match1), True
+
+        if not match1:
+            return await self.product_coll.estimated_document_count(), False
+
+        key = self._countKey(match1, await CollVersion.getAsync(self.product_coll))
+        count = CountCache.get(key)
+        if count == None:
+            count = await self.product_coll.count_documents(match1)
+            CountCache.set(key, count)
+
+        return count, True
+
+    async def getList(
+        self,
+        category_id: Optional[str] = None,
+        query: Optional[str] = None,
+        query_by: Optional[Literal["name", "brand", "sku"]] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = 10,
+        sort_by: Literal[
+            "created_at", "updated_at", "name", "main_price", "relevance"
+        ] = "created_at",
+        sort_order: Literal[-1, 1] = -1,
+        do_count: bool = False,
+        lookup_variants: bool = False,
+        cursor: Optional[str] = None,
+        facets: Optional[list[ListFacet]] = None,
+    ) -> tuple[
+        list[product_dto.GetProductListResItem],
+        int,
+        Optional[str],
+        Optional[product_dto.ProductListFacets],
+    ]:
+        """
+        see ProductRepo.getList, shares its facet cache
+        """
+        plan = self._listPlan(
+            category_id=category_id,
+            query=query,
+            query_by=query_by,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            facets=facets,
+        )
+        if plan.cachesFacets():
+            plan.lookupFacets(
+                self.product_coll.full_name,
+                (
+                    await CollVersion.getAsync(self.product_coll),
+                    await CollVersion.getAsync(self.category_coll),
+                ),
+            )
+
+        run = dict(
+            skip=skip,
+            limit=limit,
+            do_count=do_count,
+            lookup_variants=lookup_variants,
+            cursor=cursor,
+        )
+        results, count, facet_result = await self._runList(plan, **run)
+        if (
+            not results
+            and plan.prefix_match1 != None
+            and await self.product_coll.find_one(plan.match1, {"_id": 1}) == None
+        ):
+            # no word matches the query, search it as a prefix
+            plan.usePrefixMatch()
+            results, count, facet_result = await self._runList(plan, **run)
+
+        return self._listResult(
+            plan, results=results, count=count, facet_result=facet_result, limit=limit
+        )
+
+    async def _runList(
+        self,
+        plan: _ListPlan,
+        skip: Optional[int],
+        limit: Optional[int],
+        do_count: bool,
+        lookup_variants: bool,
+        cursor: Optional[str],
+    ) -> tuple[list[dict], int, dict]:
+        """
+        see ProductRepo._runList
+        """
+        pipeline = self._listPipeline(
+            match1=plan.match1,
+            skip=skip,
+            limit=limit,
+            sort_by=plan.sort_by,
+            sort_order=plan.sort_order,
+            do_count=do_count,
+            lookup_variants=lookup_variants,
+            cursor=cursor,
+            facets=plan.facets_to_count,
+        )
+        logger.debug(f"pipeline: {helper.prettyJson(pipeline)}")
+        results = await (await self.product_coll.aggregate(pipeline)).to_list()
+        if cursor == None:
+            return self._unpackFacet(results)
+
+        count = await self.product_coll.count_documents(plan.match1) if do_count else 0
+        facet_result = {}
+        if plan.facets_to_count:
+            facet_pipeline = self._facetPipeline(plan.match1, plan.facets_to_count)
+            facet_results = await (
+                await self.product_coll.aggregate(facet_pipeline)
+            ).to_list()
+            facet_result = facet_results[0] if facet_results else {}
+        return results, count, facet_result
+
+    ############### PRODUCT VARIANT ###############
+
+    async def getProductVariant(
+        self, id: str
+    ) -> Optional[product_model.ProductVariantModel]:
+        product_variant = await self.product_variant_coll.find_one({"id": id})
+        if not product_variant:
+            return None
+        return product_model.ProductVariantModel.fromDoc(product_variant)
+
+    async def getProductVariantsByIds(
+        self, ids: list[str]
+    ) -> list[product_model.ProductVariantModel]:
+        variants = self.product_variant_coll.find({"id": {"$in": ids}})
+        return [
+            product_model.ProductVariantModel.fromDoc(variant)
+            async for variant in variants
+        ]
+
+    ################## PRODUCT VARIANT TYPE #################
+
+    async def getManyVariantTypeByIds(
+        self, ids: list[str]
+    ) -> list[product_model.ProductVariantTypeModel]:
+        res = self.product_variant_type_coll.find({"id": {"$in": ids}})
+        return [
+            product_model.ProductVariantTypeModel.fromDoc(item) async for item in res
+        ]
@@ -2,7 +2,9 @@ from fastapi import Depends
 from config.mongodb import MongodbClient
 from domain.model import refresh_token_model
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from typing import Union
+from utils.query_shape import queryShape
 
 
 class RefreshTokenRepo:
@@ -12,6 +14,7 @@ class RefreshTokenRepo:
     def create(self, data: refresh_token_model.RefreshTokenModel):
         return self.user_coll.insert_one(data.model_dump())
 
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"id": ""})
     def update(
         self, id: str, data: refresh_token_model.RefreshTokenModel
     ) -> Union[refresh_token_model.RefreshTokenModel, None]:
@@ -21,22 +24,42 @@ class RefreshTokenRepo:
             return_document=ReturnDocument.AFTER,
         )
 
-        return refresh_token_model.RefreshTokenModel(**_return) if _return else None
+        return refresh_token_model.RefreshTokenModel.fromDoc(_return) if _return else None
 
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"id": ""})
     def delete(self, id: str) -> Union[refresh_token_model.RefreshTokenModel, None]:
         _return = self.user_coll.find_one_and_delete({"id": id})
-        return refresh_token_model.RefreshTokenModel(**_return) if _return else None
+        return refresh_token_model.RefreshTokenModel.fromDoc(_return) if _return else None
 
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"created_by": ""})
+    def rotate(self, data: refresh_token_model.RefreshTokenModel):
+        """
+        replace user's current refresh token (keyed by created_by) with `data` in one roundtrip
+        """
+        try:
+            return self.user_coll.replace_one(
+                {"created_by": data.created_by}, data.model_dump(), upsert=True
+            )
+        except DuplicateKeyError:
+            # concurrent upsert of the same user inserted first, replace it instead
+            return self.user_coll.replace_one(
+                {"created_by": data.created_by}, data.model_dump()
+            )
+
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"created_by": ""})
     def getLastByCreatedBy(self, created_by: str) -> Union[refresh_token_model.RefreshTokenModel, None]:
-        _return = self.user_coll.find_one({"created_by": created_by}, sort=[("created_at", -1)])
-        return refresh_token_model.RefreshTokenModel(**_return) if _return else None
+        # created_by is unique, no need to sort
+        _return = self.user_coll.find_one({"created_by": created_by})
+        return refresh_token_model.RefreshTokenModel.fromDoc(_return) if _return else None
 
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"created_by": ""})
     def deleteManyByCreatedBy(
         self, created_by: str
     ) -> int:
         _return = self.user_coll.delete_many({"created_by": created_by})
         return _return.deleted_count
 
+    @queryShape(refresh_token_model.RefreshTokenModel, filter={"id": ""})
     def getById(self, id: str) -> Union[refresh_token_model.RefreshTokenModel, None]:
         _return = self.user_coll.find_one({"id": id})
-        return refresh_token_model.RefreshTokenModel(**_return) if _return else None
\ No newline at end of file
+        return refresh_token_model.RefreshTokenModel.fromDoc(_return) if _return else None
\ No newline at end of file
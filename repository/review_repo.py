@@ -7,6 +7,7 @@ from config.mongodb import MongodbClient
 from core.logging import logger
 from domain.model import review_model
 from utils import helper
+from utils.query_shape import queryShape
 
 
 class ReviewRepo:
@@ -16,14 +17,26 @@ class ReviewRepo:
     def create(self, review: review_model.ReviewModel):
         self.review_coll.insert_one(review.model_dump())
 
+    @queryShape(review_model.ReviewModel, filter={"id": ""})
     def getById(self, id: str) -> Union[review_model.ReviewModel, None]:
         review = self.review_coll.find_one({"id": id})
-        return review_model.ReviewModel(**review) if review else None
+        return review_model.ReviewModel.fromDoc(review) if review else None
 
+    def countByProduct(self) -> dict[str, int]:
+        """
+        number of reviews of every reviewed product
+        """
+        counts = self.review_coll.aggregate(
+            [{"$group": {"_id": "$product_id", "count": {"$sum": 1}}}]
+        )
+        return {item["_id"]: item["count"] for item in counts}
+
+    @queryShape(review_model.ReviewModel, filter={"id": ""})
     def delete(self, id: str) -> Union[review_model.ReviewModel, None]:
         review = self.review_coll.find_one_and_delete({"id": id})
-        return review_model.ReviewModel(**review) if review else None
+        return review_model.ReviewModel.fromDoc(review) if review else None
 
+    @queryShape(review_model.ReviewModel, filter={"id": ""})
     def update(
         self, id: str, review: review_model.ReviewModel
     ) -> Union[review_model.ReviewModel, None]:
@@ -32,8 +45,9 @@ class ReviewRepo:
             {"$set": review.model_dump()},
             return_document=ReturnDocument.AFTER,
         )
-        return review_model.ReviewModel(**review) if review else None
+        return review_model.ReviewModel.fromDoc(review) if review else None
 
+    @queryShape(review_model.ReviewModel, filter={"product_id": ""})
     def getRatingAverage(self, product_id: str) -> float:
         pipeline = [
             {"$match": {"product_id": product_id}},
@@ -45,6 +59,9 @@ class ReviewRepo:
         else:
             return 0
 
+    @queryShape(
+        review_model.ReviewModel, filter={"product_id": "", "user_id": "", "rating": 5}
+    )
     def get(
         self,
         user_id: Optional[str] = None,
@@ -68,4 +85,4 @@ class ReviewRepo:
 
         review = self.review_coll.find_one(filter)
         logger.debug(f"review: {review}")
-        return review_model.ReviewModel(**review) if review else None
+        return review_model.ReviewModel.fromDoc(review) if review else None
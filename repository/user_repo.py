@@ -1,11 +1,12 @@
 from typing import Union, Literal
 
 from fastapi import Depends
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 from core.logging import logger
 from config.mongodb import MongodbClient
 from domain.model import user_model
 from datetime import datetime
+from utils.query_shape import queryShape
 
 
 class UserRepo:
@@ -15,6 +16,7 @@ class UserRepo:
     def create(self, data: user_model.UserModel):
         return self.user_coll.insert_one(data.model_dump())
 
+    @queryShape(user_model.UserModel, filter={"id": ""})
     def update(
         self, id: str, data: user_model.UserModel
     ) -> Union[user_model.UserModel, None]:
@@ -24,8 +26,9 @@ class UserRepo:
             return_document=ReturnDocument.AFTER,
         )
 
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"id": ""})
     def updateEmailVerified(
         self, id: str, email_verified: bool
     ) -> Union[user_model.UserModel, None]:
@@ -35,8 +38,9 @@ class UserRepo:
             return_document=ReturnDocument.AFTER,
         )
 
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"id": ""})
     def updateLastActive(
         self, id: str, last_active: datetime
     ) -> Union[user_model.UserModel, None]:
@@ -46,24 +50,47 @@ class UserRepo:
             return_document=ReturnDocument.AFTER,
         )
 
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"id": ""})
+    def bulkUpdateLastActive(self, last_actives: dict[str, datetime]) -> int:
+        """
+        write many last_active values in one roundtrip.
+        $max keep the newest value if another worker flushed a later one.
+        """
+        if not last_actives:
+            return 0
+
+        _return = self.user_coll.bulk_write(
+            [
+                UpdateOne({"id": id}, {"$max": {"last_active": last_active}})
+                for id, last_active in last_actives.items()
+            ],
+            ordered=False,
+        )
+        return _return.modified_count
+
+    @queryShape(user_model.UserModel, filter={"id": ""})
     def delete(self, id: str) -> Union[user_model.UserModel, None]:
         _return = self.user_coll.find_one_and_delete({"id": id})
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"id": ""})
     def getById(self, id: str) -> Union[user_model.UserModel, None]:
         _return = self.user_coll.find_one({"id": id})
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"username": ""})
     def getByUsername(self, username: str) -> Union[user_model.UserModel, None]:
         _return = self.user_coll.find_one({"username": username})
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
 
+    @queryShape(user_model.UserModel, filter={"role": "customer"})
     def getAllByRole(self, role: Literal[user_model.USER_ROLE_ENUMS]) -> list[user_model.UserModel]:
         _return = self.user_coll.find({"role": role})
-        return [user_model.UserModel(**user) for user in _return]
+        return [user_model.UserModel.fromDoc(user) for user in _return]
 
+    @queryShape(user_model.UserModel, filter={"email": ""})
     def getByEmail(self, email: str) -> Union[user_model.UserModel, None]:
         _return = self.user_coll.find_one({"email": email})
-        return user_model.UserModel(**_return) if _return else None
+        return user_model.UserModel.fromDoc(_return) if _return else None
@@ -1,8 +1,9 @@
 from fastapi import Depends
 from config.mongodb import MongodbClient
-from domain.model import wallet_model
-from pymongo import ReturnDocument
+from domain.model import user_model, wallet_model
+from pymongo import ReturnDocument, UpdateOne
 from typing import Union
+from utils.query_shape import queryShape
 
 
 class WalletRepo:
@@ -12,10 +13,12 @@ class WalletRepo:
     def create(self, data: wallet_model.WalletModel):
         self.wallet_coll.insert_one(data.model_dump())
 
+    @queryShape(wallet_model.WalletModel, filter={"user_id": ""})
     def getByUserId(self, user_id: str) -> Union[wallet_model.WalletModel, None]:
         wallet = self.wallet_coll.find_one({"user_id": user_id})
-        return wallet_model.WalletModel(**wallet) if wallet else None
+        return wallet_model.WalletModel.fromDoc(wallet) if wallet else None
 
+    @queryShape(wallet_model.WalletModel, filter={"id": ""})
     def update(self, id: str, data: wallet_model.WalletModel) -> int:
         result = self.wallet_coll.update_one(
             {"id": id},
@@ -23,3 +26,63 @@ class WalletRepo:
         )
 
         return result.modified_count
+
+    @queryShape(wallet_model.WalletModel, filter={"id": ""})
+    def pinCurrency(self, id: str, currency: str) -> int:
+        """
+        set the currency of a wallet created by an older version, which has none.
+        only `currency` is written, the balance may be changed concurrently.
+        """
+        result = self.wallet_coll.update_one(
+            {"id": id, "currency": {"$in": ["", None]}},
+            {"$set": {"currency": currency}},
+        )
+        return result.modified_count
+
+    def backfillCurrencies(self, batch_size: int = 1000) -> int:
+        """
+        set the currency of every wallet created by older versions to the current
+        currency of its owner, the one its balance has been read in until now.
+        return number of updated wallets.
+        """
+        pipeline = [
+            {"$match": {"currency": {"$in": ["", None]}}},
+            {
+                "$lookup": {
+                    "from": user_model.UserModel.getCollName(),
+                    "localField": "user_id",
+                    "foreignField": "id",
+                    "as": "user_",
+                    "pipeline": [{"$project": {"_id": 0, "currency": 1}}],
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "id": 1,
+                    # UserModel default
+                    "currency": {"$ifNull": [{"$first": "$user_.currency"}, "USD"]},
+                }
+            },
+        ]
+
+        updated = 0
+        requests = []
+        for wallet in self.wallet_coll.aggregate(pipeline):
+            # a wallet pinned meanwhile by WalletService keeps its currency
+            requests.append(
+                UpdateOne(
+                    {"id": wallet["id"], "currency": {"$in": ["", None]}},
+                    {"$set": {"currency": wallet["currency"]}},
+                )
+            )
+            if len(requests) >= batch_size:
+                updated += self.wallet_coll.bulk_write(
+                    requests, ordered=False
+                ).modified_count
+                requests = []
+
+        if requests:
+            updated += self.wallet_coll.bulk_write(requests, ordered=False).modified_count
+
+        return updated
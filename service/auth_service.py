@@ -1,4 +1,6 @@
 from dataclasses import asdict
+from datetime import timezone
+from typing import Optional
 
 import jwt
 from fastapi import BackgroundTasks, Depends
@@ -14,6 +16,9 @@ from repository import cart_repo, otp_repo, refresh_token_repo, user_repo, walle
 from utils import bcrypt as bcrypt_utils
 from utils import helper
 from utils import jwt as jwt_utils
+from utils import auth_cache
+from utils.auth_cache import UserSnapshotCache, VerifiedTokenCache
+from utils.last_active import LastActiveBuffer
 from utils.service import auth_util, email_util
 from domain.enum import auth_enum
 from config.setting import Setting
@@ -85,8 +90,11 @@ class AuthService:
             logger.error(exc)
             raise exc
 
-        # check if expired
-        if refresh_token.expired_at < helper.timeNow():
+        # check if expired, naive datetimes are read unless MONGODB_TZ_AWARE
+        expired_at = refresh_token.expired_at
+        if expired_at.tzinfo == None:
+            expired_at = expired_at.replace(tzinfo=timezone.utc)
+        if expired_at < helper.timeNow():
             exc = CustomHttpException(status_code=401, message="Refresh token expired")
             logger.error(exc)
 
@@ -114,7 +122,39 @@ class AuthService:
             refresh_token=refresh_token,
         )
 
-    def verifyToken(self, token: str) -> auth_dto.CurrentUser:
+    def verifyCachedToken(
+        self, token: str, stateless: bool = Env.AUTH_STATELESS_VERIFY
+    ) -> Optional[auth_dto.CurrentUser]:
+        """
+        user of an already verified token from VerifiedTokenCache, no I/O.
+        None if it isn't cached (or not `stateless`), see verifyToken().
+        """
+        if not stateless:
+            return None
+
+        cached_user = VerifiedTokenCache.get(digest=VerifiedTokenCache.digest(token))
+        if not cached_user:
+            return None
+
+        time_now = helper.timeNow()
+        LastActiveBuffer.touch(user_id=cached_user.id, last_active=time_now)
+        return cached_user.model_copy(update={"last_active": time_now})
+
+    def verifyToken(
+        self, token: str, stateless: bool = Env.AUTH_STATELESS_VERIFY
+    ) -> auth_dto.CurrentUser:
+        """
+        stateless: resolve user from in-process snapshot and buffer the last_active write
+        (see utils.last_active.LastActiveBuffer) instead of updating mongodb per request.
+        already verified tokens are served from VerifiedTokenCache without decoding.
+        """
+        token_digest = None
+        if stateless:
+            cached_user = self.verifyCachedToken(token=token, stateless=stateless)
+            if cached_user:
+                return cached_user
+            token_digest = VerifiedTokenCache.digest(token)
+
         # decode token
         claims = None
         try:
@@ -140,8 +180,24 @@ class AuthService:
             logger.error(exc)
             raise exc
 
-        # update last_active
         time_now = helper.timeNow()
+        if stateless:
+            user = UserSnapshotCache.get(user_id=claims.sub)
+            if not user:
+                user_ = self.user_repo.getById(id=claims.sub)
+                if not user_:
+                    exc = CustomHttpException(status_code=401, message="User not found")
+                    logger.error(exc)
+                    raise exc
+
+                user = auth_dto.CurrentUser(**user_.model_dump())
+                UserSnapshotCache.set(user=user)
+
+            VerifiedTokenCache.set(digest=token_digest, user=user, exp=claims.exp)
+            LastActiveBuffer.touch(user_id=user.id, last_active=time_now)
+            return user.model_copy(update={"last_active": time_now})
+
+        # update last_active
         user = self.user_repo.updateLastActive(id=claims.sub, last_active=time_now)
         if not user:
             exc = CustomHttpException(status_code=401, message="User not found")
@@ -249,6 +305,7 @@ class AuthService:
                 updated_at=time_now,
                 user_id=user_id,
                 balance=0,
+                currency=new_user.currency,
             )
 
             try:
@@ -374,6 +431,7 @@ class AuthService:
         user.email_verified = True
         user.updated_at = helper.timeNow()
         self.user_repo.update(id=user.id, data=user)
+        auth_cache.invalidateUser(user_id=user.id)
 
     async def sendEmailForgotPasswordOTP(
         self, payload: auth_rest.SendEmailForgotPasswordOTPReq
@@ -519,6 +577,7 @@ class AuthService:
             )
             logger.error(exc)
             raise exc
+        auth_cache.invalidateUser(user_id=user.id)
 
     def exchangeOAuth2Token(self, payload: auth_rest.ExchangeOAuth2TokenReq) -> str:
         if payload.provider == auth_enum.OAuth2Provider.GOOGLE:
@@ -1,386 +1,586 @@
+from typing import Optional, Type, TypeVar
+
 from fastapi import Depends
 
 from core.exceptions.http import CustomHttpException
 from core.logging import logger
 from domain.dto import auth_dto, cart_dto
-from domain.model import cart_model
+from domain.model import cart_model, product_model
 from domain.rest import cart_rest
-from repository import cart_repo, product_repo
+from repository import cart_repo, product_loader
 from utils import helper
+from utils.exchange_rate import ExchangeRateTable, MissingExchangeRateError
+
+_TItemResp = TypeVar("_TItemResp", bound=cart_rest.BaseCartItemDetail)
+
+
+# checks and responses shared by CartService and AsyncCartService, no I/O here
+
+
+def _checkQuantity(quantity: int):
+    if quantity <= 0:
+        logger.debug(f"invalid quantity: {quantity}")
+        exc = CustomHttpException(
+            status_code=400,
+            message=f"invalid quantity: {quantity}",
+        )
+        raise exc
+
+
+def _checkAddedProduct(
+    payload: cart_rest.AddToChartReq,
+    product: Optional[product_model.ProductModel],
+    product_variant: Optional[product_model.ProductVariantModel],
+):
+    if not product:
+        logger.debug(f"product not found: {payload.product_id}")
+        exc = CustomHttpException(
+            status_code=400,
+            message=f"product not found: {payload.product_id}",
+        )
+        raise exc
+
+    if not product_variant or product_variant.product_id != product.id:
+        logger.debug(f"product variant not found: {payload.product_variant_id}")
+        exc = CustomHttpException(
+            status_code=400,
+            message=f"product variant not found: {payload.product_variant_id}",
+        )
+        raise exc
+
+
+def _checkCartOwner(
+    cart_item: cart_model.CartItemModel,
+    cart: Optional[cart_model.CartModel],
+    current_user: auth_dto.CurrentUser,
+):
+    if not cart:
+        logger.debug(f"cart not found: {cart_item.cart_id}")
+        exc = CustomHttpException(
+            status_code=500,
+            message=f"internal server error",
+            detail="cart not found",
+        )
+        raise exc
+
+    if cart.user_id != current_user.id:
+        logger.debug(f"cart of cart item not owned by user: {current_user.id}")
+        exc = CustomHttpException(
+            status_code=403,
+            message=f"forbidden",
+            detail="cart of cart item not owned by user",
+        )
+        raise exc
+
+
+def _checkItemProduct(
+    cart_item: cart_model.CartItemModel,
+    product: Optional[product_model.ProductModel],
+    product_variant: Optional[product_model.ProductVariantModel],
+):
+    if not product:
+        logger.debug(f"product not found: {cart_item.product_id}")
+        exc = CustomHttpException(
+            status_code=500,
+            message=f"internal server error",
+            detail=f"product not found: {cart_item.product_id}",
+        )
+        raise exc
+
+    if not product_variant:
+        logger.debug(f"product variant not found: {cart_item.product_variant_id}")
+        exc = CustomHttpException(
+            status_code=500,
+            message=f"internal server error",
+            detail=f"product variant not found: {cart_item.product_variant_id}",
+        )
+        raise exc
+
+
+def _applyUpdate(
+    cart_item: cart_model.CartItemModel, payload: cart_rest.UpdateCartItemReq
+):
+    if payload.description != None:
+        if payload.description == "null":
+            cart_item.description = None
+        else:
+            cart_item.description = payload.description
+
+    if payload.quantity != None:
+        _checkQuantity(payload.quantity)
+        cart_item.quantity = payload.quantity
+
+    cart_item.updated_at = helper.timeNow()
+
+
+def _itemResp(
+    resp_class: Type[_TItemResp],
+    cart_item: cart_model.CartItemModel,
+    product: product_model.ProductModel,
+    product_variant: product_model.ProductVariantModel,
+    description: Optional[str],
+    current_user: auth_dto.CurrentUser,
+) -> _TItemResp:
+    localized_price, localized_currency = ExchangeRateTable.convert(
+        product_variant.price, product_variant.price_currency, current_user.currency
+    )
+    return resp_class(
+        id=cart_item.id,
+        created_at=cart_item.created_at,
+        updated_at=cart_item.updated_at,
+        product_name=product.name,
+        quantity=cart_item.quantity,
+        description=description,
+        price_per_unit=product_variant.price,
+        price_per_unit_currency=product_variant.price_currency,
+        localized_price_per_unit=helper.localizePrice(
+            price=localized_price,
+            currency_code=localized_currency,
+            language_code=current_user.language,
+        ),
+        localized_price_per_unit_currency=localized_currency,
+    )
+
+
+def _addedItem(
+    cart_item: Optional[cart_model.CartItemModel],
+    inserted: Optional[cart_model.CartItemModel],
+    quantity: int,
+) -> Optional[cart_model.CartItemModel]:
+    """
+    cart item after addToCart() added `quantity`: the one it `inserted`, else the
+    `cart_item` read before plus `quantity`. None if neither, the item was inserted
+    by a concurrent request in between.
+    """
+    if inserted != None:
+        return inserted
+    if cart_item == None:
+        return None
+    return cart_item.model_copy(
+        update={
+            "quantity": cart_item.quantity + quantity,
+            "updated_at": helper.timeNow(),
+        }
+    )
+
+
+def _loadedItems(
+    cart_items: list[cart_model.CartItemModel],
+    products: dict[str, Optional[product_model.ProductModel]],
+    variants: dict[str, Optional[product_model.ProductVariantModel]],
+) -> list[
+    tuple[
+        cart_model.CartItemModel,
+        product_model.ProductModel,
+        product_model.ProductVariantModel,
+    ]
+]:
+    """
+    (item, product, variant) of the items whose product and variant still exist
+    """
+    result = []
+    for item in cart_items:
+        product = products.get(item.product_id)
+        if not product:
+            logger.warning(
+                f"product {item.product_id} not found for cart item {item.id}"
+            )
+            continue
+
+        variant = variants.get(item.product_variant_id)
+        if not variant:
+            logger.warning(
+                f"product variant {item.product_variant_id} not found for cart item {item.id}"
+            )
+            continue
+
+        result.append((item, product, variant))
+
+    return result
+
+
+def _cartDetailResp(
+    cart_items: list[cart_model.CartItemModel],
+    products: dict[str, Optional[product_model.ProductModel]],
+    variants: dict[str, Optional[product_model.ProductVariantModel]],
+    current_user: auth_dto.CurrentUser,
+) -> cart_rest.GetUserCartDetailRespData:
+    # item totals and their currencies, converted at once
+    loaded_items = _loadedItems(cart_items, products, variants)
+    item_prices = [item.quantity * variant.price for item, _, variant in loaded_items]
+    item_currencies = [variant.price_currency for _, _, variant in loaded_items]
+    try:
+        total_price, total_currency = ExchangeRateTable.convertTotal(
+            item_prices, item_currencies, current_user.currency
+        )
+    except MissingExchangeRateError as e:
+        exc = CustomHttpException(
+            status_code=400,
+            message="Cart total can't be converted to your currency",
+            detail=str(e),
+        )
+        logger.error(exc)
+        raise exc
+
+    return cart_rest.GetUserCartDetailRespData(
+        total_items=len(cart_items),
+        localized_total_price=helper.localizePrice(
+            price=total_price,
+            currency_code=total_currency,
+            language_code=current_user.language,
+        ),
+        localized_total_price_currency=total_currency,
+    )
+
+
+def _cartItemsResp(
+    cart_items: list[cart_model.CartItemModel],
+    products: dict[str, Optional[product_model.ProductModel]],
+    variants: dict[str, Optional[product_model.ProductVariantModel]],
+    current_user: auth_dto.CurrentUser,
+) -> list[cart_rest.GetChartItemsRespDataItem]:
+    resp = []
+    for item, product, variant in _loadedItems(cart_items, products, variants):
+        price_per_unit, price_per_unit_currency = ExchangeRateTable.convert(
+            variant.price, variant.price_currency, current_user.currency
+        )
+        resp.append(
+            cart_rest.GetChartItemsRespDataItem(
+                id=item.id,
+                created_at=item.created_at,
+                updated_at=item.updated_at,
+                quantity=item.quantity,
+                description=item.description,
+                product_name=product.name,
+                price_per_unit=price_per_unit,
+                price_per_unit_currency=price_per_unit_currency,
+                localized_price_per_unit=helper.localizePrice(
+                    price=price_per_unit,
+                    currency_code=price_per_unit_currency,
+                    language_code=current_user.language,
+                ),
+                localized_price_per_unit_currency=price_per_unit_currency,
+            )
+        )
+
+    return resp
+
+
+def _cartNotFound(current_user: auth_dto.CurrentUser) -> CustomHttpException:
+    logger.debug(f"cart not found: {current_user.id}")
+    return CustomHttpException(
+        status_code=404,
+        message=f"cart not found",
+    )
+
+
+def _cartItemNotFound(cart_item_id: str, status_code: int) -> CustomHttpException:
+    logger.debug(f"cart item not found: {cart_item_id}")
+    return CustomHttpException(
+        status_code=status_code,
+        message=(
+            f"cart item not found: {cart_item_id}"
+            if status_code == 400
+            else f"cart item not found"
+        ),
+    )
 
 
 class CartService:
+    """
+    cart reads and writes for sync `def` handlers (run on the threadpool), kept
+    while handlers move to AsyncCartService. both share the checks and responses
+    above, only the repository calls differ.
+    """
+
     def __init__(
         self,
         cart_repo: cart_repo.CartRepo = Depends(),
-        product_repo: product_repo.ProductRepo = Depends(),
+        product_loader: product_loader.ProductLoader = Depends(),
     ) -> None:
         self.cart_repo = cart_repo
-        self.product_repo = product_repo
+        self.product_loader = product_loader
 
     def addToCart(
         self,
         payload: cart_rest.AddToChartReq,
         current_user: auth_dto.CurrentUser,
     ) -> cart_rest.AddToCartRespData:
-        time_now = helper.timeNow()
-
-        # check if cart exists
-        cart = self.cart_repo.getByUserId(user_id=current_user.id)
-        if not cart:
-            # create new cart
-            logger.debug(f"cart not found, creating new one for user {current_user.id}")
-            cart = cart_model.CartModel(
-                id=helper.generateUUID4(),
-                created_at=time_now,
-                updated_at=time_now,
-                user_id=current_user.id,
-            )
-            self.cart_repo.create(cart=cart)
-
-        # check product
-        product = self.product_repo.getById(id=payload.product_id)
-        if not product:
-            logger.debug(f"product not found: {payload.product_id}")
-            exc = CustomHttpException(
-                status_code=400,
-                message=f"product not found: {payload.product_id}",
-            )
-            raise exc
-
-        # check product_variant
-        product_variant = self.product_repo.getProductVariant(
-            id=payload.product_variant_id
+        _checkQuantity(payload.quantity)
+
+        # check product and product_variant
+        self.product_loader.products.prime([payload.product_id])
+        self.product_loader.variants.prime([payload.product_variant_id])
+        product = self.product_loader.products.get(payload.product_id)
+        product_variant = self.product_loader.variants.get(payload.product_variant_id)
+        _checkAddedProduct(payload, product, product_variant)
+
+        # read the cart with the item, then create or increment the item
+        cart, cart_item = self.cart_repo.getByUserIdWithItem(
+            user_id=current_user.id,
+            product_id=payload.product_id,
+            product_variant_id=payload.product_variant_id,
         )
-        if not product_variant:
-            logger.debug(f"product variant not found: {payload.product_variant_id}")
-            exc = CustomHttpException(
-                status_code=400,
-                message=f"product variant not found: {payload.product_variant_id}",
-            )
-            raise exc
-
-        # check cart item by product_id and pruduct_variant_id
-        cart_item = self.cart_repo.getCartItem(
+        if cart == None:
+            cart = self.cart_repo.getOrCreateByUserId(user_id=current_user.id)
+        inserted = self.cart_repo.incCartItem(
             cart_id=cart.id,
             product_id=payload.product_id,
             product_variant_id=payload.product_variant_id,
+            quantity=payload.quantity,
+            created_by=current_user.id,
         )
-        if not cart_item:
-            # create cart item
-            logger.debug(
-                f"cart item for cart {cart.id} not found, creating new one for user {current_user.id}"
-            )
-            cart_item = cart_model.CartItemModel(
-                id=helper.generateUUID4(),
-                created_at=time_now,
-                updated_at=time_now,
-                created_by=current_user.id,
+        cart_item = _addedItem(cart_item, inserted, payload.quantity)
+        if cart_item == None:
+            cart_item = self.cart_repo.getCartItem(
                 cart_id=cart.id,
                 product_id=payload.product_id,
                 product_variant_id=payload.product_variant_id,
-                quantity=payload.quantity,
             )
-            self.cart_repo.create(cart_item=cart_item)
 
-        else:
-            # update cart item
-            logger.debug(f"cart item of cart {cart.id} found, updating it")
-            cart_item.quantity += payload.quantity
-            cart_item.updated_at = helper.timeNow()
-            cart_item = self.cart_repo.updateCartItem(
-                id=cart_item.id, cart_item=cart_item
-            )
-            if not cart_item:
-                logger.error(f"failed to update cart item: {cart_item}")
-                exc = CustomHttpException(
-                    status_code=500,
-                    message=f"failed to update cart item: {cart_item}",
-                )
-                raise exc
-
-        # response
-        resp = cart_rest.AddToCartRespData(
-            id=cart_item.id,
-            created_at=cart_item.created_at,
-            updated_at=cart_item.updated_at,
-            product_name=product.name,
-            quantity=cart_item.quantity,
+        return _itemResp(
+            cart_rest.AddToCartRespData,
+            cart_item=cart_item,
+            product=product,
+            product_variant=product_variant,
             description=product.description,
-            price_per_unit=product_variant.price,
-            price_per_unit_currency=product_variant.price_currency,
-            localized_price_per_unit=helper.localizePrice(
-                price=product_variant.price,
-                currency_code=current_user.currency,
-                language_code=current_user.language,
-            ),  # TODO: change to precise currency exchange rate
+            current_user=current_user,
         )
 
-        return resp
-
     def updateCartItem(
         self,
         current_user: auth_dto.CurrentUser,
         cart_item_id: str,
         payload: cart_rest.UpdateCartItemReq,
     ) -> cart_rest.UpdateCartItemRespData:
-        # check cart item
-        cart_item = self.cart_repo.getCartItemById(
-            id=cart_item_id,
+        cart_item = self.cart_repo.getCartItemById(id=cart_item_id)
+        if not cart_item:
+            raise _cartItemNotFound(cart_item_id, status_code=400)
+
+        cart = self.cart_repo.getById(id=cart_item.cart_id)
+        _checkCartOwner(cart_item, cart, current_user)
+
+        product = self.product_loader.products.get(cart_item.product_id)
+        product_variant = self.product_loader.variants.get(
+            cart_item.product_variant_id
         )
+        _checkItemProduct(cart_item, product, product_variant)
+
+        _applyUpdate(cart_item, payload)
+        cart_item = self.cart_repo.updateCartItem(id=cart_item.id, cart_item=cart_item)
         if not cart_item:
-            logger.debug(f"cart item not found: {cart_item_id}")
+            logger.error(f"failed to update cart item: {cart_item_id}")
             exc = CustomHttpException(
-                status_code=400,
-                message=f"cart item not found: {cart_item_id}",
+                status_code=500,
+                message=f"failed to update cart item: {cart_item_id}",
             )
             raise exc
 
-        # get cart
+        return _itemResp(
+            cart_rest.UpdateCartItemRespData,
+            cart_item=cart_item,
+            product=product,
+            product_variant=product_variant,
+            description=cart_item.description,
+            current_user=current_user,
+        )
+
+    def getUserCartDetail(
+        self, current_user: auth_dto.CurrentUser
+    ) -> cart_rest.GetUserCartDetailRespData:
+        cart = self.cart_repo.getOrCreateByUserId(user_id=current_user.id)
+        cart_items = self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
+
+        # lookup products and variants of all items at once
+        products = self.product_loader.products.getMany(
+            item.product_id for item in cart_items
+        )
+        variants = self.product_loader.variants.getMany(
+            item.product_variant_id for item in cart_items
+        )
+
+        return _cartDetailResp(cart_items, products, variants, current_user)
+
+    def deleteCartItem(
+        self, current_user: auth_dto.CurrentUser, cart_item_id: str
+    ) -> cart_rest.DeleteCartItemRespData:
+        cart_item = self.cart_repo.getCartItemById(id=cart_item_id)
+        if not cart_item:
+            raise _cartItemNotFound(cart_item_id, status_code=404)
+
         cart = self.cart_repo.getById(id=cart_item.cart_id)
+        _checkCartOwner(cart_item, cart, current_user)
+
+        self.cart_repo.deleteCartItem(id=cart_item.id)
+
+        return cart_rest.DeleteCartItemRespData(**cart_item.model_dump())
+
+    def getCartItems(
+        self, current_user: auth_dto.CurrentUser
+    ) -> list[cart_rest.GetChartItemsRespDataItem]:
+        cart = self.cart_repo.getByUserId(user_id=current_user.id)
         if not cart:
-            logger.debug(f"cart not found: {cart_item.cart_id}")
-            exc = CustomHttpException(
-                status_code=500,
-                message=f"internal server error",
-                detail="cart not found",
-            )
-            raise exc
+            raise _cartNotFound(current_user)
 
-        # validate cart ownership
-        if cart.user_id != current_user.id:
-            logger.debug(f"cart of cart item not owned by user: {current_user.id}")
-            exc = CustomHttpException(
-                status_code=403,
-                message=f"forbidden",
-                detail="cart of cart item not owned by user",
-            )
-            raise exc
+        cart_items = self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
 
-        # lookup product
-        product = self.product_repo.getById(id=cart_item.product_id)
-        if not product:
-            logger.debug(f"product not found: {cart_item.product_id}")
-            exc = CustomHttpException(
-                status_code=500,
-                message=f"internal server error",
-                detail=f"product not found: {cart_item.product_id}",
-            )
-            raise exc
+        # lookup products and variants of all items at once
+        products = self.product_loader.products.getMany(
+            item.product_id for item in cart_items
+        )
+        variants = self.product_loader.variants.getMany(
+            item.product_variant_id for item in cart_items
+        )
+
+        return _cartItemsResp(cart_items, products, variants, current_user)
 
-        # lookup product variant
-        product_variant = self.product_repo.getProductVariant(
-            id=cart_item.product_variant_id
+
+class AsyncCartService:
+    """
+    CartService for `async def` handlers
+    """
+
+    def __init__(
+        self,
+        cart_repo: cart_repo.AsyncCartRepo = Depends(),
+        product_loader: product_loader.AsyncProductLoader = Depends(),
+    ) -> None:
+        self.cart_repo = cart_repo
+        self.product_loader = product_loader
+
+    async def addToCart(
+        self,
+        payload: cart_rest.AddToChartReq,
+        current_user: auth_dto.CurrentUser,
+    ) -> cart_rest.AddToCartRespData:
+        _checkQuantity(payload.quantity)
+
+        # check product and product_variant
+        self.product_loader.products.prime([payload.product_id])
+        self.product_loader.variants.prime([payload.product_variant_id])
+        product = await self.product_loader.products.get(payload.product_id)
+        product_variant = await self.product_loader.variants.get(
+            payload.product_variant_id
         )
-        if not product_variant:
-            logger.debug(f"product variant not found: {cart_item.product_variant_id}")
-            exc = CustomHttpException(
-                status_code=500,
-                message=f"internal server error",
-                detail=f"product variant not found: {cart_item.product_variant_id}",
+        _checkAddedProduct(payload, product, product_variant)
+
+        # read the cart with the item, then create or increment the item
+        cart, cart_item = await self.cart_repo.getByUserIdWithItem(
+            user_id=current_user.id,
+            product_id=payload.product_id,
+            product_variant_id=payload.product_variant_id,
+        )
+        if cart == None:
+            cart = await self.cart_repo.getOrCreateByUserId(user_id=current_user.id)
+        inserted = await self.cart_repo.incCartItem(
+            cart_id=cart.id,
+            product_id=payload.product_id,
+            product_variant_id=payload.product_variant_id,
+            quantity=payload.quantity,
+            created_by=current_user.id,
+        )
+        cart_item = _addedItem(cart_item, inserted, payload.quantity)
+        if cart_item == None:
+            cart_item = await self.cart_repo.getCartItem(
+                cart_id=cart.id,
+                product_id=payload.product_id,
+                product_variant_id=payload.product_variant_id,
             )
-            raise exc
 
-        # update fields
-        if payload.description != None:
-            if payload.description == "null":
-                cart_item.description = None
-            else:
-                cart_item.description = payload.description
+        return _itemResp(
+            cart_rest.AddToCartRespData,
+            cart_item=cart_item,
+            product=product,
+            product_variant=product_variant,
+            description=product.description,
+            current_user=current_user,
+        )
 
-        if payload.quantity != None:
-            if payload.quantity <= 0:
-                logger.debug(f"invalid quantity: {payload.quantity}")
-                exc = CustomHttpException(
-                    status_code=400,
-                    message=f"invalid quantity: {payload.quantity}",
-                )
-                raise exc
+    async def updateCartItem(
+        self,
+        current_user: auth_dto.CurrentUser,
+        cart_item_id: str,
+        payload: cart_rest.UpdateCartItemReq,
+    ) -> cart_rest.UpdateCartItemRespData:
+        cart_item = await self.cart_repo.getCartItemById(id=cart_item_id)
+        if not cart_item:
+            raise _cartItemNotFound(cart_item_id, status_code=400)
 
-            cart_item.quantity = payload.quantity
+        cart = await self.cart_repo.getById(id=cart_item.cart_id)
+        _checkCartOwner(cart_item, cart, current_user)
 
-        cart_item.updated_at = helper.timeNow()
+        product = await self.product_loader.products.get(cart_item.product_id)
+        product_variant = await self.product_loader.variants.get(
+            cart_item.product_variant_id
+        )
+        _checkItemProduct(cart_item, product, product_variant)
 
-        # update cart
-        cart_item = self.cart_repo.updateCartItem(id=cart_item.id, cart_item=cart_item)
+        _applyUpdate(cart_item, payload)
+        cart_item = await self.cart_repo.updateCartItem(
+            id=cart_item.id, cart_item=cart_item
+        )
         if not cart_item:
-            logger.error(f"failed to update cart item: {cart_item}")
+            logger.error(f"failed to update cart item: {cart_item_id}")
             exc = CustomHttpException(
                 status_code=500,
-                message=f"failed to update cart item: {cart_item}",
+                message=f"failed to update cart item: {cart_item_id}",
             )
             raise exc
 
-        # response
-        resp = cart_rest.UpdateCartItemRespData(
-            id=cart_item.id,
-            created_at=cart_item.created_at,
-            updated_at=cart_item.updated_at,
-            product_name=product.name,
-            quantity=cart_item.quantity,
+        return _itemResp(
+            cart_rest.UpdateCartItemRespData,
+            cart_item=cart_item,
+            product=product,
+            product_variant=product_variant,
             description=cart_item.description,
-            price_per_unit=product_variant.price,
-            price_per_unit_currency=product_variant.price_currency,
-            localized_price_per_unit=helper.localizePrice(
-                price=product_variant.price,
-                currency_code=current_user.currency,
-                language_code=current_user.language,
-            ),
+            current_user=current_user,
         )
 
-        return resp
-
-    def getUserCartDetail(
+    async def getUserCartDetail(
         self, current_user: auth_dto.CurrentUser
     ) -> cart_rest.GetUserCartDetailRespData:
-        time_now = helper.timeNow()
-
-        # check if cart exists
-        cart = self.cart_repo.getByUserId(user_id=current_user.id)
-        if not cart:
-            # create new cart
-            logger.debug(f"cart not found, creating new one for user {current_user.id}")
-            cart = cart_model.CartModel(
-                id=helper.generateUUID4(),
-                created_at=time_now,
-                updated_at=time_now,
-                user_id=current_user.id,
-            )
-            self.cart_repo.create(cart=cart)
+        cart = await self.cart_repo.getOrCreateByUserId(user_id=current_user.id)
+        cart_items = await self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
 
-        # get cart items
-        cart_items = self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
-
-        # items
-        final_cart_items = []
-        final_total_price = 0  # TODO: update this to precise currency exchange rate calculation
-        for item in cart_items:
-            # lookup product
-            product = self.product_repo.getById(id=item.product_id)
-            if not product:
-                logger.warning(
-                    f"product {item.product_id} not found for cart item {item.id}"
-                )
-                continue
-
-            # lookup product variant
-            variant = self.product_repo.getProductVariant(id=item.product_variant_id)
-            if not variant:
-                logger.warning(
-                    f"product variant {item.product_variant_id} not found for cart item {item.id}"
-                )
-                continue
-
-            final_cart_items.append(item)
-            final_total_price += item.quantity * variant.price
-
-        # prepare response
-        resp = cart_rest.GetUserCartDetailRespData(
-            total_items=len(cart_items),
-            localized_total_price=helper.localizePrice(
-                price=final_total_price,
-                currency_code=current_user.currency,
-                language_code=current_user.language,
-            ),
+        # lookup products and variants of all items at once
+        products = await self.product_loader.products.getMany(
+            item.product_id for item in cart_items
+        )
+        variants = await self.product_loader.variants.getMany(
+            item.product_variant_id for item in cart_items
         )
 
-        return resp
+        return _cartDetailResp(cart_items, products, variants, current_user)
 
-    def deleteCartItem(
+    async def deleteCartItem(
         self, current_user: auth_dto.CurrentUser, cart_item_id: str
     ) -> cart_rest.DeleteCartItemRespData:
-        # check cart item
-        cart_item = self.cart_repo.getCartItemById(
-            id=cart_item_id,
-        )
+        cart_item = await self.cart_repo.getCartItemById(id=cart_item_id)
         if not cart_item:
-            logger.debug(f"cart item not found: {cart_item_id}")
-            exc = CustomHttpException(
-                status_code=404,
-                message=f"cart item not found",
-            )
-            raise exc
+            raise _cartItemNotFound(cart_item_id, status_code=404)
 
-        # get cart
-        cart = self.cart_repo.getById(id=cart_item.cart_id)
-        if not cart:
-            logger.debug(f"cart not found: {cart_item.cart_id}")
-            exc = CustomHttpException(
-                status_code=500,
-                message=f"internal server error",
-                detail="cart not found",
-            )
-            raise exc
+        cart = await self.cart_repo.getById(id=cart_item.cart_id)
+        _checkCartOwner(cart_item, cart, current_user)
 
-        # check if cart is owned by user
-        if cart.user_id != current_user.id:
-            logger.debug(f"cart of cart item not owned by user: {current_user.id}")
-            exc = CustomHttpException(
-                status_code=403,
-                message=f"forbidden",
-                detail="cart of cart item not owned by user",
-            )
-            raise exc
+        await self.cart_repo.deleteCartItem(id=cart_item.id)
 
-        # delete cart item
-        self.cart_repo.deleteCartItem(id=cart_item.id)
-
-        # response
-        resp = cart_rest.DeleteCartItemRespData(**cart.model_dump())
-        return resp
+        return cart_rest.DeleteCartItemRespData(**cart_item.model_dump())
 
-    def getCartItems(
+    async def getCartItems(
         self, current_user: auth_dto.CurrentUser
     ) -> list[cart_rest.GetChartItemsRespDataItem]:
-        # get cart
-        cart = self.cart_repo.getByUserId(user_id=current_user.id)
+        cart = await self.cart_repo.getByUserId(user_id=current_user.id)
         if not cart:
-            logger.debug(f"cart not found: {current_user.id}")
-            exc = CustomHttpException(
-                status_code=404,
-                message=f"cart not found",
-            )
-            raise exc
+            raise _cartNotFound(current_user)
 
-        # get cart items
-        cart_items = self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
+        cart_items = await self.cart_repo.getCartItemsByCartId(cart_id=cart.id)
 
-        # prepare response
-        resp = []
-        for item in cart_items:
-            res_item = cart_rest.GetChartItemsRespDataItem(
-                id=item.id,
-                created_at=item.created_at,
-                updated_at=item.updated_at,
-                quantity=item.quantity,
-                description=item.description,
-            )
+        # lookup products and variants of all items at once
+        products = await self.product_loader.products.getMany(
+            item.product_id for item in cart_items
+        )
+        variants = await self.product_loader.variants.getMany(
+            item.product_variant_id for item in cart_items
+        )
 
-            # lookup product
-            product = self.product_repo.getById(id=item.product_id)
-            if not product:
-                logger.warning(
-                    f"product {item.product_id} not found for cart item {item.id}"
-                )
-                continue
-
-            # lookup product_variant
-            variant = self.product_repo.getProductVariant(id=item.product_variant_id)
-            if not variant:
-                logger.warning(
-                    f"product variant {item.product_variant_id} not found for cart item {item.id}"
-                )
-                continue
-
-            res_item.product_name = product.name
-            res_item.price_per_unit = variant.price
-            res_item.price_per_unit_currency = current_user.currency
-            res_item.localized_price_per_unit = helper.localizePrice(
-                price=variant.price,
-                currency_code=current_user.currency,
-                language_code=current_user.language,
-            ) # TODO: update to precise currency exchange rate
-
-            resp.append(res_item)
-
-        return resp
\ No newline at end of file
+        return _cartItemsResp(cart_items, products, variants, current_user)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import Depends
 from minio import Minio
 from pydantic import ValidationError
@@ -9,6 +11,7 @@ from domain.model import category_model
 from domain.rest import category_rest
 from repository import category_repo
 from utils import helper
+from utils import response as resp_utils
 from dataclasses import asdict
 
 
@@ -21,18 +24,39 @@ class CategoryService:
         self.category_repo = category_repo
         self.minio_client = minio_client
 
+    def getListETag(self, query: category_rest.GetCategoryListReq) -> str:
+        """
+        etag of the getList() response, from the collection version alone
+        """
+        return resp_utils.etag(
+            "categories", self.category_repo.version(), query.model_dump()
+        )
+
     def getList(
         self, query: category_rest.GetCategoryListReq
-    ) -> tuple[list[category_rest.GetCategoryListRespDataItem], int]:
+    ) -> tuple[
+        list[category_rest.GetCategoryListRespDataItem], int, bool, Optional[str]
+    ]:
         sort_order = -1 if query.sort_order == "desc" else 1
-        categories, count = self.category_repo.getList(
-            query=query.query,
-            query_by=query.query_by,
-            sort_by=query.sort_by,
-            sort_order=sort_order,
-            skip=helper.generateSkip(query.page, query.limit),
-            limit=query.limit,
-            do_count=True,
+        try:
+            categories, _, next_cursor = self.category_repo.getList(
+                query=query.query,
+                query_by=query.query_by,
+                sort_by=query.sort_by,
+                sort_order=sort_order,
+                skip=helper.generateSkip(query.page, query.limit),
+                limit=query.limit,
+                cursor=query.cursor,
+            )
+        except ValueError as e:
+            exc = CustomHttpException(
+                status_code=400, message="Invalid cursor", detail=str(e)
+            )
+            logger.error(exc)
+            raise exc
+
+        count, exact = self.category_repo.countList(
+            query=query.query, query_by=query.query_by, exact=query.exact
         )
 
         result = []
@@ -42,7 +66,7 @@ class CategoryService:
             )
             result.append(res_item)
 
-        return result, count
+        return result, count, exact, next_cursor
 
     def createCategory(
         self, payload: category_rest.CreateCategoryReq, curr_user_id: str
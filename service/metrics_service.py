@@ -0,0 +1,35 @@
+from config.minio import MinioClient
+from domain.rest import metrics_rest
+from utils.auth_cache import VerifiedTokenCache
+from utils.count_cache import CountCache
+from utils.facet_cache import FacetCache
+from utils.response_cache import ResponseCache
+from utils.exchange_rate import ExchangeRateTable
+from utils.mongo_monitoring import MongoCommandListener, MongoPoolListener
+from utils.presign_cache import PresignedUrlCache
+from utils.price_format import PriceFormatterRegistry
+from utils.suggest import SuggestIndex
+
+
+class MetricsService:
+    """
+    in-process metrics, values are per worker.
+    """
+
+    def getMetrics(self) -> metrics_rest.GetMetricsRespData:
+        return metrics_rest.GetMetricsRespData(
+            token_cache=metrics_rest.CacheStats(**VerifiedTokenCache.stats()),
+            count_cache=metrics_rest.CacheStats(**CountCache.stats()),
+            facet_cache=metrics_rest.CacheStats(**FacetCache.stats()),
+            response_cache=metrics_rest.ResponseCacheStats(**ResponseCache.stats()),
+            presign_cache=metrics_rest.PresignCacheStats(**PresignedUrlCache.stats()),
+            price_formatters=metrics_rest.CacheStats(**PriceFormatterRegistry.stats()),
+            minio_pool=metrics_rest.MinioPoolStats(**MinioClient.poolStats()),
+            mongo_pool=metrics_rest.MongoPoolStats(**MongoPoolListener.stats()),
+            mongo_commands=[
+                metrics_rest.MongoCommandStats(**command)
+                for command in MongoCommandListener.stats()
+            ],
+            exchange_rates=metrics_rest.ExchangeRateStats(**ExchangeRateTable.stats()),
+            suggest_index=metrics_rest.SuggestIndexStats(**SuggestIndex.stats()),
+        )
@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from babel import Locale
 from fastapi import Depends
 from minio import Minio
@@ -5,117 +8,391 @@ from minio import Minio
 from config.minio import getMinioClient
 from core.exceptions.http import CustomHttpException
 from core.logging import logger
-from domain.rest import product_rest
-from repository import product_repo, user_repo
+from domain.dto import auth_dto, product_dto
+from domain.rest import generic_resp, product_rest
+from repository import product_repo
 from utils import helper
+from utils import response as resp_utils
+from utils.exchange_rate import ExchangeRateTable
+from utils.presign_cache import PresignedUrlCache
+from utils.response_cache import ResponseCache
+from utils.suggest import SuggestIndex
+
+
+# GetProductListReq.sort_by: ProductModel field
+LIST_SORT_FIELDS = {"title": "name", "price": "main_price"}
+
+
+def _listSortBy(query: product_rest.GetProductListReq) -> str:
+    sort_by = query.sort_by or ("relevance" if query.query else "created_at")
+    return LIST_SORT_FIELDS.get(sort_by, sort_by)
+
+
+def _listFacets(query: product_rest.GetProductListReq) -> list[str]:
+    facets = [facet.strip() for facet in (query.facets or "").split(",")]
+    facets = [facet for facet in facets if facet]
+    invalid_facets = [
+        facet for facet in facets if facet not in product_repo.LIST_FACETS
+    ]
+    if invalid_facets:
+        exc = CustomHttpException(
+            status_code=400,
+            message="Invalid facets",
+            detail=f"invalid facets: {', '.join(invalid_facets)}",
+        )
+        logger.error(exc)
+        raise exc
+    return facets
+
+
+def _listCacheQuery(query: product_rest.GetProductListReq) -> dict:
+    """
+    `query` with equivalent requests made equal, part of the response cache key
+    """
+    normalized = query.model_dump()
+    search = " ".join((query.query or "").split())
+    if query.query_by != "sku":
+        # text search and name/brand filters ignore case, skus don't
+        search = search.casefold()
+    normalized["query"] = search or None
+    normalized["sort_by"] = _listSortBy(query)
+    normalized["facets"] = sorted(set(_listFacets(query)))
+    return normalized
+
+
+def _listFilter(query: product_rest.GetProductListReq) -> dict:
+    """
+    filter arguments of the repository getList() and countList()
+    """
+    return dict(
+        category_id=query.category_id,
+        query=query.query,
+        query_by=query.query_by,
+        min_price=query.min_price,
+        max_price=query.max_price,
+        in_stock=query.in_stock,
+    )
+
+
+def _listPage(query: product_rest.GetProductListReq) -> dict:
+    """
+    arguments of the repository getList() beside the filter
+    """
+    return dict(
+        sort_by=_listSortBy(query),
+        sort_order=-1 if query.sort_order == "desc" else 1,
+        skip=helper.generateSkip(query.page, query.limit),
+        limit=query.limit,
+        cursor=query.cursor,
+        facets=_listFacets(query),
+    )
+
+
+def _invalidCursor(e: ValueError) -> CustomHttpException:
+    exc = CustomHttpException(status_code=400, message="Invalid cursor", detail=str(e))
+    logger.error(exc)
+    return exc
+
+
+def _listRespData(
+    query: product_rest.GetProductListReq,
+    data: list[product_rest.GetProductListRespDataItem],
+    count: int,
+    exact: bool,
+    next_cursor: Optional[str],
+    facets: Optional[product_dto.ProductListFacets],
+) -> product_rest.GetProductListRespData:
+    paginated_data = product_rest.GetProductListRespData(
+        total=count,
+        page=query.page,
+        limit=query.limit,
+        data=data,
+        next_cursor=next_cursor,
+        exact=exact,
+    )
+    paginated_data.facets = facets
+    return paginated_data
+
+
+def _listRespItems(
+    products: list[product_dto.GetProductListResItem],
+    minio_client: Minio,
+    language_code: str,
+    currency_code: str,
+) -> list[product_rest.GetProductListRespDataItem]:
+    result = []
+    for product in products:
+        # summary of the main variant
+        res_item = product_rest.GetProductListRespDataItem(
+            id=product.id,
+            name=product.name,
+            price=product.main_price or 0,
+            price_currency=product.main_price_currency or "",
+            image=product.main_image or (product.images[0] if product.images else None),
+        )
+
+        # prices are localized below for the whole page
+        res_item.asResponse(minio_client=minio_client)
+        result.append(res_item)
+
+    if currency_code and language_code:
+        priced = [
+            (item, product.main_price_currency or currency_code)
+            for item, product in zip(result, products)
+            if item.price
+        ]
+        prices = ExchangeRateTable.convertMany(
+            [item.price for item, _ in priced],
+            [price_currency for _, price_currency in priced],
+            currency_code,
+        )
+        localized_prices = helper.localizeMixedPrices(
+            [price for price, _ in prices],
+            [price_currency for _, price_currency in prices],
+            language_code,
+        )
+        for (item, _), (_, price_currency), localized_price in zip(
+            priced, prices, localized_prices
+        ):
+            item.localized_price = localized_price
+            item.localized_price_currency = price_currency
+
+    return result
+
+
+def _detailResp(
+    product: product_dto.GetProductDetailResItem,
+    minio_client: Minio,
+    current_user: auth_dto.CurrentUser,
+) -> product_rest.GetProductDetailRespData:
+    product.urlizeMinioFields(minio_client=minio_client)
+    result = product_rest.GetProductDetailRespData(
+        **product.model_dump(exclude={"variants_"})
+    )
+
+    prices = ExchangeRateTable.convertMany(
+        [variant.price for variant in product.variants_],
+        [variant.price_currency for variant in product.variants_],
+        current_user.currency,
+    )
+    localized_prices = helper.localizeMixedPrices(
+        [price for price, _ in prices],
+        [price_currency for _, price_currency in prices],
+        current_user.language,
+    )
+    for variant, (_, price_currency), localized_price in zip(
+        product.variants_, prices, localized_prices
+    ):
+        # urlize minio fields
+        variant.urlizeMinioFields(minio_client=minio_client)
+
+        result.variants.append(
+            product_rest.GetProductDetailRespData__VariantsItem(
+                **variant.model_dump(exclude={"product_variant_type_name"}),
+                product_varian_type_name=variant.product_variant_type_name,
+                localized_price=localized_price if variant.price else "",
+                localized_price_currency=price_currency if variant.price else "",
+            )
+        )
+
+    return result
+
+
+def _detailValidators(
+    product_id: str,
+    version: Optional[product_dto.GetProductDetailVersionResItem],
+    current_user: auth_dto.CurrentUser,
+) -> Optional[tuple[str, datetime]]:
+    if not version:
+        return None
+
+    etag = resp_utils.etag(
+        "product",
+        product_id,
+        version.model_dump(),
+        current_user.language,
+        current_user.currency,
+        ExchangeRateTable.version(),
+        PresignedUrlCache.urlsWindow(),
+    )
+    return etag, version.lastModified
+
+
+def _suggest(
+    query: product_rest.GetProductSuggestReq,
+) -> product_rest.GetProductSuggestRespData:
+    """
+    served from memory by SuggestIndex, no query
+    """
+    limit = min(max(query.limit, 1), 50)
+    results = SuggestIndex.search(query.query, limit=limit)
+    return product_rest.GetProductSuggestRespData(
+        **{
+            kind: [
+                product_rest.GetProductSuggestRespDataItem(id=id, name=name)
+                for id, name, _ in entries
+            ]
+            for kind, entries in results.items()
+        }
+    )
+
+
+def _productNotFound() -> CustomHttpException:
+    exc = CustomHttpException(
+        status_code=500,
+        message="Product not found",
+    )
+    logger.error(exc)
+    return exc
 
 
 class ProductService:
+    """
+    product reads for sync `def` handlers (run on the threadpool), kept while
+    handlers move to AsyncProductService. both share the helpers above, only the
+    repository calls differ.
+    """
+
     def __init__(
         self,
         product_repo: product_repo.ProductRepo = Depends(),
-        user_repo: user_repo.UserRepo = Depends(),
         minio_client: Minio = Depends(getMinioClient),
     ):
         self.product_repo = product_repo
-        self.user_repo = user_repo
         self.minio_client = minio_client
 
     def getList(
-        self, query: product_rest.GetProductListReq, curr_user_id: str
-    ) -> tuple[list[product_rest.GetProductListRespDataItem], int]:
-        current_user = self.user_repo.getById(id=curr_user_id)
-        if not current_user:
-            exc = CustomHttpException(
-                status_code=500,
-                message="User not found",
+        self, query: product_rest.GetProductListReq, current_user: auth_dto.CurrentUser
+    ) -> product_rest.GetProductListRespData:
+        try:
+            products, _, next_cursor, facets = self.product_repo.getList(
+                **_listFilter(query), **_listPage(query)
             )
-            logger.error(exc)
-            raise exc
-
-        sort_order = -1 if query.sort_order == "desc" else 1
-        products, count = self.product_repo.getList(
-            category_id=query.category_id,
-            query=query.query,
-            query_by=query.query_by,
-            sort_by=query.sort_by,
-            sort_order=sort_order,
-            skip=helper.generateSkip(query.page, query.limit),
-            limit=query.limit,
-            do_count=True,
-            lookup_variants=True,
-        )
+        except ValueError as e:
+            raise _invalidCursor(e)
 
-        result = []
-        for product in products:
-            res_item = product_rest.GetProductListRespDataItem(
-                id=product.id, name=product.name
-            )
+        count, exact = self.product_repo.countList(
+            **_listFilter(query), exact=query.exact
+        )
 
-            # use default variant
-            first_variant = product.variants_[0] if product.variants_ else None
-            if first_variant:
-                res_item.price = first_variant.price
-                res_item.image = (
-                    first_variant.image or product.images[0] if product.images else None
-                )
+        data = _listRespItems(
+            products=products,
+            minio_client=self.minio_client,
+            language_code=current_user.language,
+            currency_code=current_user.currency,
+        )
+        return _listRespData(query, data, count, exact, next_cursor, facets)
 
-            res_item.asResponse(
-                minio_client=self.minio_client,
-                language_code=current_user.language,
-                currency_code=current_user.currency,
-            )
-            result.append(res_item)
+    def suggest(
+        self, query: product_rest.GetProductSuggestReq
+    ) -> product_rest.GetProductSuggestRespData:
+        return _suggest(query)
 
-        return result, count
+    def getProductDetailValidators(
+        self, product_id: str, current_user: auth_dto.CurrentUser
+    ) -> Optional[tuple[str, datetime]]:
+        """
+        see AsyncProductService.getProductDetailValidators
+        """
+        version = self.product_repo.getDetailVersion(id=product_id)
+        return _detailValidators(product_id, version, current_user)
 
     def getProductDetail(
-        self, product_id: str, curr_user_id: str
+        self, product_id: str, current_user: auth_dto.CurrentUser
     ) -> product_rest.GetProductDetailRespData:
-        existing_product = self.product_repo.getById(id=product_id)
-        if not existing_product:
-            exc = CustomHttpException(
-                status_code=500,
-                message="Product not found",
-            )
-            logger.error(exc)
-            raise exc
-
-        current_user = self.user_repo.getById(id=curr_user_id)
-        if not current_user:
-            exc = CustomHttpException(
-                status_code=500,
-                message="User not found",
-            )
-            logger.error(exc)
-            raise exc
+        product = self.product_repo.getDetail(id=product_id)
+        if not product:
+            raise _productNotFound()
+
+        return _detailResp(
+            product=product, minio_client=self.minio_client, current_user=current_user
+        )
 
-        existing_product.urlizeMinioFields(minio_client=self.minio_client)
-        result = product_rest.GetProductDetailRespData(**existing_product.model_dump())
 
-        # get product variants
-        variants = self.product_repo.getProductVariants(product_id=product_id)
-        for variant in variants:
-            # urlize minio fields
-            variant.urlizeMinioFields(minio_client=self.minio_client)
+class AsyncProductService:
+    """
+    ProductService for `async def` handlers
+    """
 
-            # prepare response
-            variant_res_item = product_rest.GetProductDetailRespData__VariantsItem(
-                **variant.model_dump()
+    def __init__(
+        self,
+        product_repo: product_repo.AsyncProductRepo = Depends(),
+        minio_client: Minio = Depends(getMinioClient),
+    ):
+        self.product_repo = product_repo
+        self.minio_client = minio_client
+
+    async def getList(
+        self, query: product_rest.GetProductListReq, current_user: auth_dto.CurrentUser
+    ) -> product_rest.GetProductListRespData:
+        try:
+            products, _, next_cursor, facets = await self.product_repo.getList(
+                **_listFilter(query), **_listPage(query)
             )
+        except ValueError as e:
+            raise _invalidCursor(e)
+
+        count, exact = await self.product_repo.countList(
+            **_listFilter(query), exact=query.exact
+        )
 
-            # lookup variant type if any
-            if variant.product_variant_type_id:
-                variant_type = self.product_repo.getOneVariantType(id=variant.product_variant_type_id)
-                if variant_type:
-                    variant_res_item.product_varian_type_name = variant_type.name
+        data = _listRespItems(
+            products=products,
+            minio_client=self.minio_client,
+            language_code=current_user.language,
+            currency_code=current_user.currency,
+        )
+        return _listRespData(query, data, count, exact, next_cursor, facets)
 
-            # localize price
-            if variant.price:
-                variant_res_item.localized_price = helper.localizePrice(
-                    variant.price, current_user.currency, current_user.language
+    async def getListBody(
+        self, query: product_rest.GetProductListReq, current_user: auth_dto.CurrentUser
+    ) -> bytes:
+        """
+        serialized GET /products response. cached per catalog version (products,
+        variants and the categories named in the facets), exchange rates and the user
+        language and currency (see ResponseCache).
+        """
+        key = ResponseCache.key(
+            "products",
+            await self.product_repo.catalogVersion(),
+            ExchangeRateTable.version(),
+            current_user.language,
+            current_user.currency,
+            _listCacheQuery(query),
+        )
+
+        async def build() -> bytes:
+            paginated_data = await self.getList(query=query, current_user=current_user)
+            return resp_utils.dumpJson(
+                generic_resp.RespData[product_rest.GetProductListRespData](
+                    data=paginated_data
                 )
+            )
+
+        return await ResponseCache.getOrBuild(key, build)
 
-            result.variants.append(variant_res_item)
+    def suggest(
+        self, query: product_rest.GetProductSuggestReq
+    ) -> product_rest.GetProductSuggestRespData:
+        return _suggest(query)
 
-        return result
+    async def getProductDetailValidators(
+        self, product_id: str, current_user: auth_dto.CurrentUser
+    ) -> Optional[tuple[str, datetime]]:
+        """
+        (etag, last modified) of the getProductDetail() response, without loading
+        the product. None if not found.
+        """
+        version = await self.product_repo.getDetailVersion(id=product_id)
+        return _detailValidators(product_id, version, current_user)
+
+    async def getProductDetail(
+        self, product_id: str, current_user: auth_dto.CurrentUser
+    ) -> product_rest.GetProductDetailRespData:
+        product = await self.product_repo.getDetail(id=product_id)
+        if not product:
+            raise _productNotFound()
+
+        return _detailResp(
+            product=product, minio_client=self.minio_client, current_user=current_user
+        )
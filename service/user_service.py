@@ -9,6 +9,7 @@ from domain.rest import user_rest
 from core.exceptions.http import CustomHttpException
 from utils import bcrypt as bcrypt_utils
 from utils import helper
+from utils import auth_cache
 from config.minio import getMinioClient
 from minio import Minio
 
@@ -104,6 +105,7 @@ class UserService:
             exc = CustomHttpException(status_code=500, message="Failed to update user")
             logger.error(exc)
             raise exc
+        auth_cache.invalidateUser(user_id=user.id)
 
         user.urlizeMinioFields(self.minio_client)
         return user_rest.UpdateProfileRespData(**user.model_dump())
@@ -161,6 +163,7 @@ class UserService:
         user.updated_by = user_id
         user.password = bcrypt_utils.hashPassword(payload.new_password)
         self.user_repo.update(id=user.id, data=user)
+        auth_cache.invalidateUser(user_id=user.id)
 
         user.urlizeMinioFields(self.minio_client)
         return user_rest.UpdatePasswordRespData(**user.model_dump())
@@ -176,6 +179,7 @@ class UserService:
             logger.error(exc)
             raise exc
 
+        auth_cache.invalidateUser(user_id=user_id)
         self.refresh_token_repo.deleteManyByCreatedBy(created_by=user_id)
         self.otp_repo.deleteManyByCreatedBy(created_by=user_id)
 
@@ -226,6 +230,7 @@ class UserService:
             exc = CustomHttpException(status_code=500, message="Failed to update user")
             logger.error(exc)
             raise exc
+        auth_cache.invalidateUser(user_id=user.id)
 
         user.urlizeMinioFields(minio_client=self.minio_client)
         return user_rest.UpdateProfilePictRespData(**user.model_dump())
\ No newline at end of file
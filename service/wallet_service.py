@@ -8,6 +8,7 @@ from domain.model import user_model, wallet_model
 from domain.rest import wallet_rest
 from repository import user_repo, wallet_repo
 from utils import helper
+from utils.exchange_rate import ExchangeRateTable, MissingExchangeRateError
 
 
 class WalletService:
@@ -48,8 +49,23 @@ class WalletService:
         add topup method handling here if any
         """
 
-        # add wallet balance
-        wallet.balance += payload.amount
+        if not wallet.currency:
+            # wallet of an older version, saved below with the balance
+            wallet.currency = user.currency
+
+        # add wallet balance, the amount is in the user's currency
+        try:
+            wallet.balance += ExchangeRateTable.convertExact(
+                payload.amount, user.currency, wallet.currency
+            )
+        except MissingExchangeRateError as e:
+            exc = CustomHttpException(
+                status_code=400,
+                message="Top up amount can't be converted to the wallet currency",
+                detail=str(e),
+            )
+            logger.error(exc)
+            raise exc
         wallet.updated_at = helper.timeNow()
         try:
             logger.debug(f"updating wallet of user {user.id}")
@@ -62,13 +78,17 @@ class WalletService:
             raise exc
 
         # resp data
-        localized_balance = helper.localizePrice(
-            price=wallet.balance,
-            currency_code=user.currency,
-            language_code=user.language,
+        balance, balance_currency = ExchangeRateTable.convert(
+            wallet.balance, wallet.currency, user.currency
         )
         resp_data = wallet_rest.TopUpWalletRespData(
-            **wallet.model_dump(), localized_balance=localized_balance
+            **wallet.model_dump(),
+            localized_balance=helper.localizePrice(
+                price=balance,
+                currency_code=balance_currency,
+                language_code=user.language,
+            ),
+            localized_balance_currency=balance_currency,
         )
 
         return resp_data
@@ -96,6 +116,7 @@ class WalletService:
                 created_at=helper.timeNow(),
                 updated_at=helper.timeNow(),
                 user_id=user.id,
+                currency=user.currency,
             )
 
             try:
@@ -107,13 +128,23 @@ class WalletService:
                 logger.debug(f"failed to create wallet of user {user.id}: {exc}")
                 raise exc
 
+        elif not wallet.currency:
+            # wallet of an older version, its balance is in the owner's currency
+            # until the owner changes it, pin it now
+            wallet.currency = user.currency
+            self.wallet_repo.pinCurrency(id=wallet.id, currency=wallet.currency)
+
         # resp data
-        localized_balance = helper.localizePrice(
-            price=wallet.balance,
-            currency_code=user.currency,
-            language_code=user.language,
+        balance, balance_currency = ExchangeRateTable.convert(
+            wallet.balance, wallet.currency, user.currency
         )
         resp_data = wallet_rest.GetWalletRespData(
-            **wallet.model_dump(), localized_balance=localized_balance
+            **wallet.model_dump(),
+            localized_balance=helper.localizePrice(
+                price=balance,
+                currency_code=balance_currency,
+                language_code=user.language,
+            ),
+            localized_balance_currency=balance_currency,
         )
         return resp_data
@@ -0,0 +1,142 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from config.env import Env
+from domain.dto import auth_dto
+
+
+class UserSnapshotCache:
+    """
+    per worker snapshot of authenticated users, so verifying a token doesn't need
+    to hit mongodb on every request.
+    entries are reloaded from db after `Env.USER_SNAPSHOT_TTL_SECONDS`.
+    """
+
+    _entries: "OrderedDict[str, tuple[auth_dto.CurrentUser, float]]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, user_id: str) -> Optional[auth_dto.CurrentUser]:
+        with cls._lock:
+            entry = cls._entries.get(user_id)
+            if not entry:
+                return None
+
+            user, loaded_at = entry
+            if time.monotonic() - loaded_at > Env.USER_SNAPSHOT_TTL_SECONDS:
+                cls._entries.pop(user_id, None)
+                return None
+
+            cls._entries.move_to_end(user_id)
+            return user
+
+    @classmethod
+    def set(cls, user: auth_dto.CurrentUser):
+        with cls._lock:
+            cls._entries[user.id] = (user, time.monotonic())
+            cls._entries.move_to_end(user.id)
+            while len(cls._entries) > Env.USER_SNAPSHOT_MAX_SIZE:
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, user_id: str):
+        with cls._lock:
+            cls._entries.pop(user_id, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+
+
+class VerifiedTokenCache:
+    """
+    per worker LRU cache of verified access tokens, keyed by sha256 digest of the token.
+    an entry live for `Env.TOKEN_CACHE_TTL_SECONDS` but never longer than the token `exp`.
+    """
+
+    _entries: "OrderedDict[bytes, tuple[auth_dto.CurrentUser, float]]" = OrderedDict()
+    _digests_by_user: dict[str, set[bytes]] = {}
+    _lock = threading.Lock()
+    _hits: int = 0
+    _misses: int = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    @classmethod
+    def get(cls, digest: bytes) -> Optional[auth_dto.CurrentUser]:
+        with cls._lock:
+            entry = cls._entries.get(digest)
+            if entry and entry[1] > time.time():
+                cls._entries.move_to_end(digest)
+                cls._hits += 1
+                return entry[0]
+
+            if entry:
+                cls._pop(digest)
+            cls._misses += 1
+            return None
+
+    @classmethod
+    def set(cls, digest: bytes, user: auth_dto.CurrentUser, exp: int):
+        expires_at = min(time.time() + Env.TOKEN_CACHE_TTL_SECONDS, exp)
+        with cls._lock:
+            cls._pop(digest)
+            cls._entries[digest] = (user, expires_at)
+            cls._digests_by_user.setdefault(user.id, set()).add(digest)
+            while len(cls._entries) > Env.TOKEN_CACHE_MAX_SIZE:
+                cls._pop(next(iter(cls._entries)))
+
+    @classmethod
+    def invalidateUser(cls, user_id: str):
+        with cls._lock:
+            for digest in list(cls._digests_by_user.get(user_id) or []):
+                cls._pop(digest)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._digests_by_user.clear()
+            cls._hits = 0
+            cls._misses = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            total = cls._hits + cls._misses
+            return {
+                "size": len(cls._entries),
+                "max_size": Env.TOKEN_CACHE_MAX_SIZE,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_ratio": cls._hits / total if total else 0,
+            }
+
+    @classmethod
+    def _pop(cls, digest: bytes):
+        """
+        caller must hold the lock
+        """
+        entry = cls._entries.pop(digest, None)
+        if not entry:
+            return
+
+        user_digests = cls._digests_by_user.get(entry[0].id)
+        if user_digests:
+            user_digests.discard(digest)
+            if not user_digests:
+                cls._digests_by_user.pop(entry[0].id, None)
+
+
+def invalidateUser(user_id: str):
+    """
+    call this after any write that change the user, so the next request see fresh data
+    """
+    VerifiedTokenCache.invalidateUser(user_id=user_id)
+    UserSnapshotCache.invalidate(user_id=user_id)
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from typing import Optional, Union
+
+from pymongo import ReturnDocument
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.collection import Collection
+
+from config.env import Env
+from utils.mongodb import META_COLL_NAME
+
+
+class CollVersion:
+    """
+    write counter of a collection, stored in `_meta` collection so every worker see it.
+    repositories bump it after each write, per worker caches tag their entries with it
+    and treat entries of an older version as stale.
+    the stored version is re-read at most once per `Env.COLL_VERSION_CHECK_SECONDS`,
+    writes done by this worker are seen immediately.
+    """
+
+    _versions: dict[str, tuple[int, float]] = {}  # full_name: (version, checked_at)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _docId(coll: Union[Collection, AsyncCollection]) -> str:
+        return f"version:{coll.name}"
+
+    @classmethod
+    def _cached(cls, coll: Union[Collection, AsyncCollection]) -> Optional[int]:
+        with cls._lock:
+            entry = cls._versions.get(coll.full_name)
+        if entry and time.monotonic() - entry[1] < Env.COLL_VERSION_CHECK_SECONDS:
+            return entry[0]
+        return None
+
+    @classmethod
+    def get(cls, coll: Collection) -> int:
+        version = cls._cached(coll)
+        if version != None:
+            return version
+
+        doc = coll.database[META_COLL_NAME].find_one({"_id": cls._docId(coll)})
+        version = (doc or {}).get("version") or 0
+        cls._store(coll, version)
+        return version
+
+    @classmethod
+    async def getAsync(cls, coll: AsyncCollection) -> int:
+        version = cls._cached(coll)
+        if version != None:
+            return version
+
+        doc = await coll.database[META_COLL_NAME].find_one({"_id": cls._docId(coll)})
+        version = (doc or {}).get("version") or 0
+        cls._store(coll, version)
+        return version
+
+    @classmethod
+    def bump(cls, coll: Collection) -> int:
+        doc = coll.database[META_COLL_NAME].find_one_and_update(
+            {"_id": cls._docId(coll)},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        cls._store(coll, doc["version"])
+        return doc["version"]
+
+    @classmethod
+    def _store(cls, coll: Union[Collection, AsyncCollection], version: int):
+        with cls._lock:
+            entry = cls._versions.get(coll.full_name)
+            # a concurrent reader may have stored a version older than ours
+            if entry and entry[0] > version:
+                version = entry[0]
+            cls._versions[coll.full_name] = (version, time.monotonic())
@@ -0,0 +1,26 @@
+import json
+
+from config.env import Env
+from utils.ttl_cache import TtlCache
+
+
+class CountCache(TtlCache):
+    """
+    per worker LRU cache of filtered list totals, keyed by collection, collection
+    version and the filter, so a write to the collection makes every cached total
+    of it stale.
+    """
+
+    versioned = True
+
+    @staticmethod
+    def ttlSeconds() -> float:
+        return Env.COUNT_CACHE_TTL_SECONDS
+
+    @staticmethod
+    def maxSize() -> int:
+        return Env.COUNT_CACHE_MAX_SIZE
+
+    @staticmethod
+    def key(coll_name: str, version: int, filter: dict) -> tuple[str, int, str]:
+        return coll_name, version, json.dumps(filter, sort_keys=True, default=str)
@@ -0,0 +1,241 @@
+import math
+import threading
+import time
+from typing import Optional
+
+from config.env import Env
+from core.logging import logger
+from repository import exchange_rate_repo
+
+
+class MissingExchangeRateError(ValueError):
+    """
+    no rate to convert from or to `currency`
+    """
+
+    def __init__(self, currency: str):
+        super().__init__(f"no exchange rate for {currency}")
+        self.currency = currency
+
+
+class ExchangeRateTable:
+    """
+    per worker table of `exchange_rates`, reloaded by a background thread every
+    `Env.EXCHANGE_RATE_REFRESH_SECONDS`, so converting a price never hits mongodb.
+    rates are units of a currency for 1 `Env.EXCHANGE_RATE_BASE_CURRENCY`.
+    a price in a currency without a rate is left in it (logged once, counted in
+    `stats()`), conversions return the currency their amount ended up in.
+    call `init()` on app startup and `close()` on shutdown.
+    """
+
+    # replaced as a whole on refresh, readers don't need the lock
+    _rates: dict[str, float] = {}
+    _lock = threading.Lock()
+    _loaded_at: float = 0  # monotonic
+    _refreshes: int = 0
+    _version: int = 0  # bumped when the rates change
+    _refresh_failures: int = 0
+    _missing_rates: dict[str, int] = {}  # currency: conversions without a rate
+    _exchange_rate_repo: Optional[exchange_rate_repo.ExchangeRateRepo] = None
+    _stop_event: Optional[threading.Event] = None
+    _thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def init(
+        cls,
+        exchange_rate_repo: exchange_rate_repo.ExchangeRateRepo,
+        interval_seconds: float,
+    ):
+        cls.load(exchange_rate_repo=exchange_rate_repo)
+        cls._stop_event = threading.Event()
+        cls._thread = threading.Thread(
+            target=cls._run,
+            args=(interval_seconds,),
+            name="exchange-rate-table",
+            daemon=True,
+        )
+        cls._thread.start()
+
+    @classmethod
+    def load(cls, exchange_rate_repo: exchange_rate_repo.ExchangeRateRepo) -> int:
+        """
+        load the rates once, without the refresh thread (command line tasks)
+        """
+        cls._exchange_rate_repo = exchange_rate_repo
+        return cls.refresh()
+
+    @classmethod
+    def refresh(cls) -> int:
+        if not cls._exchange_rate_repo:
+            return 0
+
+        try:
+            exchange_rates = cls._exchange_rate_repo.getAll()
+        except Exception as e:
+            logger.warning(f"failed to refresh exchange rates: {e}")
+            with cls._lock:
+                cls._refresh_failures += 1
+            return 0
+
+        rates = {item.currency: item.rate for item in exchange_rates}
+        rates[Env.EXCHANGE_RATE_BASE_CURRENCY] = 1.0
+        with cls._lock:
+            if rates != cls._rates:
+                cls._version += 1
+            cls._rates = rates
+            cls._loaded_at = time.monotonic()
+            cls._refreshes += 1
+        return len(rates)
+
+    @classmethod
+    def setRates(cls, rates: dict[str, float]):
+        """
+        replace the table without a repository (seeding, benchmarks)
+        """
+        with cls._lock:
+            cls._rates = {**rates, Env.EXCHANGE_RATE_BASE_CURRENCY: 1.0}
+            cls._loaded_at = time.monotonic()
+            cls._version += 1
+
+    @classmethod
+    def close(cls):
+        if cls._stop_event:
+            cls._stop_event.set()
+        if cls._thread:
+            cls._thread.join()
+        cls._thread = None
+        cls._stop_event = None
+
+    @classmethod
+    def _run(cls, interval_seconds: float):
+        while not cls._stop_event.wait(interval_seconds):
+            cls.refresh()
+
+    @classmethod
+    def version(cls) -> int:
+        """
+        changes whenever the rates do, for caches of converted prices
+        """
+        return cls._version
+
+    @classmethod
+    def hasRate(cls, currency: str) -> bool:
+        return currency == Env.EXCHANGE_RATE_BASE_CURRENCY or currency in cls._rates
+
+    @classmethod
+    def factor(cls, from_currency: str, to_currency: str) -> Optional[float]:
+        """
+        multiplier from `from_currency` to `to_currency`, None if either has no rate
+        """
+        if from_currency == to_currency:
+            return 1.0
+
+        rates = cls._rates
+        from_rate = rates.get(from_currency)
+        to_rate = rates.get(to_currency)
+        if from_rate == None or to_rate == None:
+            with cls._lock:
+                for currency in (from_currency, to_currency):
+                    if currency in rates:
+                        continue
+                    if currency not in cls._missing_rates:
+                        logger.warning(
+                            f"no exchange rate for {currency}, "
+                            "amounts in it are left unconverted"
+                        )
+                    cls._missing_rates[currency] = (
+                        cls._missing_rates.get(currency, 0) + 1
+                    )
+            return None
+
+        return to_rate / from_rate
+
+    @classmethod
+    def convert(
+        cls, amount: float, from_currency: str, to_currency: str
+    ) -> tuple[float, str]:
+        """
+        return (amount, currency): in `to_currency`, or unchanged in `from_currency`
+        if there is no rate between them
+        """
+        factor = cls.factor(from_currency, to_currency)
+        if factor == None:
+            return amount, from_currency
+        return amount * factor, to_currency
+
+    @classmethod
+    def convertExact(
+        cls, amount: float, from_currency: str, to_currency: str
+    ) -> float:
+        """
+        amount in `to_currency`, for balances where an unconverted amount won't do.
+        raise MissingExchangeRateError if there is no rate between them.
+        """
+        factor = cls.factor(from_currency, to_currency)
+        if factor == None:
+            missing = to_currency if cls.hasRate(from_currency) else from_currency
+            raise MissingExchangeRateError(missing)
+        return amount * factor
+
+    @classmethod
+    def convertMany(
+        cls, amounts: list[float], from_currencies: list[str], to_currency: str
+    ) -> list[tuple[float, str]]:
+        """
+        convert() every amount, one factor lookup per distinct currency
+        """
+        factors = {
+            currency: cls.factor(currency, to_currency)
+            for currency in set(from_currencies)
+        }
+        return [
+            (amount, currency)
+            if factors[currency] == None
+            else (amount * factors[currency], to_currency)
+            for amount, currency in zip(amounts, from_currencies)
+        ]
+
+    @classmethod
+    def convertTotal(
+        cls, amounts: list[float], from_currencies: list[str], to_currency: str
+    ) -> tuple[float, str]:
+        """
+        return (sum of the amounts, currency): in `to_currency`, or in the currency
+        of every amount if that one has no rate. amounts are summed per currency
+        first, so each currency is converted once whatever the number of amounts.
+        raise MissingExchangeRateError if amounts of several currencies can't all be
+        converted.
+        """
+        totals: dict[str, list[float]] = {}
+        for amount, currency in zip(amounts, from_currencies):
+            totals.setdefault(currency, []).append(amount)
+
+        if len(totals) == 1:
+            [(currency, currency_amounts)] = totals.items()
+            return cls.convert(math.fsum(currency_amounts), currency, to_currency)
+
+        factors = {currency: cls.factor(currency, to_currency) for currency in totals}
+        for currency, factor in factors.items():
+            if factor == None:
+                missing = currency if not cls.hasRate(currency) else to_currency
+                raise MissingExchangeRateError(missing)
+
+        total = math.fsum(
+            math.fsum(currency_amounts) * factors[currency]
+            for currency, currency_amounts in totals.items()
+        )
+        return total, to_currency
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "base_currency": Env.EXCHANGE_RATE_BASE_CURRENCY,
+                "currencies": len(cls._rates),
+                "age_seconds": (
+                    time.monotonic() - cls._loaded_at if cls._loaded_at else 0
+                ),
+                "refreshes": cls._refreshes,
+                "refresh_failures": cls._refresh_failures,
+                "missing_rates": dict(cls._missing_rates),
+            }
@@ -0,0 +1,27 @@
+from config.env import Env
+from utils.ttl_cache import TtlCache
+
+
+class FacetCache(TtlCache):
+    """
+    per worker cache of the facets of the unfiltered product list, so the landing page
+    doesn't count the whole catalog on every hit.
+    keyed by collection, (products, categories) collection versions, the facets show
+    category names, and the requested facets.
+    """
+
+    versioned = True
+
+    @staticmethod
+    def ttlSeconds() -> float:
+        return Env.FACET_CACHE_TTL_SECONDS
+
+    @staticmethod
+    def maxSize() -> int:
+        return Env.FACET_CACHE_MAX_SIZE
+
+    @staticmethod
+    def key(
+        coll_name: str, version: tuple[int, int], facets: list[str]
+    ) -> tuple[str, tuple[int, int], tuple[str, ...]]:
+        return coll_name, version, tuple(sorted(facets))
@@ -1,3 +1,4 @@
+import functools
 import json
 import mimetypes
 import random
@@ -7,7 +8,9 @@ from uuid import uuid4
 
 from babel import Locale
 from typing import Optional
-from babel.numbers import get_currency_symbol, format_currency
+from babel.numbers import get_currency_symbol
+
+from utils.price_format import PriceFormatterRegistry
 
 
 def parseBool(source: any) -> bool:
@@ -29,7 +32,7 @@ def timeNow() -> datetime:
 
 
 def prettyJson(data: any) -> str:
-    return json.dumps(data, indent=4)
+    return json.dumps(data, indent=4, default=str)
 
 
 def limitString(input: str, limit: int = 200) -> str:
@@ -70,6 +73,7 @@ def isPasswordValid(password: str, length: int = 6) -> bool:
     return True
 
 
+@functools.lru_cache(maxsize=1024)
 def isLanguageCodeValid(language_code: str) -> bool:
     try:
         Locale.parse(language_code)
@@ -78,6 +82,7 @@ def isLanguageCodeValid(language_code: str) -> bool:
         return False
 
 
+@functools.lru_cache(maxsize=1024)
 def isCurrencyCodeValid(currency_code: str, locale: Optional[str] = None) -> bool:
     try:
         get_currency_symbol(currency_code, locale=Locale(locale))
@@ -95,12 +100,47 @@ def getMimeType(string: str) -> str:
 
 def localizePrice(price: float, currency_code: str, language_code: str) -> str:
     try:
-        locale = Locale(language_code)
-        return format_currency(price, currency_code, locale=locale)
+        formatter = PriceFormatterRegistry.get(language_code, currency_code)
+        return formatter.format(price) if formatter else ""
     except Exception as e:
         return ""
 
 
+def localizePrices(
+    prices: list[float], currency_code: str, language_code: str
+) -> list[str]:
+    """
+    localizePrice() of every price with one formatter lookup, for list responses
+    """
+    formatter = PriceFormatterRegistry.get(language_code, currency_code)
+    if not formatter:
+        return [""] * len(prices)
+    try:
+        return formatter.formatMany(prices)
+    except Exception as e:
+        return [localizePrice(price, currency_code, language_code) for price in prices]
+
+
+def localizeMixedPrices(
+    prices: list[float], currency_codes: list[str], language_code: str
+) -> list[str]:
+    """
+    localizePrices() of prices in several currencies, one call per currency
+    """
+    indexes: dict[str, list[int]] = {}
+    for i, currency_code in enumerate(currency_codes):
+        indexes.setdefault(currency_code, []).append(i)
+
+    localized = [""] * len(prices)
+    for currency_code, currency_indexes in indexes.items():
+        currency_prices = localizePrices(
+            [prices[i] for i in currency_indexes], currency_code, language_code
+        )
+        for i, localized_price in zip(currency_indexes, currency_prices):
+            localized[i] = localized_price
+    return localized
+
+
 def isImage(filename: str) -> bool:
     mimetype = getMimeType(filename)
     if mimetype and mimetype.startswith("image"):
@@ -0,0 +1,72 @@
+import threading
+from datetime import datetime
+from typing import Optional
+
+from core.logging import logger
+from repository import user_repo
+
+
+class LastActiveBuffer:
+    """
+    write-behind buffer for users.last_active.
+    requests only record the latest timestamp per user in memory, a background thread
+    flushes all of them with one bulk_write every interval.
+    call `init()` on app startup and `close()` on shutdown (it flushes the remaining buffer).
+    """
+
+    _pending: dict[str, datetime] = {}
+    _lock = threading.Lock()
+    _user_repo: Optional[user_repo.UserRepo] = None
+    _stop_event: Optional[threading.Event] = None
+    _thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def init(cls, user_repo: user_repo.UserRepo, interval_seconds: float):
+        cls._user_repo = user_repo
+        cls._stop_event = threading.Event()
+        cls._thread = threading.Thread(
+            target=cls._run,
+            args=(interval_seconds,),
+            name="last-active-buffer",
+            daemon=True,
+        )
+        cls._thread.start()
+
+    @classmethod
+    def touch(cls, user_id: str, last_active: datetime):
+        with cls._lock:
+            prev = cls._pending.get(user_id)
+            if not prev or prev < last_active:
+                cls._pending[user_id] = last_active
+
+    @classmethod
+    def flush(cls) -> int:
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+
+        if not pending or not cls._user_repo:
+            return 0
+
+        try:
+            return cls._user_repo.bulkUpdateLastActive(last_actives=pending)
+        except Exception as e:
+            logger.warning(f"failed to flush last_active of {len(pending)} users: {e}")
+            # put them back so the next flush retry them, unless newer values exist
+            for user_id, last_active in pending.items():
+                cls.touch(user_id=user_id, last_active=last_active)
+            return 0
+
+    @classmethod
+    def close(cls):
+        if cls._stop_event:
+            cls._stop_event.set()
+        if cls._thread:
+            cls._thread.join()
+        cls.flush()
+        cls._thread = None
+        cls._stop_event = None
+
+    @classmethod
+    def _run(cls, interval_seconds: float):
+        while not cls._stop_event.wait(interval_seconds):
+            cls.flush()
@@ -0,0 +1,186 @@
+import threading
+
+from pymongo import common, monitoring
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """
+    connection pool usage of the worker, summed over all servers and clients.
+    checkout wait is the time from asking the pool for a connection until getting one,
+    `saturated_checkouts` counts checkouts asked while all `maxPoolSize` connections
+    of the pool were already checked out (those wait for another request to give one
+    back). give each client its own listener, pools are told apart per instance.
+    the size of a pool is the one it was created with, from the client options or
+    MONGODB_URI.
+    """
+
+    _lock = threading.Lock()
+    _connections: int = 0
+    _checked_out: int = 0
+    _pool_checked_out: dict[tuple, int] = {}  # (listener, server address): checked out
+    _pool_max_size: dict[tuple, int] = {}  # (listener, server address): maxPoolSize
+    _max_checked_out: int = 0
+    _checkouts: int = 0
+    _saturated_checkouts: int = 0
+    _checkout_failures: dict[str, int] = {}
+    _wait_ms_total: float = 0
+    _wait_ms_max: float = 0
+
+    def pool_created(self, event):
+        with self._lock:
+            # options only has the ones that differ from the driver defaults
+            max_pool_size = event.options.get("maxPoolSize", common.MAX_POOL_SIZE)
+            self._pool_max_size[(id(self), event.address)] = max_pool_size
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            MongoPoolListener._connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            MongoPoolListener._connections -= 1
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            pool = (id(self), event.address)
+            max_pool_size = self._pool_max_size.get(pool, common.MAX_POOL_SIZE)
+            # 0: no limit
+            if max_pool_size and self._pool_checked_out.get(pool, 0) >= max_pool_size:
+                MongoPoolListener._saturated_checkouts += 1
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            failures = MongoPoolListener._checkout_failures
+            failures[event.reason] = failures.get(event.reason, 0) + 1
+            self._recordWait(event.duration)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            MongoPoolListener._checkouts += 1
+            MongoPoolListener._checked_out += 1
+            pool = (id(self), event.address)
+            self._pool_checked_out[pool] = self._pool_checked_out.get(pool, 0) + 1
+            MongoPoolListener._max_checked_out = max(
+                MongoPoolListener._max_checked_out, MongoPoolListener._checked_out
+            )
+            self._recordWait(event.duration)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            MongoPoolListener._checked_out -= 1
+            pool = (id(self), event.address)
+            self._pool_checked_out[pool] = self._pool_checked_out.get(pool, 0) - 1
+
+    @classmethod
+    def _recordWait(cls, duration: float):
+        if duration == None:
+            return
+        wait_ms = duration * 1000
+        cls._wait_ms_total += wait_ms
+        cls._wait_ms_max = max(cls._wait_ms_max, wait_ms)
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "max_pool_size": max(cls._pool_max_size.values(), default=0),
+                "connections": cls._connections,
+                "checked_out": cls._checked_out,
+                "max_checked_out": cls._max_checked_out,
+                # of the most used pool
+                "saturation": max(
+                    (
+                        checked_out / cls._pool_max_size[pool]
+                        for pool, checked_out in cls._pool_checked_out.items()
+                        if cls._pool_max_size.get(pool)
+                    ),
+                    default=0,
+                ),
+                "checkouts": cls._checkouts,
+                "saturated_checkouts": cls._saturated_checkouts,
+                "checkout_failures": dict(cls._checkout_failures),
+                "checkout_wait_ms_avg": (
+                    cls._wait_ms_total / cls._checkouts if cls._checkouts else 0
+                ),
+                "checkout_wait_ms_max": cls._wait_ms_max,
+            }
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """
+    latency of the commands sent by the worker, per collection and command name.
+    the collection is only in the started event, so it is kept until the command ends.
+    """
+
+    _lock = threading.Lock()
+    _pending: dict[tuple, tuple[str, str]] = {}
+    # (collection, command) -> [count, failures, total ms, max ms]
+    _commands: dict[tuple[str, str], list] = {}
+
+    @staticmethod
+    def _key(event) -> tuple:
+        return event.connection_id, event.request_id, event.operation_id
+
+    def started(self, event):
+        coll_name = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            coll_name = event.command.get("collection")
+        if not isinstance(coll_name, str):
+            coll_name = ""  # admin commands (hello, ping, endSessions, ...)
+
+        with self._lock:
+            MongoCommandListener._pending[self._key(event)] = (
+                coll_name,
+                event.command_name,
+            )
+
+    def succeeded(self, event):
+        self._record(event, failed=False)
+
+    def failed(self, event):
+        self._record(event, failed=True)
+
+    def _record(self, event, failed: bool):
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            key = MongoCommandListener._pending.pop(
+                self._key(event), ("", event.command_name)
+            )
+            entry = MongoCommandListener._commands.setdefault(key, [0, 0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += 1 if failed else 0
+            entry[2] += duration_ms
+            entry[3] = max(entry[3], duration_ms)
+
+    @classmethod
+    def stats(cls) -> list[dict]:
+        with cls._lock:
+            commands = list(cls._commands.items())
+
+        rows = []
+        for (coll_name, command_name), entry in sorted(commands):
+            count, failures, total_ms, max_ms = entry
+            rows.append(
+                {
+                    "collection": coll_name,
+                    "command": command_name,
+                    "count": count,
+                    "failures": failures,
+                    "avg_ms": total_ms / count,
+                    "max_ms": max_ms,
+                }
+            )
+
+        return rows
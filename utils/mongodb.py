@@ -1,56 +1,175 @@
+import hashlib
+import importlib
+import json
+import pkgutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from pydantic import BaseModel
 from pymongo.database import Database
-import os
-import inspect
-from domain.model.base_model import MyBaseModel
 
+import domain.model
 from core.logging import logger
+from domain.model.base_model import MyBaseModel, _MyBaseModel_Index, normalizeIndexSpec
+from utils import helper
 
+# stores fingerprint of the last applied index declarations
+META_COLL_NAME = "_meta"
+INDEX_FINGERPRINT_ID = "index_fingerprint"
 
-def ensureIndexes(db: Database):
-    logger.info("Ensuring mongodb collection indexes")
 
-    model_filenames = os.listdir("domain/model")
-    logger.debug(f"found model files: {model_filenames}")
-    for filename in model_filenames:
-        if filename.endswith(".py") and filename.removesuffix(".py") not in [
-            "__init__",
-            "base_model",
-        ]:
-            module_path = __import__(
-                f"domain.model.{filename[:-3]}", fromlist=[filename[:-3]]
+class IndexPlan(BaseModel):
+    coll_name: str
+    create: list[_MyBaseModel_Index] = []
+    drop: list[str] = []  # existing index names
+
+
+def getModels() -> list[type[MyBaseModel]]:
+    """
+    all models in domain/model that own a collection
+    """
+    models = []
+    for module_info in pkgutil.iter_modules(domain.model.__path__):
+        module = importlib.import_module(f"domain.model.{module_info.name}")
+        for member in vars(module).values():
+            if (
+                isinstance(member, type)
+                and issubclass(member, MyBaseModel)
+                and member.__module__ == module.__name__
+                and member.getCollName()
+                and member not in models
+            ):
+                models.append(member)
+
+    return models
+
+
+def getDeclaredIndexes() -> dict[str, list[_MyBaseModel_Index]]:
+    declared: dict[str, list[_MyBaseModel_Index]] = {}
+    for model in getModels():
+        indexes = declared.setdefault(model.getCollName(), [])
+        for index in model.getDefaultIndexes() + model.getCustomIndexes():
+            if index.spec() not in [item.spec() for item in indexes]:
+                indexes.append(index)
+
+    return declared
+
+
+def getIndexFingerprint(declared: dict[str, list[_MyBaseModel_Index]]) -> str:
+    payload = {
+        coll_name: sorted(json.dumps(index.spec(), sort_keys=True) for index in indexes)
+        for coll_name, indexes in declared.items()
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def planIndexes(
+    db: Database, declared: Optional[dict[str, list[_MyBaseModel_Index]]] = None
+) -> list[IndexPlan]:
+    """
+    diff declared indexes against `list_indexes()` of every collection.
+    existing indexes that are not declared (except `_id_`) are planned to be dropped,
+    so changing options of an index is a drop + create.
+    """
+    declared = declared if declared != None else getDeclaredIndexes()
+    plans = []
+    for coll_name, indexes in declared.items():
+        existing_indexes = [
+            item for item in db[coll_name].list_indexes() if item.get("name") != "_id_"
+        ]
+        plan = IndexPlan(coll_name=coll_name)
+
+        matched_names = []
+        for index in indexes:
+            spec = index.spec()
+            match = next(
+                (
+                    item
+                    for item in existing_indexes
+                    if item["name"] not in matched_names
+                    and normalizeIndexSpec(item, declared=spec) == spec
+                ),
+                None,
             )
-            for member_name, member in inspect.getmembers(module_path):
-                if (
-                    inspect.isclass(member)
-                    and member_name.lower().endswith("model")
-                    and member_name != "BaseModel"  # exclude pydantic.BaseModel
-                ):
-                    try:
-                        coll_name = member.getCollName()
-                        indexes = member.getDefaultIndexes() + member.getCustomIndexes()
-                        logger.info(f"\tEnsuring index for '{coll_name}' collection")
-                        existing_indexes = list(db[coll_name].list_indexes())
-                        for index in indexes:
-                            logger.info("\t\tchecking if index is exist")
-                            for i, key in enumerate(index.keys.copy()):
-                                keyname = key[0]
-                                keytype = key[1]
-                                for exist in existing_indexes:
-                                    if (
-                                        keyname in exist.get("key", {})
-                                        and exist.get("key", {})[keyname] == keytype
-                                        and exist.get("unique", False) == index.unique
-                                    ):
-                                        logger.info(
-                                            f"\t\t\tindex already exist: {index.model_dump()}"
-                                        )
-
-                                        # remove from index
-                                        index.keys.pop(i)
-
-                            if len(index.keys) != 0:
-                                logger.info(f"\t\tindex: {index.model_dump()}")
-                                db[coll_name].create_index(**index.model_dump())
-                                logger.info(f"\t\tcreated index: {index.model_dump()}")
-                    except Exception as e:
-                        logger.warning(f"\tFailed to create index: {e}")
+            if match:
+                matched_names.append(match["name"])
+            else:
+                plan.create.append(index)
+
+        plan.drop = [
+            item["name"] for item in existing_indexes if item["name"] not in matched_names
+        ]
+
+        if plan.create or plan.drop:
+            plans.append(plan)
+
+    return plans
+
+
+def printIndexPlan(plans: list[IndexPlan]):
+    if not plans:
+        logger.info("index plan: nothing to do")
+        return
+
+    for plan in plans:
+        logger.info(f"index plan for '{plan.coll_name}' collection")
+        for name in plan.drop:
+            logger.info(f"\t- drop   {name}")
+        for index in plan.create:
+            logger.info(f"\t+ create {index.spec()}")
+
+
+def applyIndexPlan(db: Database, plans: list[IndexPlan], max_workers: int = 8) -> bool:
+    """
+    indexes of different collections are built concurrently,
+    indexes of one collection are built in one `createIndexes` command.
+    """
+
+    def apply(plan: IndexPlan) -> bool:
+        coll = db[plan.coll_name]
+        try:
+            for name in plan.drop:
+                coll.drop_index(name)
+            if plan.create:
+                coll.create_indexes([index.toIndexModel() for index in plan.create])
+            return True
+        except Exception as e:
+            logger.warning(f"\tFailed to apply index plan of '{plan.coll_name}': {e}")
+            return False
+
+    if not plans:
+        return True
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(plans))) as executor:
+        return all(executor.map(apply, plans))
+
+
+def ensureIndexes(db: Database, force: bool = False, dry_run: bool = False):
+    """
+    sync collection indexes with `_MyBaseModel_Index` declarations of the models.
+    the work is skipped when declarations didn't change since the last successful run, unless `force`.
+    """
+    logger.info("Ensuring mongodb collection indexes")
+
+    declared = getDeclaredIndexes()
+    fingerprint = getIndexFingerprint(declared)
+    meta_coll = db[META_COLL_NAME]
+    if not force and not dry_run:
+        last = meta_coll.find_one({"_id": INDEX_FINGERPRINT_ID})
+        if last and last.get("fingerprint") == fingerprint:
+            logger.info("\tindex declarations unchanged, skip")
+            return
+
+    plans = planIndexes(db=db, declared=declared)
+    printIndexPlan(plans)
+    if dry_run:
+        return
+
+    if applyIndexPlan(db=db, plans=plans):
+        meta_coll.replace_one(
+            {"_id": INDEX_FINGERPRINT_ID},
+            {"fingerprint": fingerprint, "updated_at": helper.timeNow()},
+            upsert=True,
+        )
+    else:
+        logger.warning("\tsome index plans failed, fingerprint not stored")
@@ -0,0 +1,95 @@
+import base64
+from typing import Any, Literal, Optional
+
+from bson import json_util
+
+
+def encodeCursor(
+    sort_by: str, sort_order: Literal[-1, 1], last_doc: dict
+) -> str:
+    """
+    opaque cursor pointing right after `last_doc` in (sort_by, id) order
+    """
+    raw = json_util.dumps(
+        {
+            "s": sort_by,
+            "o": sort_order,
+            "v": last_doc.get(sort_by),
+            "id": last_doc.get("id"),
+        }
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decodeCursor(
+    cursor: str, sort_by: str, sort_order: Literal[-1, 1]
+) -> tuple[Any, str]:
+    """
+    return (sort value, id) of the cursor.
+    raise ValueError if the cursor is invalid or made for another sort.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data: dict = json_util.loads(raw)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {e}")
+
+    if not isinstance(data, dict) or "v" not in data or not data.get("id"):
+        raise ValueError("invalid cursor")
+
+    if data.get("s") != sort_by or data.get("o") != sort_order:
+        raise ValueError("cursor doesn't match sort_by and sort_order")
+
+    return data["v"], data["id"]
+
+
+def keysetMatch(
+    sort_by: str,
+    sort_order: Literal[-1, 1],
+    value: Any,
+    id: str,
+    nullable: bool = False,
+) -> dict:
+    """
+    $match that resume after (value, id), served by an index on (sort_by, id).
+    the range on sort_by bound the index scan, the $or only filter the ties.
+    null sorts first in mongodb but is never matched by $lt/$gt,
+    set `nullable` for fields that can be null so descending pages reach them.
+    """
+    op = "$lt" if sort_order == -1 else "$gt"
+    op_eq = "$lte" if sort_order == -1 else "$gte"
+    if value == None:
+        if sort_order == -1:
+            return {sort_by: None, "id": {op: id}}
+        return {"$or": [{sort_by: None, "id": {op: id}}, {sort_by: {"$ne": None}}]}
+
+    if nullable and sort_order == -1:
+        return {
+            "$or": [
+                {sort_by: {op: value}},
+                {sort_by: value, "id": {op: id}},
+                {sort_by: None},
+            ]
+        }
+
+    return {
+        sort_by: {op_eq: value},
+        "$or": [{sort_by: {op: value}}, {"id": {op: id}}],
+    }
+
+
+def getNextCursor(
+    docs: list[dict],
+    limit: Optional[int],
+    sort_by: str,
+    sort_order: Literal[-1, 1],
+) -> Optional[str]:
+    """
+    `docs` should be fetched with limit + 1, the extra doc only tell there is a next page
+    and will be removed from `docs`.
+    """
+    if not limit or len(docs) <= limit:
+        return None
+
+    del docs[limit:]
+    return encodeCursor(sort_by=sort_by, sort_order=sort_order, last_doc=docs[-1])
@@ -0,0 +1,165 @@
+import bisect
+import heapq
+from array import array
+from typing import Iterable, Iterator, Optional
+
+# (id, name, score)
+PrefixEntry = tuple[str, str, float]
+
+
+def normalizeName(name: str) -> str:
+    return " ".join(name.casefold().split())
+
+
+class PrefixIndex:
+    """
+    names sorted by their normalized form, so the names starting with a prefix are
+    one range found with bisect. a max segment tree over the scores gives the top-k
+    of a range in O(k log n), whatever the size of the range.
+    `put()`/`remove()` don't touch the sorted array: changed entries go to a small
+    sorted delta merged at search time, and removed ones are skipped. rebuild from
+    `entries()` when `needsCompaction()`.
+    not thread safe.
+    """
+
+    def __init__(self, entries: Iterable[PrefixEntry] = ()):
+        rows = sorted(
+            (normalizeName(name), id, name, score) for id, name, score in entries
+        )
+        self._keys = [row[0] for row in rows]
+        self._ids = [row[1] for row in rows]
+        self._names = [row[2] for row in rows]
+        self._scores = [row[3] for row in rows]
+        self._positions = {id: i for i, id in enumerate(self._ids)}
+        self._removed: set[int] = set()  # positions
+
+        # sorted (key, id) and {id: (key, name, score)}
+        self._delta_keys: list[tuple[str, str]] = []
+        self._delta: dict[str, tuple[str, str, float]] = {}
+
+        # tree[size + i] = i, tree[p] = position of the best score under p
+        self._size = 1
+        while self._size < len(rows):
+            self._size *= 2
+        tree = array("l", [-1]) * (2 * self._size)
+        tree[self._size : self._size + len(rows)] = array("l", range(len(rows)))
+        for node in range(self._size - 1, 0, -1):
+            tree[node] = self._best(tree[2 * node], tree[2 * node + 1])
+        self._tree = tree
+
+    def __len__(self) -> int:
+        return len(self._keys) - len(self._removed) + len(self._delta)
+
+    def _best(self, a: int, b: int) -> int:
+        # higher score first, then the first in name order
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        score_a, score_b = self._scores[a], self._scores[b]
+        if score_a > score_b or (score_a == score_b and a < b):
+            return a
+        return b
+
+    def _argmax(self, lo: int, hi: int) -> int:
+        """
+        position of the best score in [lo, hi), -1 if empty
+        """
+        best = -1
+        lo += self._size
+        hi += self._size
+        tree = self._tree
+        while lo < hi:
+            if lo & 1:
+                best = self._best(best, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                best = self._best(best, tree[hi])
+            lo >>= 1
+            hi >>= 1
+        return best
+
+    def put(self, id: str, name: str, score: float):
+        self.remove(id)
+        key = normalizeName(name)
+        bisect.insort(self._delta_keys, (key, id))
+        self._delta[id] = (key, name, score)
+
+    def remove(self, id: str):
+        position = self._positions.get(id)
+        if position != None:
+            self._removed.add(position)
+
+        entry = self._delta.pop(id, None)
+        if entry:
+            index = bisect.bisect_left(self._delta_keys, (entry[0], id))
+            del self._delta_keys[index]
+
+    def get(self, id: str) -> Optional[tuple[str, float]]:
+        """
+        (name, score) of `id`
+        """
+        if id in self._delta:
+            _, name, score = self._delta[id]
+            return name, score
+
+        position = self._positions.get(id)
+        if position == None or position in self._removed:
+            return None
+        return self._names[position], self._scores[position]
+
+    def entries(self) -> Iterator[PrefixEntry]:
+        for position, id in enumerate(self._ids):
+            if position not in self._removed:
+                yield id, self._names[position], self._scores[position]
+        for id, (_, name, score) in self._delta.items():
+            yield id, name, score
+
+    def needsCompaction(self) -> bool:
+        changed = len(self._delta) + len(self._removed)
+        return changed > max(1000, len(self._keys) // 20)
+
+    def search(self, prefix: str, limit: int = 10) -> list[PrefixEntry]:
+        """
+        entries whose normalized name starts with `prefix`, best score first
+        """
+        prefix = normalizeName(prefix)
+        if not prefix or limit <= 0:
+            return []
+        upper = prefix + "\U0010ffff"
+
+        results: list[tuple[float, str, str, str]] = []  # (score, key, id, name)
+
+        lo = bisect.bisect_left(self._keys, prefix)
+        hi = bisect.bisect_left(self._keys, upper, lo)
+        if lo < hi:
+            # best of each range on a heap, taking one splits its range in two
+            position = self._argmax(lo, hi)
+            heap = [(-self._scores[position], position, lo, hi)]
+            while heap and len(results) < limit:
+                _, position, lo, hi = heapq.heappop(heap)
+                if position not in self._removed:
+                    results.append(
+                        (
+                            self._scores[position],
+                            self._keys[position],
+                            self._ids[position],
+                            self._names[position],
+                        )
+                    )
+                for sub_lo, sub_hi in [(lo, position), (position + 1, hi)]:
+                    if sub_lo < sub_hi:
+                        best = self._argmax(sub_lo, sub_hi)
+                        heapq.heappush(
+                            heap, (-self._scores[best], best, sub_lo, sub_hi)
+                        )
+
+        lo = bisect.bisect_left(self._delta_keys, (prefix,))
+        hi = bisect.bisect_left(self._delta_keys, (upper,), lo)
+        for key, id in self._delta_keys[lo:hi]:
+            _, name, score = self._delta[id]
+            results.append((score, key, id, name))
+
+        results.sort(key=lambda result: (-result[0], result[1]))
+        return [(id, name, score) for score, _, id, name in results[:limit]]
@@ -0,0 +1,147 @@
+import decimal
+import re
+import threading
+from typing import Optional, Union
+
+from babel import Locale
+from babel.numbers import (
+    get_currency_precision,
+    get_currency_symbol,
+    get_decimal_symbol,
+    get_group_symbol,
+)
+
+
+class PriceFormatter:
+    """
+    `babel.numbers.format_currency(price, currency_code, locale=Locale(language_code))`
+    compiled once: affixes with the currency symbol, separators and precision are
+    looked up here instead of on every price.
+    patterns the compiled path doesn't cover (currency names, significant digits,
+    quotes in separators) are formatted by babel.
+    """
+
+    def __init__(self, language_code: str, currency_code: str):
+        self.locale = Locale(language_code)
+        self.currency_code = currency_code
+        self.pattern = self.locale.currency_formats["standard"]
+
+        precision = get_currency_precision(currency_code)
+        self._quantum = decimal.Decimal(1).scaleb(-precision)
+        self._decimal_symbol = get_decimal_symbol(self.locale) if precision else ""
+        self._group_symbol = get_group_symbol(self.locale)
+        self._grouping = self.pattern.grouping
+        self._min_int_digits = self.pattern.int_prec[0]
+
+        currency_symbol = get_currency_symbol(currency_code, self.locale)
+
+        def compileAffix(affix: str) -> str:
+            affix = affix.replace("¤¤", currency_code.upper())
+            affix = affix.replace("¤", currency_symbol)
+            return re.sub(r"'([^']*)'", lambda m: m.group(1) or "'", affix)
+
+        self._prefix = [compileAffix(affix) for affix in self.pattern.prefix]
+        self._suffix = [compileAffix(affix) for affix in self.pattern.suffix]
+
+        self.compiled = not (
+            self.pattern.scale
+            or self.pattern.exp_prec
+            or "@" in self.pattern.pattern
+            or not self.pattern.number_pattern
+            or "¤¤¤" in "".join(self.pattern.prefix + self.pattern.suffix)
+            or "'" in self._decimal_symbol + self._group_symbol
+        )
+
+    def _formatBabel(self, price: Union[float, decimal.Decimal]) -> str:
+        return self.pattern.apply(price, self.locale, currency=self.currency_code)
+
+    def format(self, price: Union[float, decimal.Decimal]) -> str:
+        if not self.compiled:
+            return self._formatBabel(price)
+
+        value = price
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(price))
+        if not value.is_finite():
+            return self._formatBabel(price)
+
+        is_negative = int(value.is_signed())
+        rounded = abs(value).quantize(self._quantum)
+        integer, _, fraction = f"{rounded:f}".partition(".")
+
+        if len(integer) < self._min_int_digits:
+            integer = "0" * (self._min_int_digits - len(integer)) + integer
+        group_size = self._grouping[0]
+        grouped = ""
+        while len(integer) > group_size:
+            grouped = self._group_symbol + integer[-group_size:] + grouped
+            integer = integer[:-group_size]
+            group_size = self._grouping[1]
+
+        return "".join(
+            [
+                self._prefix[is_negative],
+                integer,
+                grouped,
+                self._decimal_symbol,
+                fraction,
+                self._suffix[is_negative],
+            ]
+        )
+
+    def formatMany(self, prices: list[Union[float, decimal.Decimal]]) -> list[str]:
+        format_ = self.format
+        return [format_(price) for price in prices]
+
+
+class PriceFormatterRegistry:
+    """
+    per worker registry of `PriceFormatter` keyed by (language, currency).
+    an invalid pair is kept as None so it isn't parsed again.
+    """
+
+    _max_size: int = 1000  # pairs, only reached with unvalidated input
+    _formatters: dict[tuple[str, str], Optional[PriceFormatter]] = {}
+    _lock = threading.Lock()
+    _hits: int = 0
+    _misses: int = 0
+
+    @classmethod
+    def get(cls, language_code: str, currency_code: str) -> Optional[PriceFormatter]:
+        key = (language_code, currency_code)
+        with cls._lock:
+            if key in cls._formatters:
+                cls._hits += 1
+                return cls._formatters[key]
+
+        try:
+            formatter = PriceFormatter(language_code, currency_code)
+        except Exception:
+            formatter = None
+
+        with cls._lock:
+            cls._misses += 1
+            if len(cls._formatters) >= cls._max_size:
+                cls._formatters.clear()
+            cls._formatters[key] = formatter
+
+        return formatter
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._formatters.clear()
+            cls._hits = 0
+            cls._misses = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            total = cls._hits + cls._misses
+            return {
+                "size": len(cls._formatters),
+                "max_size": cls._max_size,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_ratio": cls._hits / total if total else 0,
+            }
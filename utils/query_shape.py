@@ -0,0 +1,197 @@
+import importlib
+import pkgutil
+from typing import Any, Callable, Literal, Optional, TypeVar
+
+from pydantic import BaseModel
+from pymongo.database import Database
+
+from core.logging import logger
+from domain.model.base_model import MyBaseModel
+from utils import pagination
+
+_TFunc = TypeVar("_TFunc", bound=Callable)
+
+# stages that mean the query is not supported by an index
+BAD_STAGES = ["COLLSCAN", "SORT"]
+
+
+class QueryShape(BaseModel):
+    """
+    filter/sort of a query. filter values are only samples, explain() only care about the shape.
+    an aggregation sets `pipeline` instead, building it from the repository instance.
+    """
+
+    name: str = ""
+    coll_name: str
+    filter: dict = {}
+    sort: list[tuple] = []
+    pipeline: Optional[Callable[[Any], list[dict]]] = None
+
+
+QUERY_SHAPES: list[QueryShape] = []
+
+
+def queryShape(
+    model: type[MyBaseModel],
+    filter: Optional[dict] = None,
+    sort: Optional[list[tuple]] = None,
+    pipeline: Optional[Callable[[Any], list[dict]]] = None,
+) -> Callable[[_TFunc], _TFunc]:
+    """
+    declare a query shape of a repository method, stack it for methods with more than one shape.
+    `pipeline` is called with the repository to build the aggregation the method runs.
+    example:
+    >>> @queryShape(otp_model.OtpModel, filter={"created_by": ""}, sort=[("created_at", -1)])
+    >>> def getLatestByCreatedBy(self, created_by: str): ...
+    >>> @queryShape(cart_model.CartModel, pipeline=listPipeline("updated_at", -1))
+    >>> def getList(self, ...): ...
+    """
+
+    def decorator(func: _TFunc) -> _TFunc:
+        QUERY_SHAPES.append(
+            QueryShape(
+                name=func.__qualname__,
+                coll_name=model.getCollName(),
+                filter=filter or {},
+                sort=sort or [],
+                pipeline=pipeline,
+            )
+        )
+        return func
+
+    return decorator
+
+
+def listPipeline(
+    sort_by: str, sort_order: Literal[-1, 1], after: Any = None, **filters
+) -> Callable[[Any], list[dict]]:
+    """
+    `pipeline` of a repository getList(), built by its `_listMatch(**filters)` and
+    `_listPipeline()`. filter values are samples, `after` is a sample sort value of
+    a cursor page.
+    """
+
+    def build(repo) -> list[dict]:
+        cursor = None
+        if after != None:
+            cursor = pagination.encodeCursor(
+                sort_by=sort_by,
+                sort_order=sort_order,
+                last_doc={sort_by: after, "id": "0"},
+            )
+        return repo._listPipeline(
+            match1=repo._listMatch(**filters),
+            sort_by=sort_by,
+            sort_order=sort_order,
+            do_count=True,
+            cursor=cursor,
+        )
+
+    return build
+
+
+def getQueryShapes() -> list[QueryShape]:
+    """
+    import all repositories so their shapes are registered
+    """
+    import repository
+
+    for module_info in pkgutil.iter_modules(repository.__path__):
+        importlib.import_module(f"repository.{module_info.name}")
+
+    return QUERY_SHAPES
+
+
+def getPlanStages(plan: dict) -> list[str]:
+    stages = []
+    if isinstance(plan, dict):
+        if plan.get("stage"):
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(getPlanStages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(getPlanStages(item))
+
+    return stages
+
+
+def getWinningPlans(explain: Any) -> list[dict]:
+    """
+    winning plans of an explain() result. an aggregation has one per $cursor stage,
+    rejected plans are not what runs.
+    """
+    plans = []
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                plans.append(value)
+            elif key != "rejectedPlans":
+                plans.extend(getWinningPlans(value))
+    elif isinstance(explain, list):
+        for item in explain:
+            plans.extend(getWinningPlans(item))
+
+    return plans
+
+
+def explainQueryShape(db: Database, shape: QueryShape, repo: Any = None) -> list[str]:
+    """
+    stages of the winning plan of `shape`, `repo` builds its pipeline if any
+    """
+    if shape.pipeline != None:
+        command = {
+            "aggregate": shape.coll_name,
+            "pipeline": shape.pipeline(repo),
+            "cursor": {},
+        }
+    else:
+        command = {"find": shape.coll_name, "filter": shape.filter, "limit": 1}
+        if shape.sort:
+            command["sort"] = {field: order for field, order in shape.sort}
+
+    result = db.command("explain", command, verbosity="queryPlanner")
+    stages = getPlanStages(getWinningPlans(result))
+    # a $sort the query layer couldn't take is left to the pipeline, in memory
+    for stage in result.get("stages", []):
+        if "$sort" in stage:
+            stages.append("SORT")
+
+    return stages
+
+
+def auditQueryShapes(db: Database, repos: Optional[list] = None) -> list[QueryShape]:
+    """
+    explain() every registered shape, return shapes that use COLLSCAN or in-memory SORT.
+    `repos` are the repository instances building the pipelines of aggregation shapes.
+    run `--ensure-indexes` first, a shape of a missing collection (EOF plan) is reported as failed too.
+    """
+    logger.info("Auditing repository query shapes")
+    repos_by_name = {type(repo).__name__: repo for repo in repos or []}
+
+    failed = []
+    for shape in getQueryShapes():
+        repo = repos_by_name.get(shape.name.split(".")[0])
+        if shape.pipeline != None and repo == None:
+            failed.append(shape)
+            logger.warning(f"\tFAIL {shape.name} {shape.coll_name}: no repository")
+            continue
+
+        stages = explainQueryShape(db=db, shape=shape, repo=repo)
+        is_failed = (
+            any(stage in BAD_STAGES for stage in stages) or stages == ["EOF"]
+        )
+        if is_failed:
+            failed.append(shape)
+
+        log = logger.warning if is_failed else logger.info
+        query = f"filter={list(shape.filter)} sort={shape.sort}"
+        if shape.pipeline != None:
+            query = f"pipeline={[next(iter(stage)) for stage in shape.pipeline(repo)]}"
+        log(
+            f"\t{'FAIL' if is_failed else 'ok  '} {shape.name} {shape.coll_name} "
+            f"{query}: {' <- '.join(stages)}"
+        )
+
+    logger.info(f"{len(failed)} of {len(QUERY_SHAPES)} query shapes are not indexed")
+    return failed
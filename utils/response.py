@@ -0,0 +1,96 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Optional
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+# compiled serializers, one per response type (each generic parametrization is a type)
+_ADAPTERS: dict[Any, TypeAdapter] = {}
+
+
+def getTypeAdapter(type_: Any) -> TypeAdapter:
+    adapter = _ADAPTERS.get(type_)
+    if adapter == None:
+        adapter = _ADAPTERS.setdefault(type_, TypeAdapter(type_))
+    return adapter
+
+
+def dumpJson(content: BaseModel) -> bytes:
+    return getTypeAdapter(type(content)).dump_json(content, by_alias=True)
+
+
+def rawJsonResp(
+    body: bytes, status_code: int = 200, headers: Optional[dict[str, str]] = None
+) -> Response:
+    """
+    response of a body serialized earlier, see dumpJson
+    """
+    return Response(
+        content=body,
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+def etag(*parts) -> str:
+    """
+    weak etag of what a response is built from (versions, updated_at, user settings),
+    so a request can be validated before the response is built
+    """
+    digest = hashlib.blake2b(
+        json.dumps(parts, sort_keys=True, default=str).encode(), digest_size=16
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etagMatches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    whether an If-None-Match header matches `etag` (weak comparison)
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+def validatorHeaders(
+    etag: str, last_modified: Optional[datetime] = None
+) -> dict[str, str]:
+    """
+    headers of a response that can be revalidated, per user since every route
+    needs a token
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified != None:
+        if last_modified.tzinfo == None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(
+            last_modified.astimezone(timezone.utc), usegmt=True
+        )
+    return headers
+
+
+def notModifiedResp(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def jsonResp(
+    content: BaseModel, status_code: int = 200, headers: Optional[dict[str, str]] = None
+) -> Response:
+    """
+    serialize a response model the handler built (so already validated) in one pass.
+    fastapi returns a Response as is, skipping the second validation against
+    `response_model` and jsonable_encoder. keep `response_model` on the route,
+    it still documents the schema.
+    example:
+    >>> return response_utils.jsonResp(generic_resp.RespData[...](data=data))
+    """
+    return rawJsonResp(dumpJson(content), status_code=status_code, headers=headers)
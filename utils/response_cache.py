@@ -0,0 +1,101 @@
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from config.env import Env
+from utils.ttl_cache import TtlCache
+
+
+class ResponseCache(TtlCache):
+    """
+    per worker LRU cache of serialized response bodies.
+    callers put the versions of what a response is built from in its key (see
+    `CollVersion`), so a write makes the entry stale.
+    `Env.RESPONSE_CACHE_TTL_SECONDS` bounds everything else, keep it under
+    `Env.PRESIGNED_URL_REFRESH_MARGIN_SECONDS` so cached image urls are still valid.
+    concurrent misses of a key wait for the first one to build it (single flight).
+    """
+
+    # key: body being built, only touched from the event loop
+    _building: dict[str, asyncio.Future] = {}
+    _coalesced: int = 0  # misses served by another request's build
+    _bytes: int = 0
+
+    @staticmethod
+    def ttlSeconds() -> float:
+        return Env.RESPONSE_CACHE_TTL_SECONDS
+
+    @staticmethod
+    def maxSize() -> int:
+        return Env.RESPONSE_CACHE_MAX_SIZE
+
+    @staticmethod
+    def key(name: str, *parts) -> str:
+        return json.dumps([name, *parts], sort_keys=True, default=str)
+
+    @classmethod
+    def _stored(cls, key: Hashable, value: Any):
+        cls._bytes += len(value)
+
+    @classmethod
+    def _pop(cls, key: Hashable) -> Optional[tuple[Any, float]]:
+        entry = super()._pop(key)
+        if entry:
+            cls._bytes -= len(entry[0])
+        return entry
+
+    @classmethod
+    async def getOrBuild(cls, key: str, build: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        cached body of `key`, else the body `build()` returns, built once however
+        many requests miss at the same time. errors of `build()` are raised to every
+        waiting request.
+        """
+        while True:
+            body = cls.get(key)
+            if body != None:
+                return body
+
+            future = cls._building.get(key)
+            if future == None:
+                break
+
+            with cls._lock:
+                cls._coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # the request building it went away, build it again
+
+        future = asyncio.get_running_loop().create_future()
+        cls._building[key] = future
+        try:
+            body = await build()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # raised by the waiters, don't log it as unretrieved
+            raise
+        finally:
+            del cls._building[key]
+
+        cls.set(key, body)
+        future.set_result(body)
+        return body
+
+    @classmethod
+    def clear(cls):
+        super().clear()
+        with cls._lock:
+            cls._coalesced = 0
+            cls._bytes = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        stats = super().stats()
+        with cls._lock:
+            return {**stats, "coalesced": cls._coalesced, "bytes": cls._bytes}
@@ -46,14 +46,7 @@ class AuthUtil:
             payload=jwt_payload.model_dump(mode="json"), secret=Env.JWT_SECRET_KEY
         )
 
-        # remove previous refresh token
-        prev_refresh_token = self.refresh_token_repo.getLastByCreatedBy(
-            created_by=user.id
-        )
-        if prev_refresh_token:
-            self.refresh_token_repo.delete(id=prev_refresh_token.id)
-
-        # generate refresh token
+        # generate refresh token, replacing the previous one
         time_now = helper.timeNow()
         new_refresh_token = refresh_token_model.RefreshTokenModel(
             id=helper.generateUUID4(),
@@ -65,6 +58,6 @@ class AuthUtil:
                 ).timestamp()
             ),
         )
-        self.refresh_token_repo.create(data=new_refresh_token)
+        self.refresh_token_repo.rotate(data=new_refresh_token)
 
         return jwt_token, new_refresh_token.id
\ No newline at end of file
@@ -0,0 +1,246 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from core.logging import logger
+from domain.dto import product_dto
+from repository import category_repo, product_repo, review_repo
+from utils import helper
+from utils.prefix_index import PrefixEntry, PrefixIndex, normalizeName
+
+# re-read what changed a bit before the last refresh started, writes stamp
+# updated_at before they land
+_WATERMARK_OVERLAP = timedelta(seconds=30)
+
+
+class SuggestIndex:
+    """
+    per worker autocomplete of product names, brands and category names.
+    popularity is the number of reviews of a product, and the number of products
+    of a brand or a category.
+    a background thread builds everything at startup and every `rebuild_seconds`
+    (the only way deletes are seen), and applies products and categories updated
+    since the previous pass every `refresh_seconds`. review counts are only
+    recomputed on rebuild.
+    call `init()` on app startup and `close()` on shutdown.
+    """
+
+    _products = PrefixIndex()
+    _brands = PrefixIndex()  # id is the normalized brand
+    _categories = PrefixIndex()
+    _product_brands: dict[str, str] = {}  # product id: normalized brand
+    _product_categories: dict[str, str] = {}  # product id: category id
+    _category_names: dict[str, str] = {}
+    _watermark: Optional[datetime] = None
+    _built_at: float = 0  # monotonic
+    _rebuilds: int = 0
+    _refreshes: int = 0
+    _failures: int = 0
+    # searches read while the refresh thread writes
+    _lock = threading.Lock()
+
+    _product_repo: Optional[product_repo.ProductRepo] = None
+    _category_repo: Optional[category_repo.CategoryRepo] = None
+    _review_repo: Optional[review_repo.ReviewRepo] = None
+    _stop_event: Optional[threading.Event] = None
+    _thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def init(
+        cls,
+        product_repo: product_repo.ProductRepo,
+        category_repo: category_repo.CategoryRepo,
+        review_repo: review_repo.ReviewRepo,
+        refresh_seconds: float,
+        rebuild_seconds: float,
+    ):
+        cls._product_repo = product_repo
+        cls._category_repo = category_repo
+        cls._review_repo = review_repo
+        cls._stop_event = threading.Event()
+        # the first build runs in the thread, suggestions are empty until it's done
+        cls._thread = threading.Thread(
+            target=cls._run,
+            args=(refresh_seconds, rebuild_seconds),
+            name="suggest-index",
+            daemon=True,
+        )
+        cls._thread.start()
+
+    @classmethod
+    def close(cls):
+        if cls._stop_event:
+            cls._stop_event.set()
+        if cls._thread:
+            cls._thread.join()
+        cls._thread = None
+        cls._stop_event = None
+
+    @classmethod
+    def _run(cls, refresh_seconds: float, rebuild_seconds: float):
+        cls._safely(cls.rebuild)
+        while not cls._stop_event.wait(refresh_seconds):
+            if time.monotonic() - cls._built_at >= rebuild_seconds:
+                cls._safely(cls.rebuild)
+            else:
+                cls._safely(cls.refresh)
+
+    @classmethod
+    def _safely(cls, func):
+        try:
+            func()
+        except Exception as e:
+            logger.warning(f"failed to update suggest index: {e}")
+            with cls._lock:
+                cls._failures += 1
+
+    @classmethod
+    def rebuild(cls):
+        started_at = helper.timeNow()
+        review_counts = cls._review_repo.countByProduct()
+
+        products: list[PrefixEntry] = []
+        product_brands = {}
+        product_categories = {}
+        brand_names = {}  # normalized: first spelling seen
+        brand_counts: dict[str, int] = {}
+        category_counts: dict[str, int] = {}
+        for product in cls._product_repo.getSuggestSources():
+            products.append(
+                (product.id, product.name, review_counts.get(product.id, 0))
+            )
+            brand = normalizeName(product.brand or "")
+            if brand:
+                product_brands[product.id] = brand
+                brand_names.setdefault(brand, product.brand)
+                brand_counts[brand] = brand_counts.get(brand, 0) + 1
+            if product.category_id:
+                product_categories[product.id] = product.category_id
+                category_counts[product.category_id] = (
+                    category_counts.get(product.category_id, 0) + 1
+                )
+
+        category_names = {
+            category.id: category.name
+            for category in cls._category_repo.getSuggestSources()
+        }
+
+        products_index = PrefixIndex(products)
+        brands_index = PrefixIndex(
+            (brand, brand_names[brand], count) for brand, count in brand_counts.items()
+        )
+        categories_index = PrefixIndex(
+            (id, name, category_counts.get(id, 0))
+            for id, name in category_names.items()
+        )
+        with cls._lock:
+            cls._products = products_index
+            cls._brands = brands_index
+            cls._categories = categories_index
+            cls._product_brands = product_brands
+            cls._product_categories = product_categories
+            cls._category_names = category_names
+            cls._watermark = started_at - _WATERMARK_OVERLAP
+            cls._built_at = time.monotonic()
+            cls._rebuilds += 1
+
+    @classmethod
+    def refresh(cls):
+        """
+        apply products and categories updated since the previous pass
+        """
+        started_at = helper.timeNow()
+        since = cls._watermark
+        products = list(cls._product_repo.getSuggestSources(updated_since=since))
+        categories = cls._category_repo.getSuggestSources(updated_since=since)
+
+        with cls._lock:
+            for category in categories:
+                cls._category_names[category.id] = category.name
+                count = (cls._categories.get(category.id) or ("", 0))[1]
+                cls._categories.put(category.id, category.name, count)
+
+            for product in products:
+                cls._applyProduct(product)
+
+            cls._watermark = started_at - _WATERMARK_OVERLAP
+            cls._refreshes += 1
+
+        # only this thread writes, the compacted copies are built outside the lock
+        compacted = {}
+        for name in ["_products", "_brands", "_categories"]:
+            index: PrefixIndex = getattr(cls, name)
+            if index.needsCompaction():
+                compacted[name] = PrefixIndex(index.entries())
+        if compacted:
+            with cls._lock:
+                for name, index in compacted.items():
+                    setattr(cls, name, index)
+
+    @classmethod
+    def _applyProduct(cls, product: product_dto.ProductSuggestSource):
+        # review count is kept until the next rebuild
+        score = (cls._products.get(product.id) or ("", 0))[1]
+        cls._products.put(product.id, product.name, score)
+
+        brand = normalizeName(product.brand or "")
+        old_brand = cls._product_brands.get(product.id)
+        if brand != old_brand:
+            if old_brand:
+                # a brand exists as long as a product has it
+                cls._addCount(cls._brands, old_brand, None, -1, remove_empty=True)
+                del cls._product_brands[product.id]
+            if brand:
+                cls._addCount(cls._brands, brand, product.brand, 1)
+                cls._product_brands[product.id] = brand
+
+        old_category_id = cls._product_categories.get(product.id)
+        if product.category_id != old_category_id:
+            if old_category_id:
+                cls._addCount(cls._categories, old_category_id, None, -1)
+                del cls._product_categories[product.id]
+            if product.category_id:
+                name = cls._category_names.get(product.category_id)
+                cls._addCount(cls._categories, product.category_id, name, 1)
+                cls._product_categories[product.id] = product.category_id
+
+    @staticmethod
+    def _addCount(
+        index: PrefixIndex,
+        id: str,
+        name: Optional[str],
+        delta: int,
+        remove_empty: bool = False,
+    ):
+        entry = index.get(id)
+        count = (entry[1] if entry else 0) + delta
+        name = entry[0] if entry else name
+        if count <= 0 and remove_empty:
+            index.remove(id)
+        elif name:
+            index.put(id, name, max(count, 0))
+
+    @classmethod
+    def search(cls, query: str, limit: int = 10) -> dict[str, list[PrefixEntry]]:
+        with cls._lock:
+            return {
+                "products": cls._products.search(query, limit),
+                "brands": cls._brands.search(query, limit),
+                "categories": cls._categories.search(query, limit),
+            }
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "products": len(cls._products),
+                "brands": len(cls._brands),
+                "categories": len(cls._categories),
+                "age_seconds": (
+                    time.monotonic() - cls._built_at if cls._built_at else 0
+                ),
+                "rebuilds": cls._rebuilds,
+                "refreshes": cls._refreshes,
+                "failures": cls._failures,
+            }
@@ -0,0 +1,134 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TtlCache(ABC):
+    """
+    base of the per worker LRU caches with a TTL. a subclass is one cache with its
+    own entries and stats, it must define `ttlSeconds()` and `maxSize()` (checked
+    when it is defined, caches are used through the class, never instantiated).
+    with `versioned`, keys are (name, version, ...) tuples, version being the
+    `CollVersion` of what the value is read from (or a tuple of them, compared in
+    order). a key of a newer version drops the entries of the older ones of its
+    name, the TTL bounds the drift of writes that didn't bump the version.
+    """
+
+    versioned: bool = False
+
+    _entries: "OrderedDict[Hashable, tuple[Any, float]]"  # key: (value, expires_at)
+    _versions: dict[Hashable, Any]  # versioned only, name: newest version
+    _lock: threading.Lock
+    _hits: int
+    _misses: int
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [
+            name
+            for name in ("ttlSeconds", "maxSize")
+            if getattr(getattr(cls, name), "__isabstractmethod__", False)
+        ]
+        if missing:
+            raise TypeError(f"{cls.__name__} must define {', '.join(missing)}")
+
+        cls._entries = OrderedDict()
+        cls._versions = {}
+        cls._lock = threading.Lock()
+        cls._hits = 0
+        cls._misses = 0
+
+    @staticmethod
+    @abstractmethod
+    def ttlSeconds() -> float:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def maxSize() -> int:
+        pass
+
+    @classmethod
+    def get(cls, key: Hashable) -> Optional[Any]:
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                cls._entries.move_to_end(key)
+                cls._hits += 1
+                return entry[0]
+
+            if entry:
+                cls._pop(key)
+            cls._misses += 1
+            return None
+
+    @classmethod
+    def set(cls, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        `expires_at` is a `time.monotonic()` time, `ttlSeconds()` from now by default
+        """
+        with cls._lock:
+            if cls.versioned and cls._isOutdated(key):
+                return  # a newer version was cached meanwhile, this one is never read
+
+            cls._pop(key)
+            if expires_at == None:
+                expires_at = time.monotonic() + cls.ttlSeconds()
+            cls._entries[key] = (value, expires_at)
+            cls._stored(key, value)
+            while len(cls._entries) > cls.maxSize():
+                cls._pop(next(iter(cls._entries)))
+
+    @classmethod
+    def _isOutdated(cls, key: tuple) -> bool:
+        """
+        whether `key` is of an older version than the newest cached of its name.
+        a newer one drops the entries of the others. call it holding the lock.
+        """
+        name, version = key[0], key[1]
+        newest = cls._versions.get(name)
+        if newest != None and version < newest:
+            return True
+
+        if newest != None and version > newest:
+            stale_keys = [k for k in cls._entries if k[0] == name and k[1] != version]
+            for stale_key in stale_keys:
+                cls._pop(stale_key)
+        cls._versions[name] = version
+        return False
+
+    @classmethod
+    def _stored(cls, key: Hashable, value: Any):
+        """
+        called holding the lock after `value` is stored, for subclasses tracking
+        their entries
+        """
+
+    @classmethod
+    def _pop(cls, key: Hashable) -> Optional[tuple[Any, float]]:
+        """
+        remove the entry of `key`, call it holding the lock
+        """
+        return cls._entries.pop(key, None)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._versions.clear()
+            cls._hits = 0
+            cls._misses = 0
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            total = cls._hits + cls._misses
+            return {
+                "size": len(cls._entries),
+                "max_size": cls.maxSize(),
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "hit_ratio": cls._hits / total if total else 0,
+            }